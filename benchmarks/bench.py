@@ -0,0 +1,315 @@
+"""Benchmarks of the hot paths of the game: generating tickets, marking them, rendering the displays and persisting
+the tickets.
+
+Each benchmark reports the best time per operation over a few repeats, in seconds. The results are compared against
+a stored baseline, and the run fails if any benchmark got slower than the baseline by more than the tolerance.
+
+Usage (from the root of the repo):
+    python benchmarks/bench.py                          Run, and compare against benchmarks/baseline.json
+    python benchmarks/bench.py --output results.json    Also write the results out as JSON
+    python benchmarks/bench.py --update-baseline        Run, and store the results as the new baseline
+
+Timings depend on the machine, so refresh the baseline (`make bench-baseline`) when moving to a different one.
+"""
+
+__author__ = 'Aaron Alphonso'
+__email__ = 'alphonsoaaron1993@gmail.com'
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from housie.claims import Prize  # noqa: E402
+from housie.constants import COLUMN_RANGES  # noqa: E402
+from housie.display_util import _complex_display_followed_game  # noqa: E402
+from housie.game import mark_tickets  # noqa: E402
+from housie.generate_ticket import assign_to_rows, generate_ticket, generate_tickets_bulk, grid_ticket_rows, \
+    tickets_from_grid  # noqa: E402
+from housie.leaderboard import Leaderboard  # noqa: E402
+from housie.models import Board, Ticket, TicketData, TicketPool, TicketRegistry, load_tickets  # noqa: E402
+from housie.probability import first_winner_odds  # noqa: E402
+from housie.storage import write_tickets_jsonl  # noqa: E402
+from housie.utils import save_json  # noqa: E402
+from housie.validate import validate_tickets  # noqa: E402
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# A benchmark has regressed if it takes more than (1 + tolerance) times as long as its baseline. The default is loose
+# enough to ride out the noise of a busy machine while still catching changes in complexity
+DEFAULT_TOLERANCE = 1.0
+
+# Number of times each benchmark is run. The best run is kept, as the others only add noise from the rest of the system
+REPEAT = 5
+
+# Numbers of tickets in play for the marking benchmarks
+MARKING_SIZES = [1000, 10000, 100000]
+
+# Tickets per player, and number of players, of the files used by the persistence benchmarks
+TICKETS_PER_PLAYER = 10
+FILE_PLAYERS = [100, 1000]
+
+SEED = 1234
+
+# name -> function returning the time per operation of one run
+BENCHMARKS: Dict[str, Callable[[], float]] = {}
+
+
+def benchmark(name: str) -> Callable[[Callable[[], float]], Callable[[], float]]:
+    """Registers a benchmark"""
+    def register(func: Callable[[], float]) -> Callable[[], float]:
+        """Adds the function to BENCHMARKS under the name"""
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def time_per_operation(func: Callable[[], Any], operations: int) -> float:
+    """Runs func once, and returns the time it took divided by the number of operations it does.
+    Like timeit, garbage collection is turned off while timing so that it doesn't add noise"""
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        func()
+        return (time.perf_counter() - start) / operations
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def _ticket_data(ticket_count: int, registry: bool = False, pool: bool = False) -> TicketData:
+    """Returns the given number of tickets, split among players of TICKETS_PER_PLAYER tickets each"""
+    tickets = list(tickets_from_grid(generate_tickets_bulk(ticket_count, seed=SEED)))
+    ticket_data: Dict[str, List[Ticket]] = TicketRegistry() if registry else {}
+    for start in range(0, ticket_count, TICKETS_PER_PLAYER):
+        ticket_data['Player{}'.format(start // TICKETS_PER_PLAYER)] = tickets[start: start + TICKETS_PER_PLAYER]
+    return TicketPool(ticket_data) if pool else ticket_data
+
+
+@benchmark('generate_ticket')
+def bench_generate_ticket() -> float:
+    """Generates tickets one at a time"""
+    rng = random.Random(SEED)
+    return time_per_operation(lambda: [generate_ticket(rng) for _ in range(2000)], 2000)
+
+
+@benchmark('generate_tickets_bulk')
+def bench_generate_tickets_bulk() -> float:
+    """Generates tickets in bulk into a grid"""
+    return time_per_operation(lambda: generate_tickets_bulk(20000, seed=SEED), 20000)
+
+
+@benchmark('assign_to_rows')
+def bench_assign_to_rows() -> float:
+    """Lays out the numbers of each column of a ticket onto its rows"""
+    rng = random.Random(SEED)
+    column_numbers = []
+    for _ in range(2000):
+        counts = [1] * len(COLUMN_RANGES)
+        for column in rng.sample(range(len(COLUMN_RANGES)), 6):
+            counts[column] += 1
+        column_numbers.append({column_range: sorted(rng.sample(range(column_range.start, column_range.end + 1),
+                                                               count))
+                               for column_range, count in zip(COLUMN_RANGES, counts)})
+    return time_per_operation(lambda: [assign_to_rows(numbers) for numbers in column_numbers], len(column_numbers))
+
+
+@benchmark('validate_tickets')
+def bench_validate_tickets() -> float:
+    """Validates a batch of generated tickets"""
+    grid = generate_tickets_bulk(20000, seed=SEED)
+    records = [('Player', grid_ticket_rows(grid, index)) for index in range(20000)]
+    return time_per_operation(lambda: validate_tickets(records), len(records))
+
+
+def _bench_marking(ticket_count: int, registry: bool = False, pool: bool = False) -> Callable[[], float]:
+    def bench() -> float:
+        """Marks numbers on the tickets through mark_tickets"""
+        ticket_data = _ticket_data(ticket_count, registry, pool)
+        numbers = random.Random(SEED).sample(range(1, 91), 10)
+
+        def mark() -> None:
+            """Marks each of the numbers"""
+            for number in numbers:
+                mark_tickets(number, ticket_data)
+        return time_per_operation(mark, len(numbers))
+    return bench
+
+
+for _size in MARKING_SIZES:
+    benchmark('mark_tickets[{}]'.format(_size))(_bench_marking(_size, registry=False))
+    benchmark('mark_tickets_registry[{}]'.format(_size))(_bench_marking(_size, registry=True))
+    benchmark('mark_tickets_pool[{}]'.format(_size))(_bench_marking(_size, pool=True))
+
+
+@benchmark('Leaderboard.call[10000]')
+def bench_leaderboard_call() -> float:
+    """Updates a leaderboard of tickets with each number called"""
+    leaderboard = Leaderboard(_ticket_data(10000, pool=True))
+    numbers = random.Random(SEED).sample(range(1, 91), 30)
+    return time_per_operation(lambda: leaderboard.call_many(numbers), len(numbers))
+
+
+@benchmark('first_winner_odds[10000]')
+def bench_first_winner_odds() -> float:
+    """Works out the odds of each ticket being the first to a Full House"""
+    leaderboard = Leaderboard(_ticket_data(10000, pool=True))
+    board = Board(seed=SEED)
+    leaderboard.attach(board)
+    board.pick_many(30)
+    counts = leaderboard.counts(Prize.FULL_HOUSE)
+    return time_per_operation(lambda: [first_winner_odds(counts, board.remaining_count) for _ in range(100)], 100)
+
+
+@benchmark('Ticket.mark_number')
+def bench_mark_number() -> float:
+    """Marks numbers on regular tickets one at a time"""
+    tickets = list(tickets_from_grid(generate_tickets_bulk(10000, seed=SEED)))
+
+    def mark() -> None:
+        """Marks every ninth number on each of the tickets"""
+        for number in range(1, 91, 9):
+            for ticket in tickets:
+                ticket.mark_number(number)
+    return time_per_operation(mark, len(tickets) * 10)
+
+
+@benchmark('structural_display')
+def bench_structural_display() -> float:
+    """Renders tickets in their structural display"""
+    tickets = list(tickets_from_grid(generate_tickets_bulk(2000, seed=SEED)))
+    for ticket in tickets[::2]:
+        ticket.mark_numbers(ticket.numbers[:7])
+    return time_per_operation(lambda: [ticket.structural_display() for ticket in tickets], len(tickets))
+
+
+@benchmark('_complex_display_followed_game')
+def bench_complex_display() -> float:
+    """Renders the screen of a followed game"""
+    ticket_data = _ticket_data(6)
+    board = Board(seed=SEED)
+    board.pick_many(40)
+    for tickets in ticket_data.values():
+        for ticket in tickets:
+            ticket.mark_numbers(board.selected)
+
+    def render() -> None:
+        """Renders the screen a number of times, throwing away the output"""
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(200):
+                _complex_display_followed_game(board, ticket_data, 'structural_display', 36)
+    return time_per_operation(render, 200)
+
+
+def _bench_files(players: int) -> Dict[str, Callable[[], float]]:
+    ticket_count = players * TICKETS_PER_PLAYER
+    records = {name: [ticket.rows for ticket in tickets] for name, tickets in _ticket_data(ticket_count).items()}
+
+    def bench_save_json() -> float:
+        """Saves the tickets as a json file"""
+        with tempfile.TemporaryDirectory() as directory:
+            return time_per_operation(lambda: save_json(records, os.path.join(directory, 'tickets.json')), 1)
+
+    def bench_load_json(validate: bool) -> Callable[[], float]:
+        """Returns a benchmark loading the tickets from a json file"""
+        def bench() -> float:
+            """Loads the tickets from a json file"""
+            with tempfile.TemporaryDirectory() as directory:
+                file_name = os.path.join(directory, 'tickets.json')
+                save_json(records, file_name)
+                return time_per_operation(lambda: load_tickets(file_name, validate=validate), 1)
+        return bench
+
+    def bench_load_jsonl(validate: bool) -> Callable[[], float]:
+        """Returns a benchmark loading the tickets from a JSON Lines file"""
+        def bench() -> float:
+            """Loads the tickets from a JSON Lines file"""
+            with tempfile.TemporaryDirectory() as directory:
+                file_name = os.path.join(directory, 'tickets.jsonl')
+                write_tickets_jsonl(((name, rows) for name, tickets in records.items() for rows in tickets), file_name)
+                return time_per_operation(lambda: load_tickets(file_name, validate=validate), 1)
+        return bench
+
+    # Loading alone, and with the tickets checked as load_tickets does by default
+    return {'save_json[{}]'.format(ticket_count): bench_save_json,
+            'load_tickets_json[{}]'.format(ticket_count): bench_load_json(validate=False),
+            'load_tickets_jsonl[{}]'.format(ticket_count): bench_load_jsonl(validate=False),
+            'load_tickets_validated_json[{}]'.format(ticket_count): bench_load_json(validate=True),
+            'load_tickets_validated_jsonl[{}]'.format(ticket_count): bench_load_jsonl(validate=True)}
+
+
+for _players in FILE_PLAYERS:
+    BENCHMARKS.update(_bench_files(_players))
+
+
+def run(names: Optional[List[str]] = None) -> Dict[str, float]:
+    """Runs the benchmarks (all of them by default), and returns the best time per operation of each"""
+    results = {}
+    for name in names or list(BENCHMARKS):
+        results[name] = min(BENCHMARKS[name]() for _ in range(REPEAT))
+        print('{:<40}{:>14.3f} us'.format(name, results[name] * 1e6), file=sys.stderr)
+    return results
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], tolerance: float) -> List[str]:
+    """Returns a message for each benchmark which is slower than its baseline by more than the tolerance"""
+    regressions = []
+    for name, seconds in results.items():
+        expected = baseline.get(name)
+        if expected and seconds > expected * (1 + tolerance):
+            regressions.append('{} took {:.3f} us, {:.0%} slower than the baseline of {:.3f} us'.format(
+                name, seconds * 1e6, seconds / expected - 1, expected * 1e6))
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Runs the benchmarks from the command line. Returns the exit code, which is 1 if any benchmark regressed"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--baseline', default=BASELINE_FILE, help='baseline results to compare against')
+    parser.add_argument('--output', help='file to write the results to, as JSON')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='how much slower than the baseline a benchmark may be, e.g. 0.5 for 50%%')
+    parser.add_argument('--update-baseline', action='store_true', help='store the results as the new baseline')
+    parser.add_argument('names', nargs='*', metavar='name', help='benchmarks to run (default: all)')
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error('unknown benchmarks: {} (choose from {})'.format(', '.join(unknown), ', '.join(BENCHMARKS)))
+
+    results = run(args.names)
+    report = {'python': platform.python_version(), 'results': results}
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, 'w') as file:
+            json.dump(report, file, indent=2)
+        print('Baseline written to {}'.format(args.baseline), file=sys.stderr)
+        return 0
+
+    try:
+        with open(args.baseline) as file:
+            baseline = json.load(file)['results']
+    except FileNotFoundError:
+        print('No baseline found at {}, run with --update-baseline to create one'.format(args.baseline),
+              file=sys.stderr)
+        return 0
+    regressions = compare(results, baseline, args.tolerance)
+    for message in regressions:
+        print('REGRESSION: ' + message, file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
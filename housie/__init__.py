@@ -1,13 +1,83 @@
 """Core models and logic required to simulate a game of Housie
 Board - For holding the state of the Housie board and the numbers selected so far.
 Ticket - For representing a single Housie ticket and the numbers on it as well as the numbers marked
+TicketPool - For holding millions of tickets in memory, in a few flat arrays instead of one object per ticket
 generate_ticket - A function that generates tickets for use in the game
+ClaimEngine - For detecting the tickets that win each prize as numbers are called out
+verify_claims - For checking the prizes claimed by players against the numbers called out
+validate_tickets - For checking a whole book of tickets against the rules of a ticket, with a report of each invalid one
+
+The names above are imported lazily, the first time they are used, so that importing the package (e.g. only to read
+a ticket book) doesn't pay for loading the game, the displays and everything they pull in.
 """
 
 __author__ = 'Aaron Alphonso'
 __email__ = 'alphonsoaaron1993@gmail.com'
 
+import sys
+from importlib import import_module
+from types import ModuleType
+from typing import TYPE_CHECKING, Any, Dict, List
+
+# The module each of the public names of the package is imported from
+_LAZY_NAMES: Dict[str, str] = {
+    'Board': 'housie.models',
+    'Ticket': 'housie.models',
+    'CompactTicket': 'housie.models',
+    'TicketRegistry': 'housie.models',
+    'TicketPool': 'housie.models',
+    'demo_board': 'housie.models',
+    'demo_ticket': 'housie.models',
+    'load_tickets': 'housie.models',
+    'generate_ticket': 'housie.generate_ticket',
+    'generate_tickets_bulk': 'housie.generate_ticket',
+    'demo_ticket_generation': 'housie.generate_ticket',
+    'generate_strip': 'housie.generate_strip',
+    'generate_strips_bulk': 'housie.generate_strip',
+    'validate_strip': 'housie.generate_strip',
+    'ClaimEngine': 'housie.claims',
+    'Prize': 'housie.claims',
+    'WinnerEvent': 'housie.claims',
+    'verify_claims': 'housie.claims',
+    'validate_tickets': 'housie.validate',
+    'display_main_menu': 'housie.game',
+}
+
+__all__ = list(_LAZY_NAMES)
+
+if TYPE_CHECKING:
+    from .models import Board, Ticket, CompactTicket, TicketRegistry, TicketPool, demo_board, demo_ticket, \
+        load_tickets
+    from .generate_ticket import generate_ticket, generate_tickets_bulk, demo_ticket_generation
+    from .generate_strip import generate_strip, generate_strips_bulk, validate_strip
+    from .claims import ClaimEngine, Prize, WinnerEvent, verify_claims
+    from .validate import validate_tickets
+    from .game import display_main_menu
+
+
+class _LazyModule(ModuleType):
+    """The class of the housie package module, importing its public names on first use.
+
+    A class attribute lookup is used rather than a module level __getattr__ as it also works on Python 3.6.
+    """
+
+    def __getattr__(self, name: str) -> Any:
+        module_name = _LAZY_NAMES.get(name)
+        if module_name is None:
+            raise AttributeError("module '{}' has no attribute '{}'".format(self.__name__, name))
+        value = getattr(import_module(module_name), name)
+        self.__dict__[name] = value
+        return value
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        # Importing a submodule sets it as an attribute of the package. generate_ticket and generate_strip are both
+        # submodules and functions of the package though, and the package attribute has always been the function
+        if isinstance(value, ModuleType) and name in _LAZY_NAMES:
+            return
+        super().__setattr__(name, value)
+
+    def __dir__(self) -> List[str]:
+        return sorted(set(self.__dict__) | set(_LAZY_NAMES))
+
 
-from .models import Board, Ticket, demo_board, demo_ticket, load_tickets
-from .generate_ticket import generate_ticket, demo_ticket_generation
-from .game import display_main_menu
+sys.modules[__name__].__class__ = _LazyModule
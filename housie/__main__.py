@@ -2,7 +2,114 @@
 
 This was required as we needed to run the script from the same level as the housie/ package in order for the imports
 to work correctly.
+
+Run without arguments for the interactive menu, or with one of the subcommands below. Pass --profile (before any
+subcommand) to print timings of the hot paths at the end of each game, see housie.instrument. Pass --db FILE and
+--game NAME to keep the games of the menu in a SQLite session store instead, see housie.storage.sqlite_store.
+
+    python -m housie serve [--host HOST] [--port PORT]    Host games for many clients over TCP, see housie.server
+    python -m housie generate --players-file FILE ...      Generate tickets in bulk into a file, see housie.batch
+    python -m housie --db FILE games                       List the games saved in a session store
 """
-from .game import display_main_menu
+import argparse
+import sys
+from typing import List, Optional
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Parses the command line and runs the chosen mode"""
+    parser = argparse.ArgumentParser(prog='python -m housie', description='Housie (Bingo/Tambola) game')
+    parser.add_argument('--profile', action='store_true', help='print timings of the hot paths after each game')
+    parser.add_argument('--profile-output', metavar='FILE', help='also dump cProfile stats to this file on exit')
+    parser.add_argument('--db', metavar='FILE', default=None,
+                        help='SQLite session store to keep the games of the menu in, instead of the files in data/')
+    parser.add_argument('--game', default=None,
+                        help='name of the game in the session store to start or resume (default: default)')
+    subcommands = parser.add_subparsers(dest='command')
+
+    serve_parser = subcommands.add_parser('serve', help='host games for many clients over a line-based TCP protocol')
+    serve_parser.add_argument('--host', default=None, help='address to listen on (default: 127.0.0.1)')
+    serve_parser.add_argument('--port', type=int, default=None, help='port to listen on (default: 7531)')
+    serve_parser.add_argument('--max-pending', type=int, default=None,
+                              help='messages a client can fall behind by before it is disconnected (default: 256)')
+
+    generate_parser = subcommands.add_parser('generate', help='generate tickets in bulk into a file, without display')
+    generate_parser.add_argument('--players-file', required=True,
+                                 help="file with the names of the players, one per line ('-' for stdin)")
+    generate_parser.add_argument('--per-player', type=int, required=True,
+                                 help='number of tickets (or strips) per player')
+    generate_parser.add_argument('--out', required=True, help='file to write the tickets to')
+    generate_parser.add_argument('--format', choices=['jsonl', 'binary'], default=None,
+                                 help='output format (default: binary for .hbook files, jsonl otherwise)')
+    generate_parser.add_argument('--seed', type=int, default=None, help='seed to make the tickets reproducible')
+    generate_parser.add_argument('--workers', type=int, default=1,
+                                 help='number of processes to generate with (0 for every core, default: 1)')
+    generate_parser.add_argument('--strips', action='store_true', help='generate strips of 6 tickets')
+    generate_parser.add_argument('--unique-index', metavar='FILE', default=None,
+                                 help='index of the tickets issued so far, to never issue the same ticket twice')
+
+    subcommands.add_parser('games', help='list the games saved in the session store given with --db')
+
+    args = parser.parse_args(argv)
+    if (args.command == 'games' or args.game) and not args.db:
+        parser.error('{} needs a session store, given with --db'.format('--game' if args.game else 'games'))
+    if args.profile or args.profile_output:
+        from . import instrument
+        instrument.enable(args.profile_output)
+    if args.command == 'serve':
+        from .server import DEFAULT_MAX_PENDING, DEFAULT_SERVER_HOST, DEFAULT_SERVER_PORT, serve
+        serve(args.host or DEFAULT_SERVER_HOST, DEFAULT_SERVER_PORT if args.port is None else args.port,
+              args.max_pending or DEFAULT_MAX_PENDING)
+    elif args.command == 'generate':
+        _generate(args)
+    elif args.command == 'games':
+        _list_games(args.db)
+    elif args.db:
+        from .game import display_main_menu
+        from .storage import DEFAULT_GAME_NAME, SessionStore
+        with SessionStore(args.db) as store:
+            display_main_menu(store, args.game or DEFAULT_GAME_NAME)
+    else:
+        from .game import display_main_menu
+        display_main_menu()
+
+
+def _generate(args: argparse.Namespace) -> None:
+    """Runs the generate subcommand"""
+    from .batch import FORMAT_BINARY, FORMAT_JSONL, generate_batch, read_players, report_batch
+    from .storage import TicketIndex, is_binary_book_file
+    try:
+        if args.players_file == '-':
+            names = read_players(sys.stdin)
+        else:
+            with open(args.players_file) as players_file:
+                names = read_players(players_file)
+    except ValueError as error:
+        sys.exit('{}: {}'.format(args.players_file, error))
+    file_format = args.format or (FORMAT_BINARY if is_binary_book_file(args.out) else FORMAT_JSONL)
+    unique_index = TicketIndex(args.unique_index) if args.unique_index else None
+    try:
+        result = generate_batch(names, args.per_player, args.out, file_format, args.seed, args.workers or None,
+                                args.strips, unique_index)
+    finally:
+        if unique_index is not None:
+            unique_index.close()
+    report_batch(result, args.out)
+
+
+def _list_games(db: str) -> None:
+    """Runs the games subcommand"""
+    import time
+    from .storage import SessionStore
+    with SessionStore(db) as store:
+        games = store.games()
+    if not games:
+        print('No games saved in {} yet'.format(db))
+    for game in games:
+        print('{}: {} players, {} tickets, {} numbers called, last played {}'.format(
+            game.name, game.players, game.tickets, game.calls,
+            time.strftime('%Y-%m-%d %H:%M', time.localtime(game.updated))))
+
 
-display_main_menu()
+if __name__ == '__main__':
+    main()
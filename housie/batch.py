@@ -0,0 +1,90 @@
+"""Non-interactive generation of tickets at scale, for scripting, e.g. in a print pipeline.
+
+Unlike the Generate Tickets menu, nothing is printed to the terminal: the tickets are generated in chunks (optionally
+across several processes, see generate_book) and streamed straight to the output file as JSON lines or as a binary
+ticket book. Run it as `python -m housie generate`, see `python -m housie generate --help`.
+"""
+
+__author__ = 'Aaron Alphonso'
+__email__ = 'alphonsoaaron1993@gmail.com'
+
+import sys
+import time
+from random import Random
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Set, TextIO, Tuple
+
+from housie.constants import TICKET_CELLS, TicketRepresentation
+from housie.generate_book import BOOK_CHUNK_SIZE, iter_book_chunks
+from housie.generate_strip import TICKETS_PER_STRIP
+from housie.generate_ticket import grid_ticket_rows
+from housie.storage import TicketIndex, write_ticket_book, write_tickets_jsonl
+
+FORMAT_JSONL = 'jsonl'
+FORMAT_BINARY = 'binary'
+FORMATS = [FORMAT_JSONL, FORMAT_BINARY]
+
+BatchResult = NamedTuple('BatchResult', [('tickets', int), ('players', int), ('seed', int), ('seconds', float)])
+BatchResult.__doc__ = """What a batch generated: the number of tickets and players, the seed used and the time taken"""
+
+
+def read_players(lines: Iterable[str]) -> List[str]:
+    """Reads the names of the players, one per line. Blank lines and lines starting with # are skipped. A ValueError is
+    raised if a name is listed more than once"""
+    names = [line.strip() for line in lines]
+    names = [name for name in names if name and not name.startswith('#')]
+    _check_names(names)
+    return names
+
+
+def _check_names(names: List[str]) -> None:
+    """Raises a ValueError if any of the names is repeated, as each player gets a single run of tickets"""
+    seen: Set[str] = set()
+    repeated: Set[str] = set()
+    for name in names:
+        if name in seen:
+            repeated.add(name)
+        seen.add(name)
+    if repeated:
+        raise ValueError('Players listed more than once: {}'.format(', '.join(sorted(repeated))))
+
+
+def generate_batch(names: List[str], per_player: int, out: str, file_format: str = FORMAT_JSONL,
+                   seed: Optional[int] = None, workers: Optional[int] = 1, strips: bool = False,
+                   unique_index: Optional[TicketIndex] = None, chunk_size: int = BOOK_CHUNK_SIZE) -> BatchResult:
+    """Generates `per_player` tickets (or strips of 6 tickets if strips is True) for each player, and streams them to
+    the output file in the given format, in the order of the names.
+
+    Without a seed, a random one is picked. It is returned in the result, so the batch can be reproduced. A ValueError
+    is raised before anything is generated if a name is repeated.
+    """
+    if file_format not in FORMATS:
+        raise ValueError('Unknown format {}, expected one of {}'.format(file_format, ', '.join(FORMATS)))
+    _check_names(names)
+    if seed is None:
+        seed = Random().getrandbits(63)
+    start = time.perf_counter()
+    tickets_per_player = per_player * (TICKETS_PER_STRIP if strips else 1)
+    chunks = iter_book_chunks(len(names) * per_player, seed, workers, strips, chunk_size, unique_index)
+    records = _records(names, tickets_per_player, chunks)
+    if file_format == FORMAT_BINARY:
+        count = write_ticket_book(records, out)
+    else:
+        count = write_tickets_jsonl(records, out)
+    return BatchResult(count, len(names), seed, time.perf_counter() - start)
+
+
+def report_batch(result: BatchResult, out: str, stream: Optional[TextIO] = None) -> None:
+    """Prints the outcome and throughput of a batch"""
+    rate = result.tickets / result.seconds if result.seconds else float('inf')
+    print('Generated {} tickets for {} players into {} in {:.2f}s ({:,.0f} tickets/s), seed {}'.format(
+        result.tickets, result.players, out, result.seconds, rate, result.seed), file=stream or sys.stderr)
+
+
+def _records(names: List[str], tickets_per_player: int,
+             chunks: Iterable[bytearray]) -> Iterator[Tuple[str, TicketRepresentation]]:
+    """Turns the chunks of generated tickets into (name, rows) records, handing out tickets_per_player to each name"""
+    ticket_index = 0
+    for chunk in chunks:
+        for index in range(len(chunk) // TICKET_CELLS):
+            yield names[ticket_index // tickets_per_player], grid_ticket_rows(chunk, index)
+            ticket_index += 1
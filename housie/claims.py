@@ -0,0 +1,235 @@
+"""Detection of prize claims (Early Five, lines, corners and Full House) as numbers are called out"""
+
+__author__ = 'Aaron Alphonso'
+__email__ = 'alphonsoaaron1993@gmail.com'
+
+from enum import Enum
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from housie.constants import Number, NUMBER_POOL, Row
+from housie.models import Board, Ticket, TicketData
+from housie.utils import numbers_to_mask
+
+if TYPE_CHECKING:
+    from housie.storage.binary import TicketBook
+
+
+class Prize(Enum):
+    """The prizes that can be won on a ticket"""
+    EARLY_FIVE = 'Early Five'
+    TOP_LINE = 'Top Line'
+    MIDDLE_LINE = 'Middle Line'
+    BOTTOM_LINE = 'Bottom Line'
+    FOUR_CORNERS = 'Four Corners'
+    FULL_HOUSE = 'Full House'
+
+
+PRIZES: List[Prize] = list(Prize)
+
+# The line prizes in the order of the rows of the ticket
+LINE_PRIZES: List[Prize] = [Prize.TOP_LINE, Prize.MIDDLE_LINE, Prize.BOTTOM_LINE]
+
+# Early Five is won by marking any 5 numbers of the ticket
+EARLY_FIVE_COUNT = 5
+
+WinnerEvent = NamedTuple('WinnerEvent', [('prize', Prize), ('name', str), ('ticket_index', int), ('ticket', Ticket),
+                                         ('call_index', int), ('number', Number)])
+WinnerEvent.__doc__ = """Raised when a ticket completes a prize. call_index is the 1-based position of the number in
+the order of numbers called out, and number is the number whose call completed the prize"""
+
+WinnerListener = Callable[[WinnerEvent], None]
+
+Claim = NamedTuple('Claim', [('ticket', Union[Ticket, int]), ('prize', Prize)])
+Claim.__doc__ = """A claim that a ticket has won a prize. The ticket is either a Ticket or the index of a ticket in a
+TicketBook"""
+
+ClaimResult = NamedTuple('ClaimResult', [('claim', Claim), ('valid', bool), ('completed_at', Optional[int])])
+ClaimResult.__doc__ = """The outcome of verifying a claim. completed_at is the 1-based position in the order of numbers
+called out of the number that completed the prize, or None if the claim is not valid"""
+
+
+def prize_numbers(rows: Sequence[Row], prize: Prize) -> List[Number]:
+    """Returns the numbers of the ticket that take part in a prize.
+
+    Four corners are the first and last numbers of the top and bottom rows. Every number takes part in the Early Five
+    and Full House, although Early Five only needs any 5 of them.
+    """
+    if prize in LINE_PRIZES:
+        row_index = LINE_PRIZES.index(prize)
+        return list(rows[row_index]) if row_index < len(rows) else []
+    if prize == Prize.FOUR_CORNERS:
+        if len(rows) < 3 or not rows[0] or not rows[2]:
+            return []
+        return [rows[0][0], rows[0][-1], rows[2][0], rows[2][-1]]
+    return [number for row in rows for number in row]
+
+
+def prize_target(rows: Sequence[Row], prize: Prize) -> int:
+    """Returns how many of the prize numbers of the ticket must be marked to complete the prize"""
+    if prize == Prize.EARLY_FIVE:
+        return min(EARLY_FIVE_COUNT, len(prize_numbers(rows, prize)))
+    return len(prize_numbers(rows, prize))
+
+
+class ClaimEngine:
+    """Keeps count of the numbers left for each prize on each ticket, and raises a WinnerEvent the moment a ticket
+    completes a prize.
+
+    An index of number -> (ticket, prizes the number counts towards) is built once up front, so each call out only
+    updates the counters of the tickets that contain the number, regardless of the total number of tickets in play.
+
+    Feed the engine by attaching it to a Board, or by passing the called numbers to `call` directly.
+    """
+
+    def __init__(self, ticket_data: TicketData) -> None:
+        # Flat list of (name, index of the ticket for that player, ticket). The position in this list is the ticket id
+        self.tickets: List[Tuple[str, int, Ticket]] = []
+        # Counters of the numbers left per prize for each ticket id, in the order of the Prize enum
+        self._remaining: List[List[int]] = []
+        # For each number, the list of (ticket id, positions of the prizes in Prize) that the number counts towards
+        self._index: List[List[Tuple[int, Tuple[int, ...]]]] = [[] for _ in range(len(NUMBER_POOL) + 1)]
+        self._called = bytearray(len(NUMBER_POOL) + 1)
+        self.call_count = 0
+        # Every event raised so far, and the first winner(s) of each prize. Tickets which complete a prize on the same
+        # call are all treated as first winners
+        self.events: List[WinnerEvent] = []
+        self.winners: Dict[Prize, List[WinnerEvent]] = {}
+        self._listeners: List[WinnerListener] = []
+
+        for name, tickets in ticket_data.items():
+            for ticket_index, ticket in enumerate(tickets):
+                self.add_ticket(name, ticket_index, ticket)
+
+    def add_ticket(self, name: str, ticket_index: int, ticket: Ticket) -> int:
+        """Adds a ticket to the game and returns its ticket id.
+        Numbers already called count towards the ticket, but no events are raised for the prizes they complete"""
+        ticket_id = len(self.tickets)
+        rows = ticket.rows
+        self.tickets.append((name, ticket_index, ticket))
+        remaining = [prize_target(rows, prize) for prize in PRIZES]
+        self._remaining.append(remaining)
+        prize_positions: Dict[Number, List[int]] = {}
+        for position, prize in enumerate(PRIZES):
+            for number in prize_numbers(rows, prize):
+                prize_positions.setdefault(number, []).append(position)
+        for number, positions in prize_positions.items():
+            if 0 < number < len(self._index):
+                self._index[number].append((ticket_id, tuple(positions)))
+                if self._called[number]:
+                    for position in positions:
+                        remaining[position] = max(remaining[position] - 1, 0)
+        return ticket_id
+
+    def add_listener(self, listener: WinnerListener) -> None:
+        """Registers a function to be called with every WinnerEvent raised"""
+        self._listeners.append(listener)
+
+    def attach(self, board: Board) -> List[WinnerEvent]:
+        """Feeds the engine with every number picked on the board from now on.
+        The numbers already selected on the board are called first, and the events they raise are returned"""
+        events = self.call_many(board.selected)
+        board.add_listener(self.call)
+        return events
+
+    def call(self, number: Number) -> List[WinnerEvent]:
+        """Registers a number as called out. Returns the events for the prizes completed by this number.
+        Numbers which are not valid or which have already been called are ignored"""
+        if not 0 < number < len(self._called) or self._called[number]:
+            return []
+        self._called[number] = 1
+        self.call_count += 1
+
+        events = []
+        for ticket_id, positions in self._index[number]:
+            remaining = self._remaining[ticket_id]
+            for position in positions:
+                if remaining[position] > 0:
+                    remaining[position] -= 1
+                    if remaining[position] == 0:
+                        name, ticket_index, ticket = self.tickets[ticket_id]
+                        events.append(WinnerEvent(PRIZES[position], name, ticket_index, ticket, self.call_count,
+                                                  number))
+
+        for event in events:
+            self.events.append(event)
+            first_winners = self.winners.setdefault(event.prize, [])
+            if not first_winners or first_winners[0].call_index == event.call_index:
+                first_winners.append(event)
+            for listener in self._listeners:
+                listener(event)
+        return events
+
+    def call_many(self, numbers: Sequence[Number]) -> List[WinnerEvent]:
+        """Registers each of the numbers as called out, in order. Returns all the events raised"""
+        events = []
+        for number in numbers:
+            events.extend(self.call(number))
+        return events
+
+    def numbers_left(self, ticket_id: int, prize: Prize) -> int:
+        """Returns how many more numbers the ticket needs to complete the prize"""
+        return self._remaining[ticket_id][PRIZES.index(prize)]
+
+    def first_winners(self, prize: Prize) -> Optional[List[WinnerEvent]]:
+        """Returns the events of the ticket(s) that first completed the prize, or None if it is yet to be won"""
+        return self.winners.get(prize)
+
+
+def verify_claims(board: Board, claims: Iterable[Tuple[Union[Ticket, int], Prize]],
+                  book: Optional['TicketBook'] = None) -> List[ClaimResult]:
+    """Checks a batch of claims against the numbers called out on the board, and returns a ClaimResult per claim in
+    the same order. Claims may refer to tickets by their index in the book.
+
+    The called numbers are turned into a bitmask and a table of the position each number was called at once for the
+    whole batch, so each claim costs a mask test plus a lookup per prize number. Use completed_at rather than the
+    order the claims were made in to settle who won first, e.g. with earliest_claims.
+    """
+    called_mask = numbers_to_mask(board.selected)
+    call_positions = [0] * (len(NUMBER_POOL) + 1)
+    for position, number in enumerate(board.selected, start=1):
+        call_positions[number] = position
+
+    # Tickets from the book are read once however many prizes they claim, straight from the book without creating
+    # (and caching) a Ticket for each of them
+    book_rows: Dict[int, Optional[Sequence[Row]]] = {}
+    results = []
+    for claim in map(Claim._make, claims):
+        if isinstance(claim.ticket, Ticket):
+            rows: Optional[Sequence[Row]] = claim.ticket.rows
+        elif book is None:
+            raise ValueError('A book is needed to verify claims made by ticket index')
+        else:
+            if claim.ticket not in book_rows:
+                book_rows[claim.ticket] = book.rows(claim.ticket) if 0 <= claim.ticket < book.ticket_count else None
+            rows = book_rows[claim.ticket]
+        completed_at = _completed_at(rows, claim.prize, called_mask, call_positions) if rows else None
+        results.append(ClaimResult(claim, completed_at is not None, completed_at))
+    return results
+
+
+def earliest_claims(results: Iterable[ClaimResult]) -> Dict[Prize, List[ClaimResult]]:
+    """Returns the valid claims which completed each prize first. Claims completed on the same call are all kept"""
+    earliest: Dict[Prize, List[ClaimResult]] = {}
+    for result in results:
+        if not result.valid:
+            continue
+        first = earliest.setdefault(result.claim.prize, [])
+        if first and result.completed_at == first[0].completed_at:
+            first.append(result)
+        elif not first or (result.completed_at or 0) < (first[0].completed_at or 0):
+            first[:] = [result]
+    return earliest
+
+
+def _completed_at(rows: Sequence[Row], prize: Prize, called_mask: int, call_positions: List[int]) -> Optional[int]:
+    """Returns the position of the call that completed the prize on the ticket, or None if it isn't complete"""
+    numbers = [number for number in prize_numbers(rows, prize) if 0 < number < len(call_positions)]
+    target = prize_target(rows, prize)
+    if not target:
+        return None
+    if prize == Prize.EARLY_FIVE:
+        positions = sorted(position for position in map(call_positions.__getitem__, numbers) if position)
+        return positions[target - 1] if len(positions) >= target else None
+    if numbers_to_mask(numbers) & ~called_mask or len(numbers) < target:
+        return None
+    return max(map(call_positions.__getitem__, numbers))
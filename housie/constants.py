@@ -3,7 +3,7 @@
 __author__ = 'Aaron Alphonso'
 __email__ = 'alphonsoaaron1993@gmail.com'
 
-from typing import List, NamedTuple
+from typing import List, NamedTuple, Union
 
 # Type Aliases
 Number = int
@@ -26,11 +26,25 @@ Choice = str
 COLUMN_RANGES: List[ColumnRange] = \
     [ColumnRange(1, 9)] + [ColumnRange(start, start + 9) for start in range(10, 71, 10)] + [ColumnRange(80, 90)]
 
+# Dimensions of a ticket. A ticket laid out as a grid has a cell for every row and column, blank cells are 0
+TICKET_ROWS = 3
+TICKET_COLUMNS = len(COLUMN_RANGES)
+TICKET_CELLS = TICKET_ROWS * TICKET_COLUMNS
+NUMBERS_PER_ROW = 5
+# Most numbers a ticket can hold in a single column
+MAX_NUMBERS_PER_COLUMN = 3
+NUMBERS_PER_TICKET = TICKET_ROWS * NUMBERS_PER_ROW
+# Many tickets laid out as grids back to back, TICKET_CELLS bytes per ticket
+TicketGrid = Union[bytes, bytearray]
+
 # Constants related to data files
 DATA_DIR = 'data'
 FOLLOWED_TICKETS_FILE = DATA_DIR + '/followed_tickets.json'
 FOLLOWED_BOARD_FILE = DATA_DIR + '/followed_board.json'
-GENERATED_TICKETS_FILE = DATA_DIR + '/generated_tickets.json'
+FOLLOWED_BOARD_LOG_FILE = DATA_DIR + '/followed_board.log'
+GENERATED_TICKETS_FILE = DATA_DIR + '/generated_tickets.jsonl'
+# Index of every ticket generated so far, so that no two tickets generated have the same numbers
+ISSUED_TICKETS_INDEX_FILE = DATA_DIR + '/issued_tickets.idx'
 FOLLOWED_TICKETS_EXAMPLE_FILE = \
     'https://raw.githubusercontent.com/aaronalphonso/housie/master/src/data/followed_tickets.example.json'
 
@@ -54,7 +68,8 @@ Press 'F' to Follow a Game
     automatically updated on screen. 
 
     (This mode saves files into the '{DATA_DIR}' folder in order to store the 
-    state of the housie board. If you want to start a new game, delete the file named '{FOLLOWED_BOARD_FILE}')
+    state of the housie board. If you want to start a new game, delete the files named '{FOLLOWED_BOARD_FILE}' 
+    and '{FOLLOWED_BOARD_LOG_FILE}')
 
 Press 'Q' to Quit
 """
@@ -3,13 +3,34 @@
 __author__ = 'Aaron Alphonso'
 __email__ = 'alphonsoaaron1993@gmail.com'
 
+import os
+import shutil
+import sys
 from itertools import zip_longest
-from typing import Dict, List
+from typing import Dict, List, Optional, Sequence, TextIO, Tuple
 
-from housie.models import Board, Ticket
+from housie import instrument
+from housie.claims import PRIZES, Prize, WinnerEvent
+from housie.constants import Number, NUMBER_POOL
+from housie.leaderboard import DEFAULT_MAX_AWAY, DEFAULT_TOP_K, LEADERBOARD_PRIZES, Leaderboard
+from housie.models import Board, TicketData
+from housie.probability import DEFAULT_ODDS_HORIZON, completion_probability, first_winner_odds
+from housie.utils import number_cell
 
+# ANSI escape sequences used by the FollowedGameRenderer
+ANSI_CLEAR_SCREEN = '\x1b[H\x1b[2J'
+ANSI_CLEAR_TO_END = '\x1b[J'
+STRIKE_THROUGH_CHAR = '\u0336'
 
-def display_followed_game(board: Board, ticket_data: Dict[str, List[Ticket]]) -> None:
+# Widths of the elements of the followed game screen
+BOARD_WIDTH = 51
+BOARD_CELL_WIDTH = 5
+TICKET_CELL_WIDTH = 4
+COLUMN_GAP = 5
+
+
+@instrument.timed('display_followed_game')
+def display_followed_game(board: Board, ticket_data: TicketData) -> None:
     """Use this to select how you want the game displayed. The complex display looks better, but may not work in all
     sizes of terminals. Use the simple display as a fall back"""
     # Side-by-Side display with minimalistic ticket design
@@ -19,11 +40,69 @@ def display_followed_game(board: Board, ticket_data: Dict[str, List[Ticket]]) ->
     _complex_display_followed_game(board, ticket_data, 'structural_display', 36)
 
 
+def display_winners(winners: Dict[Prize, List[WinnerEvent]]) -> None:
+    """Displays the first winner(s) of each prize won so far"""
+    for line in winner_lines(winners):
+        print(line)
+
+
+def winner_lines(winners: Dict[Prize, List[WinnerEvent]]) -> List[str]:
+    """Returns a line of text for the first winner(s) of each prize won so far"""
+    lines = []
+    for prize in PRIZES:
+        if prize in winners:
+            names = ', '.join('{} (ticket {})'.format(event.name, event.ticket_index + 1) for event in winners[prize])
+            lines.append('{}: {} on call {}'.format(prize.value, names, winners[prize][0].call_index))
+    return lines
+
+
+def display_leaderboard(leaderboard: Leaderboard) -> None:
+    """Displays the tickets closest to winning each prize"""
+    for line in leaderboard_lines(leaderboard):
+        print(line)
+
+
+def leaderboard_lines(leaderboard: Leaderboard, k: int = DEFAULT_TOP_K, max_away: int = DEFAULT_MAX_AWAY) -> List[str]:
+    """Returns a line of text for each prize that some tickets are at most max_away numbers from completing, naming up
+    to k of the closest ones, e.g. 'Full House: 1 away - Aaron (ticket 2), Elma (ticket 1); 2 away - 14 tickets'"""
+    lines = []
+    for prize in LEADERBOARD_PRIZES:
+        parts: List[str] = []
+        for away in range(1, max_away + 1):
+            count = leaderboard.count(prize, away)
+            if not count:
+                continue
+            if parts:
+                parts.append('{} away - {} ticket{}'.format(away, count, '' if count == 1 else 's'))
+                continue
+            names = ', '.join('{} (ticket {})'.format(entry.name, entry.ticket_index + 1)
+                              for entry in leaderboard.closest(prize, k) if entry.numbers_left == away)
+            parts.append('{} away - {}{}'.format(away, names, ' and {} more'.format(count - k) if count > k else ''))
+        if parts:
+            lines.append('{}: {}'.format(prize.value, '; '.join(parts)))
+    return lines
+
+
+def odds_lines(leaderboard: Leaderboard, remaining: int, k: int = DEFAULT_TOP_K,
+               horizon: int = DEFAULT_ODDS_HORIZON) -> List[str]:
+    """Returns a line of text with the odds of winning Full House for each of the k tickets closest to it, with
+    `remaining` numbers left to be called out, e.g.
+    'Full House odds for Aaron (ticket 2): 4.2% within 10 calls, 8.1% to be first (1.2% tied)'"""
+    odds = first_winner_odds(leaderboard.counts(Prize.FULL_HOUSE), remaining)
+    lines = []
+    for entry in leaderboard.closest(Prize.FULL_HOUSE, k):
+        win_odds = odds[entry.numbers_left]
+        lines.append('{} odds for {} (ticket {}): {:.1%} within {} calls, {:.1%} to be first ({:.1%} tied)'.format(
+            Prize.FULL_HOUSE.value, entry.name, entry.ticket_index + 1,
+            completion_probability(entry.numbers_left, remaining, horizon), horizon, win_odds.first, win_odds.tie))
+    return lines
+
+
 # Simplistic vertical scrolling display
 # _simple_display_followed_game(housie, ticket_data)
 
 
-def _simple_display_followed_game(board: Board, ticket_data: Dict[str, List[Ticket]]) -> None:
+def _simple_display_followed_game(board: Board, ticket_data: TicketData) -> None:
     """Simple Display method for use in following a game
 
     Displays the board followed by the tickets
@@ -44,7 +123,7 @@ class DisplayElement:
 
 
 def _complex_display_followed_game(
-        board: Board, ticket_data: Dict[str, List[Ticket]], display_method: str, line_len: int) -> None:
+        board: Board, ticket_data: TicketData, display_method: str, line_len: int) -> None:
     """Side-by-Side Display method for use in following a game.
     Tries to fit the tickets besides the board instead of below.
 
@@ -56,9 +135,7 @@ def _complex_display_followed_game(
     board_element = DisplayElement(board.display_board())
     ticket_elements = []
     for name, tickets in ticket_data.items():
-        ticket_str = ''
-        for ticket in tickets:
-            ticket_str += getattr(ticket, display_method)() + '\n'
+        ticket_str = ''.join(getattr(ticket, display_method)() + '\n' for ticket in tickets)
         ticket_str = name + (line_len - len(name)) * '-' + '\n' + ticket_str
         ticket_elements.append(DisplayElement(ticket_str))
 
@@ -88,9 +165,132 @@ def fold(display_elements: List[DisplayElement]) -> DisplayElement:
         for row in element.row_wise_data:
             column2_rows.append(row)
 
-    combined_str = ''
     space = ' '
     fill_value = len(column1_rows[0]) * ' ' if len(column2_rows) > len(column1_rows) else len(column2_rows[0]) * ' '
-    for col1, col2 in zip_longest(column1_rows, column2_rows, fillvalue=fill_value):
-        combined_str += col1 + 5 * space + col2 + '\n'
+    combined_str = ''.join(col1 + 5 * space + col2 + '\n'
+                           for col1, col2 in zip_longest(column1_rows, column2_rows, fillvalue=fill_value))
     return DisplayElement(combined_str)
+
+
+def supports_ansi(out: TextIO) -> bool:
+    """Returns whether the output is a terminal that understands ANSI escape sequences"""
+    return os.name != 'nt' and out.isatty()
+
+
+class FollowedGameRenderer:
+    """Side-by-side display of a followed game which, after the first draw, only redraws what a called number changes.
+
+    The screen is laid out like the complex display: the board on the left and the tickets of each player in one or
+    two columns to its right. The renderer keeps a buffer of every character on the screen, along with where each
+    number appears on the board and on the tickets. When a number is called, only its cells and the two lines
+    below the board are rewritten, by moving the cursor there with ANSI escape sequences. So the cost of each call
+    does not depend on how many tickets are on the screen, and the screen is never cleared in between.
+
+    Only use this when supports_ansi is True for the output.
+    """
+
+    def __init__(self, board: Board, ticket_data: TicketData, out: Optional[TextIO] = None,
+                 line_len: int = 36) -> None:
+        self.board = board
+        self.ticket_data = ticket_data
+        self.out = out or sys.stdout
+        self.line_len = line_len
+        # Every character on the screen, row by row. A struck through character takes up a single cell
+        self._screen: List[List[str]] = []
+        # For each number, the (row, column) of each of its cells on the tickets
+        self._ticket_positions: List[List[Tuple[int, int]]] = []
+        # Row of the first of the two summary lines below the board
+        self._board_footer_row = 0
+        self._extra_lines: List[str] = []
+
+    def render(self, extra_lines: Sequence[str] = ()) -> None:
+        """Draws the whole screen from scratch, followed by the extra lines"""
+        self._screen = []
+        self._ticket_positions = [[] for _ in range(len(NUMBER_POOL) + 1)]
+        board_lines = self.board.display_board().rstrip('\n').split('\n')
+        self._put_lines(0, 0, board_lines)
+        self._board_footer_row = len(board_lines) - 2
+
+        names = list(self.ticket_data)
+        ticket_columns = [names[:len(names) // 2], names[len(names) // 2:]] if len(names) > 1 else [names]
+        left = BOARD_WIDTH + COLUMN_GAP
+        for column_names in ticket_columns:
+            top = 0
+            for name in column_names:
+                self._put_lines(top, left, [name + (self.line_len - len(name)) * '-'])
+                top += 1
+                for ticket in self.ticket_data[name]:
+                    self._put_lines(top, left, ticket.structural_display().rstrip('\n').split('\n'))
+                    for row_index, row in enumerate(ticket.get_structural_representation()):
+                        for column_index, number in enumerate(row):
+                            if number:
+                                self._ticket_positions[number].append(
+                                    (top + row_index, left + column_index * TICKET_CELL_WIDTH))
+                    top += 4
+            left += self.line_len + COLUMN_GAP
+
+        self._extra_lines = list(extra_lines)
+        self.out.write(ANSI_CLEAR_SCREEN + '\n'.join(''.join(row).rstrip() for row in self._screen) + '\n'
+                       + ''.join(line + '\n' for line in self._extra_lines))
+        self.out.flush()
+
+    def update(self, number: Number, extra_lines: Optional[Sequence[str]] = None) -> None:
+        """Redraws only the cells of the number just called, and the summary lines below the board.
+        The extra lines below the screen are replaced if given. The whole screen is redrawn instead if it doesn't fit
+        in the terminal, as the positions of the cells can't be relied on once the terminal has scrolled."""
+        if extra_lines is not None:
+            self._extra_lines = list(extra_lines)
+        if len(self._screen) + len(self._extra_lines) + 1 >= shutil.get_terminal_size().lines:
+            self.render(self._extra_lines)
+            return
+
+        output = []
+        if self.board.is_selected(number):
+            board_row = 1 + 2 * ((number - 1) // 10)
+            board_column = 1 + BOARD_CELL_WIDTH * ((number - 1) % 10)
+            output.append(self._put(board_row, board_column, number_cell(number)))
+            for row, column in self._ticket_positions[number]:
+                output.append(self._put(row, column, number_cell(number, marked=True)))
+
+        footer = self.board.display_summary().rstrip('\n').split('\n')
+        for offset, line in enumerate(footer):
+            output.append(self._put(self._board_footer_row + offset, 0, line.ljust(BOARD_WIDTH)))
+
+        # Rewrite everything below the screen, and leave the cursor after it, ready for the next prompt
+        output.append(_move_to(len(self._screen), 0) + ANSI_CLEAR_TO_END)
+        output.append(''.join(line + '\n' for line in self._extra_lines))
+        self.out.write(''.join(output))
+        self.out.flush()
+
+    def _put_lines(self, top: int, left: int, lines: Sequence[str]) -> None:
+        """Places the lines into the screen buffer, with the top left corner at the given row and column"""
+        for offset, line in enumerate(lines):
+            self._put(top + offset, left, line)
+
+    def _put(self, row: int, column: int, text: str) -> str:
+        """Places the text into the screen buffer, and returns the escape sequence which draws it on the terminal"""
+        while len(self._screen) <= row:
+            self._screen.append([])
+        screen_row = self._screen[row]
+        characters = _visible_characters(text)
+        if len(screen_row) < column + len(characters):
+            screen_row.extend(' ' * (column + len(characters) - len(screen_row)))
+        screen_row[column: column + len(characters)] = characters
+        return _move_to(row, column) + text
+
+
+def _visible_characters(text: str) -> List[str]:
+    """Splits the text into the characters that each take up a cell, keeping strike-through marks with the character
+    they strike through"""
+    characters: List[str] = []
+    for character in text:
+        if character == STRIKE_THROUGH_CHAR and characters:
+            characters[-1] += character
+        else:
+            characters.append(character)
+    return characters
+
+
+def _move_to(row: int, column: int) -> str:
+    """Returns the ANSI escape sequence to move the cursor to the 0-based row and column"""
+    return '\x1b[{};{}H'.format(row + 1, column + 1)
@@ -9,14 +9,24 @@ https://en.wikipedia.org/wiki/Bingo_(British_version)
 __author__ = 'Aaron Alphonso'
 __email__ = 'alphonsoaaron1993@gmail.com'
 
-from typing import Dict, List, Optional
+import sys
+from typing import Iterator, List, Optional, Tuple, Union
 
-from housie.utils import load_json, save_json, clear_screen, dynamic_doc
+from housie import instrument
+from housie.utils import clear_screen, dynamic_doc, numbers_to_mask
 from housie.constants import INSTRUCTIONS, Number, FOLLOW_GAME_TICKETS_NOT_FOUND_MSG, FOLLOWED_TICKETS_FILE, \
-    FOLLOWED_BOARD_FILE, GENERATED_TICKETS_FILE, TicketRepresentation
-from housie.models import Board, Ticket, load_tickets
-from housie.display_util import display_followed_game
+    FOLLOWED_BOARD_FILE, FOLLOWED_BOARD_LOG_FILE, GENERATED_TICKETS_FILE, ISSUED_TICKETS_INDEX_FILE, \
+    TicketRepresentation
+from housie.models import Board, Ticket, TicketData, TicketPool, TicketRegistry, load_tickets
+from housie.claims import ClaimEngine
+from housie.display_util import display_followed_game, display_leaderboard, display_winners, leaderboard_lines, \
+    odds_lines, winner_lines, supports_ansi, FollowedGameRenderer
 from housie.generate_ticket import generate_ticket
+from housie.generate_strip import generate_strip
+from housie.leaderboard import Leaderboard
+from housie.storage import DEFAULT_GAME_NAME, CallLog, GameCallLog, SessionStore, TicketIndex, \
+    write_tickets_jsonl
+from housie.validate import InvalidTicketsError
 
 
 def print_options() -> str:
@@ -31,33 +41,65 @@ def print_options() -> str:
     return option
 
 
-def host_new_game() -> None:
+@dynamic_doc
+def host_new_game(store: Optional[SessionStore] = None, game: str = DEFAULT_GAME_NAME) -> None:
     """Host a Housie Game.
     Starts with a blank board. Randomly picks numbers and updates the board when you ask it to
+
+    If the tickets handed out were generated into '{GENERATED_TICKETS_FILE}' (or into the game of the session store,
+    when one is given), the tickets closest to winning Full House and each line are shown below the board as the
+    numbers are picked
     """
     options = "Press 'Enter' to pick the next number\nPress 'Q' followed by 'Enter' to quit\n"
     board = Board()
+    leaderboard = _generated_tickets_leaderboard(store, game)
+    if leaderboard is not None:
+        leaderboard.attach(board)
     clear_screen()
     print(board.display_board())
     user_choice = ''
     while user_choice not in ['Q', 'q']:
         user_choice = input(options)
-        board.pick_next()
-        clear_screen()
-        print(board.display_board())
+        with instrument.timer('call_out'):
+            board.pick_next()
+            clear_screen()
+            print(board.display_board())
+            if leaderboard is not None:
+                display_leaderboard(leaderboard)
+    instrument.print_summary('Hosted game')
+
+
+def _generated_tickets_leaderboard(store: Optional[SessionStore] = None,
+                                   game: str = DEFAULT_GAME_NAME) -> Optional[Leaderboard]:
+    """Returns a leaderboard of the tickets last generated, if any. They are loaded into a TicketPool, as only their
+    numbers are needed and there may be a lot of them"""
+    if store is not None:
+        ticket_data = store.load_tickets(game, pool=True)
+        return Leaderboard(ticket_data) if ticket_data else None
+    try:
+        ticket_data = load_tickets(GENERATED_TICKETS_FILE, pool=True)
+    except ValueError as error:  # Invalid tickets, or a line which isn't json
+        print("Not showing the leaderboard, as the tickets in '{}' can't be read: {}".format(
+            GENERATED_TICKETS_FILE, error))
+        return None
+    return Leaderboard(ticket_data) if ticket_data else None
 
 
 @dynamic_doc
-def follow_game() -> None:
+def follow_game(store: Optional[SessionStore] = None, game: str = DEFAULT_GAME_NAME) -> None:
     """Allows you to play along/follow a game being hosted by someone else.
 
-    Reads your tickets from '{FOLLOWED_TICKETS_FILE}' and displays them.
+    Reads your tickets from '{FOLLOWED_TICKETS_FILE}' and displays them. Any tickets which break the rules of a ticket
+    are listed with what is wrong with them, and the game doesn't start until they are fixed.
+    Below the board, the tickets closest to winning Full House and each line are listed as the numbers are entered.
+    Press 'O' to also show the odds of the closest tickets winning Full House, and again to hide them.
     Refer to the '{FOLLOWED_TICKETS_EXAMPLE_FILE}' file as a reference file.
 
-    Reads the board from {FOLLOWED_BOARD_FILE} on startup. Displays the board.
+    Reads the board from {FOLLOWED_BOARD_FILE} and the calls logged since in {FOLLOWED_BOARD_LOG_FILE} on startup.
+    Displays the board.
     Allows you to enter the numbers being called out by the host, and updates your tickets and the board.
     The state of the board is persisted even if you exit the program.
-    To start a new game, delete the {FOLLOWED_BOARD_FILE} file.
+    To start a new game, delete the {FOLLOWED_BOARD_FILE} and {FOLLOWED_BOARD_LOG_FILE} files.
 
     For this mode, certain files are read from/saved to a folder named '{DATA_DIR}' which
     should be in the current directory from where you are running the game.
@@ -67,67 +109,182 @@ def follow_game() -> None:
 
     If you want to host a game and play with friends, use the generate tickets mode to distribute tickets to your
     friends, and then use the host a game mode to play.
+
+    When a session store is given, the tickets and the calls are kept in the named game of the store instead, so any
+    of the games saved in it can be resumed. A game without tickets starts with those of '{FOLLOWED_TICKETS_FILE}'.
     """
-    already_selected_numbers = load_json(FOLLOWED_BOARD_FILE)
-    board = Board(already_selected_numbers)
-    ticket_data: Optional[Dict[str, List[Ticket]]] = load_tickets(FOLLOWED_TICKETS_FILE)
+    call_log: Union[CallLog, GameCallLog] = \
+        CallLog(FOLLOWED_BOARD_LOG_FILE, FOLLOWED_BOARD_FILE) if store is None else store.call_log(game)
+    board = Board(call_log.replay())
+    try:
+        ticket_data = _followed_tickets(store, game)
+    except InvalidTicketsError as error:
+        print("Some of the tickets in '{}' are not valid, please fix them and try again.\n{}".format(
+            FOLLOWED_TICKETS_FILE, error))
+        return None
+    except ValueError as error:  # A ticket book which is corrupt, or a file which isn't json
+        print("The tickets in '{}' can't be read, please fix them and try again.\n{}".format(
+            FOLLOWED_TICKETS_FILE, error))
+        return None
     if not ticket_data:
         print(FOLLOW_GAME_TICKETS_NOT_FOUND_MSG)
         return None
+    with call_log:
+        _play_followed_game(board, ticket_data, call_log)
+    instrument.print_summary('Followed game')
+    return None
+
+
+def _followed_tickets(store: Optional[SessionStore], game: str) -> Optional[TicketData]:
+    """Returns the tickets of the followed game. With a session store, these are the tickets of the game in the store,
+    which are first copied over from the followed tickets file if the game has none yet"""
+    ticket_data: Optional[TicketData] = None if store is None else store.load_tickets(game)
+    if ticket_data:
+        return ticket_data
+    ticket_data = load_tickets(FOLLOWED_TICKETS_FILE)
+    if ticket_data and store is not None:
+        store.add_tickets(game, ((name, ticket.rows) for name, tickets in ticket_data.items() for ticket in tickets))
+    return ticket_data
+
+
+def _play_followed_game(board: Board, ticket_data: TicketData, call_log: Union[CallLog, GameCallLog]) -> None:
+    """Keeps reading the numbers called out and updating the board and tickets, until the user quits"""
     mark_tickets_full_board(board, ticket_data)
+    claim_engine = ClaimEngine(ticket_data)
+    claim_engine.attach(board)
+    leaderboard = Leaderboard(ticket_data)
+    leaderboard.attach(board)
+    # On terminals that support it, only the cells changed by each call are redrawn. Otherwise, redraw everything
+    renderer = FollowedGameRenderer(board, ticket_data) if supports_ansi(sys.stdout) else None
+    show_odds = False
+    redraw = True
     while True:
-        clear_screen()
-        display_followed_game(board, ticket_data)
-        user_choice = input("Press 'Q' to quit. Enter next number: ")
+        if renderer is None:
+            clear_screen()
+            display_followed_game(board, ticket_data)
+            display_winners(claim_engine.winners)
+            display_leaderboard(leaderboard)
+            if show_odds:
+                print('\n'.join(odds_lines(leaderboard, board.remaining_count)))
+        elif redraw:
+            renderer.render(_followed_game_lines(board, claim_engine, leaderboard, show_odds))
+        user_choice = input("Press 'Q' to quit, 'O' to {} the odds. Enter next number: ".format(
+            'hide' if show_odds else 'show'))
+        redraw = True
         if user_choice == 'Q' or user_choice == 'q':
             break
+        elif user_choice == 'O' or user_choice == 'o':
+            show_odds = not show_odds
         elif user_choice.isnumeric():
-            number = int(user_choice)
-            board.pick_manual(number)
-            save_json(board.selected, FOLLOWED_BOARD_FILE)
-            mark_tickets(number, ticket_data)
-
-
-def mark_tickets_full_board(board: Board, ticket_data: Dict[str, List[Ticket]]) -> None:
+            with instrument.timer('call_out'):
+                number = int(user_choice)
+                already_called = len(board.selected)
+                board.pick_manual(number)
+                if len(board.selected) > already_called:
+                    call_log.append(number)
+                mark_tickets(number, ticket_data)
+                if renderer is not None:
+                    renderer.update(number, _followed_game_lines(board, claim_engine, leaderboard, show_odds))
+                    redraw = False
+
+
+def _followed_game_lines(board: Board, claim_engine: ClaimEngine, leaderboard: Leaderboard,
+                         show_odds: bool) -> List[str]:
+    """Returns the lines shown below the board of a followed game"""
+    lines = winner_lines(claim_engine.winners) + leaderboard_lines(leaderboard)
+    if show_odds:
+        lines += odds_lines(leaderboard, board.remaining_count)
+    return lines
+
+
+def mark_tickets_full_board(board: Board, ticket_data: TicketData) -> None:
     """Updates the tickets with all numbers from the housie board"""
+    if isinstance(ticket_data, (TicketRegistry, TicketPool)):
+        ticket_data.mark_numbers(board.selected)
+        return
     for name, tickets in ticket_data.items():
         for ticket in tickets:
             ticket.mark_numbers(board.selected)
 
 
-def mark_tickets(number: Number, ticket_data: Dict[str, List[Ticket]]) -> None:
-    """Updates the tickets with all numbers from the housie board"""
+@instrument.timed('mark_tickets')
+def mark_tickets(number: Number, ticket_data: TicketData) -> None:
+    """Updates the tickets with the number called out.
+    When the tickets are held in a TicketRegistry, only the tickets containing the number are visited, and when they
+    are held in a TicketPool, none of them are"""
+    if isinstance(ticket_data, (TicketRegistry, TicketPool)):
+        ticket_data.mark_number(number)
+        return
     for name, tickets in ticket_data.items():
         for ticket in tickets:
             ticket.mark_number(number)
 
 
 @dynamic_doc
-def generate_tickets() -> None:
+def generate_tickets(store: Optional[SessionStore] = None, game: str = DEFAULT_GAME_NAME) -> None:
     """Allows you to generate housie tickets for use in a game. Enter the names of the players and numbers of tickets
-    per player
+    per player. Tickets can also be generated in strips of 6, where each strip holds every number from 1-90 exactly once
 
-    Saves the generated tickets to a file '{GENERATED_TICKETS_FILE}'
+    Saves the generated tickets to a file '{GENERATED_TICKETS_FILE}', one ticket per line as they are generated, or
+    adds them to the named game of the session store when one is given.
+    Every ticket generated is recorded in '{ISSUED_TICKETS_INDEX_FILE}', so that no ticket is ever generated twice
     """
     clear_screen()
     names = input("Enter the names of users playing the game. Separate each name with a space: ")
-    number = input("Enter the number of tickets to be generated per user: ")
-    ticket_data: Dict[str, List[TicketRepresentation]] = {}
-    names_list = map(str.strip, names.split())
-    for name in names_list:
-        tickets = [generate_ticket() for _ in range(int(number))]
+    use_strips = input("Generate tickets in strips of 6 which together hold every number from 1-90? (y/N): ")
+    if use_strips.strip().upper() == 'Y':
+        number = input("Enter the number of strips to be generated per user: ")
+    else:
+        number = input("Enter the number of tickets to be generated per user: ")
+    names_list = list(map(str.strip, names.split()))
+    with TicketIndex(ISSUED_TICKETS_INDEX_FILE) as unique_index:
+        records = _generate_and_display_tickets(names_list, int(number), use_strips.strip().upper() == 'Y',
+                                                unique_index)
+        if store is not None:
+            store.add_tickets(game, records)
+        else:
+            write_tickets_jsonl(records, GENERATED_TICKETS_FILE)
+    if store is not None:
+        print(f"The generated tickets can also be found in the game '{game}' of '{store.filename}'")
+    else:
+        print(f"The generated tickets can also be found in the '{GENERATED_TICKETS_FILE}' file")
+
+
+def _generate_and_display_tickets(names: List[str], number: int, use_strips: bool,
+                                  unique_index: TicketIndex) -> Iterator[Tuple[str, TicketRepresentation]]:
+    """Generates the tickets of each player and prints them, yielding each ticket as a (name, rows) record so it can
+    be written out straight away. Tickets (or strips) already in the index are generated again"""
+    for name in names:
+        if use_strips:
+            tickets = (ticket for _ in range(number) for ticket in _unique_strip(unique_index))
+        else:
+            tickets = (_unique_ticket(unique_index) for _ in range(number))
         print(name)
         for ticket in tickets:
             print(ticket.display_ticket())
-        # Convert from ticket object in a list of rows representing the ticket so we can save and load it from json
-        ticket_data[name] = [ticket.rows for ticket in tickets]
-    save_json(ticket_data, GENERATED_TICKETS_FILE)
-    print(f"The generated tickets can also be found in the '{GENERATED_TICKETS_FILE}' file")
+            yield name, ticket.rows
+
+
+def _unique_ticket(unique_index: TicketIndex) -> Ticket:
+    """Generates a ticket that isn't in the index yet, and adds it"""
+    ticket = generate_ticket()
+    while not unique_index.add(numbers_to_mask(ticket.numbers)):
+        ticket = generate_ticket()
+    return ticket
+
+
+def _unique_strip(unique_index: TicketIndex) -> List[Ticket]:
+    """Generates a strip none of whose tickets are in the index yet, and adds them"""
+    strip = generate_strip()
+    while not unique_index.add_all(numbers_to_mask(ticket.numbers) for ticket in strip):
+        strip = generate_strip()
+    return strip
 
 
 @dynamic_doc
-def display_main_menu() -> None:
-    """The starting menu presented to the user
+def display_main_menu(store: Optional[SessionStore] = None, game: str = DEFAULT_GAME_NAME) -> None:
+    """The starting menu presented to the user. When a session store is given, each option works on the named game
+    of the store rather than on the files in '{DATA_DIR}'
 
     Supported Options are as follows :
 
@@ -151,13 +308,13 @@ def display_main_menu() -> None:
     """
     option = print_options()
     if option == 'N':
-        host_new_game()
+        host_new_game(store, game)
     elif option == 'F':
-        follow_game()
+        follow_game(store, game)
     elif option == 'Q':
         print("Thank you for playing! Bye")
     elif option == 'T':
-        generate_tickets()
+        generate_tickets(store, game)
     else:
         print("Sorry this feature is not available yet!")
 
@@ -0,0 +1,103 @@
+"""Generation of large books of tickets across multiple processes, reproducible from a single seed"""
+
+__author__ = 'Aaron Alphonso'
+__email__ = 'alphonsoaaron1993@gmail.com'
+
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from random import Random
+from typing import TYPE_CHECKING, Iterator, List, Optional, Tuple
+
+from housie.generate_strip import TICKETS_PER_STRIP, deduplicate_strips, generate_strips_bulk
+from housie.generate_ticket import deduplicate_tickets, generate_tickets_bulk, ticket_from_grid
+from housie.models import Ticket
+
+if TYPE_CHECKING:
+    from housie.storage.ticket_index import TicketIndex
+
+# Number of tickets (or strips) generated from each sub-seed. The book is always split into chunks of this size,
+# whatever the number of workers, which is what makes the output independent of the number of workers
+BOOK_CHUNK_SIZE = 5000
+
+# (sub-seed, number of tickets or strips, whether to generate strips)
+ChunkSpec = Tuple[int, int, bool]
+
+
+def derive_seed(seed: int, chunk_index: int) -> int:
+    """Derives an independent, deterministic sub-seed for a chunk of the book from the master seed"""
+    digest = hashlib.sha256('{}:{}'.format(seed, chunk_index).encode()).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+def generate_book(count: int, seed: int, workers: Optional[int] = 1, strips: bool = False,
+                  chunk_size: int = BOOK_CHUNK_SIZE, unique_index: Optional['TicketIndex'] = None) -> bytearray:
+    """Generates a book of `count` tickets (or `count` strips of 6 tickets if strips is True) from a master seed.
+
+    The book is split into chunks of `chunk_size`, each generated from its own sub-seed derived from the master seed,
+    and the chunks are spread over a pool of `workers` processes (None uses every core, 1 runs in this process).
+    The chunks are merged back in order, so the same seed always gives the same book, whatever the number of workers.
+
+    The tickets are returned in the grid format of generate_tickets_bulk.
+
+    Pass a TicketIndex to make sure none of the tickets has been issued before. The chunks are checked against it in
+    order as they come back, and duplicates are replaced with tickets (or strips) drawn from a generator seeded with the
+    master seed, so the book stays reproducible for a given seed and index. Such a book can't be regenerated with
+    regenerate_ticket though, as that depends on what was in the index.
+    """
+    book = bytearray()
+    for chunk in iter_book_chunks(count, seed, workers, strips, chunk_size, unique_index):
+        book += chunk
+    return book
+
+
+def iter_book_chunks(count: int, seed: int, workers: Optional[int] = 1, strips: bool = False,
+                     chunk_size: int = BOOK_CHUNK_SIZE,
+                     unique_index: Optional['TicketIndex'] = None) -> Iterator[bytearray]:
+    """Yields the book of generate_book chunk by chunk, in order, so it can be written out without holding all of it
+    in memory"""
+    replacement_rng = Random(seed)
+    for chunk in _generate_chunks(count, seed, workers, strips, chunk_size):
+        if unique_index is not None:
+            if strips:
+                deduplicate_strips(chunk, unique_index, replacement_rng)
+            else:
+                deduplicate_tickets(chunk, unique_index, replacement_rng)
+        yield chunk
+
+
+def regenerate_ticket(seed: int, count: int, index: int, strips: bool = False,
+                      chunk_size: int = BOOK_CHUNK_SIZE) -> Ticket:
+    """Regenerates the ticket at the index of a book of `count` tickets (or strips) generated by generate_book, by
+    generating only the chunk that holds it. Useful for auditing a disputed ticket.
+
+    The index is that of the ticket, even if the book was generated in strips.
+    """
+    tickets_per_unit = TICKETS_PER_STRIP if strips else 1
+    chunk_index = index // tickets_per_unit // chunk_size
+    chunk = _generate_chunk(_chunk_specs(count, seed, strips, chunk_size)[chunk_index])
+    return ticket_from_grid(chunk, index - chunk_index * chunk_size * tickets_per_unit)
+
+
+def _chunk_specs(count: int, seed: int, strips: bool, chunk_size: int) -> List[ChunkSpec]:
+    """Splits the book into chunks, and works out the sub-seed and size of each"""
+    return [(derive_seed(seed, chunk_index), min(chunk_size, count - start), strips)
+            for chunk_index, start in enumerate(range(0, count, chunk_size))]
+
+
+def _generate_chunks(count: int, seed: int, workers: Optional[int], strips: bool,
+                     chunk_size: int) -> Iterator[bytearray]:
+    """Yields the generated chunks of the book in order"""
+    specs = _chunk_specs(count, seed, strips, chunk_size)
+    if workers == 1 or len(specs) <= 1:
+        yield from map(_generate_chunk, specs)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(_generate_chunk, specs)
+
+
+def _generate_chunk(spec: ChunkSpec) -> bytearray:
+    """Generates a single chunk of the book. Runs in the worker processes"""
+    sub_seed, size, strips = spec
+    if strips:
+        return generate_strips_bulk(size, seed=sub_seed)
+    return generate_tickets_bulk(size, seed=sub_seed)
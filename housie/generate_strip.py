@@ -0,0 +1,144 @@
+"""Generation of Housie ticket strips. A strip is a set of 6 tickets that together hold every number 1-90 exactly once"""
+
+__author__ = 'Aaron Alphonso'
+__email__ = 'alphonsoaaron1993@gmail.com'
+
+from random import Random
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple
+
+from housie.constants import COLUMN_RANGES, MAX_NUMBERS_PER_COLUMN, NUMBER_POOL, NUMBERS_PER_TICKET, TICKET_CELLS, \
+    TICKET_COLUMNS, NUMBERS_PER_ROW, TICKET_ROWS, Number, TicketGrid
+from housie.generate_ticket import BLANK_CELL, grid_ticket_mask, ticket_from_grid, tickets_from_grid, _pattern_layout
+from housie.models import Ticket
+
+if TYPE_CHECKING:
+    from housie.storage.ticket_index import TicketIndex
+
+# Number of tickets in a strip
+TICKETS_PER_STRIP = 6
+
+
+def generate_strip(rng: Optional[Random] = None) -> List[Ticket]:
+    """Generates a strip of 6 tickets which together hold every number from 1 to 90 exactly once.
+
+    Each ticket in the strip follows the same rules as a ticket from generate_ticket (15 numbers, 5 per row,
+    1 to 3 numbers per column, numbers in ascending order down each column).
+    """
+    grid = bytearray(TICKETS_PER_STRIP * TICKET_CELLS)
+    _fill_strip(grid, 0, rng or Random())
+    return list(tickets_from_grid(grid))
+
+
+def generate_strips_bulk(count: int, seed: Optional[int] = None,
+                         unique_index: Optional['TicketIndex'] = None) -> bytearray:
+    """Generates `count` strips of 6 tickets each.
+
+    The tickets are returned in the same grid format as generate_tickets_bulk, i.e. TICKET_CELLS bytes per ticket,
+    with the 6 tickets of each strip next to each other. Passing a seed makes the output reproducible.
+    Pass a TicketIndex to make sure none of the tickets has been issued before, see deduplicate_strips.
+    """
+    rng = Random(seed)
+    grid = bytearray(count * TICKETS_PER_STRIP * TICKET_CELLS)
+    for strip_index in range(count):
+        _fill_strip(grid, strip_index * TICKETS_PER_STRIP * TICKET_CELLS, rng)
+    if unique_index is not None:
+        deduplicate_strips(grid, unique_index, rng)
+    return grid
+
+
+def deduplicate_strips(grid: bytearray, unique_index: 'TicketIndex', rng: Random) -> int:
+    """Adds the tickets of a grid of strips to the index. A strip holding a ticket that was already issued is
+    regenerated as a whole from rng, as a single ticket can't be swapped out without breaking the strip.
+    Returns the number of strips replaced"""
+    replaced = 0
+    for strip_index in range(len(grid) // (TICKETS_PER_STRIP * TICKET_CELLS)):
+        first_ticket = strip_index * TICKETS_PER_STRIP
+        while not unique_index.add_all(grid_ticket_mask(grid, index)
+                                       for index in range(first_ticket, first_ticket + TICKETS_PER_STRIP)):
+            _fill_strip(grid, first_ticket * TICKET_CELLS, rng)
+            replaced += 1
+    return replaced
+
+
+def strip_from_grid(grid: TicketGrid, index: int) -> List[Ticket]:
+    """Returns the tickets of the strip at the index of a grid of strips, as generated by generate_strips_bulk"""
+    return [ticket_from_grid(grid, index * TICKETS_PER_STRIP + ticket_index)
+            for ticket_index in range(TICKETS_PER_STRIP)]
+
+
+def validate_strip(tickets: Sequence[Ticket]) -> List[str]:
+    """Checks that the tickets form a valid strip. Returns a list of the problems found, which is empty if it's valid"""
+    errors = []
+    if len(tickets) != TICKETS_PER_STRIP:
+        errors.append('A strip must have {} tickets, found {}'.format(TICKETS_PER_STRIP, len(tickets)))
+
+    for ticket_index, ticket in enumerate(tickets, start=1):
+        if [len(row) for row in ticket.rows] != [NUMBERS_PER_ROW] * TICKET_ROWS:
+            errors.append('Ticket {} must have {} rows of {} numbers'.format(
+                ticket_index, TICKET_ROWS, NUMBERS_PER_ROW))
+        for column_index, column_range in enumerate(COLUMN_RANGES):
+            column_count = len([number for number in ticket.numbers
+                                if column_range.start <= number <= column_range.end])
+            if not 1 <= column_count <= MAX_NUMBERS_PER_COLUMN:
+                errors.append('Ticket {} has {} numbers in column {}'.format(
+                    ticket_index, column_count, column_index + 1))
+        try:
+            for column in zip(*ticket.get_structural_representation()):
+                numbers = [number for number in column if number]
+                if numbers != sorted(numbers):
+                    errors.append('Ticket {} has numbers out of order in a column'.format(ticket_index))
+                    break
+        except StopIteration:
+            errors.append('Ticket {} has an empty row'.format(ticket_index))
+
+    strip_numbers = sorted(number for ticket in tickets for number in ticket.numbers)
+    if strip_numbers != NUMBER_POOL:
+        errors.append('The strip must hold every number from {} to {} exactly once'.format(NUMBER_POOL[0],
+                                                                                           NUMBER_POOL[-1]))
+    return errors
+
+
+def _fill_strip(grid: bytearray, offset: int, rng: Random) -> None:
+    """Generates a strip and writes its 6 tickets into the grid starting at the offset.
+
+    Every ticket starts with one number in each column. The remaining numbers of each column are handed out to tickets
+    at random, never giving a ticket more than 3 numbers in a column. This leaves some tickets with more than 15
+    numbers and some with fewer, so numbers are then moved from the fullest to the emptiest ticket, through a column
+    in which the first has an extra number and the second has room, until every ticket has 15 numbers.
+    Such a column always exists, so this never needs to start over or backtrack.
+    """
+    column_sizes = [column_range.end - column_range.start + 1 for column_range in COLUMN_RANGES]
+    tickets = range(TICKETS_PER_STRIP)
+    column_counts = [[1] * TICKET_COLUMNS for _ in tickets]
+    for column_index, column_size in enumerate(column_sizes):
+        for _ in range(column_size - TICKETS_PER_STRIP):
+            open_tickets = [ticket for ticket in tickets if column_counts[ticket][column_index] < MAX_NUMBERS_PER_COLUMN]
+            column_counts[rng.choice(open_tickets)][column_index] += 1
+
+    ticket_sizes = [sum(counts) for counts in column_counts]
+    while max(ticket_sizes) > NUMBERS_PER_TICKET:
+        fullest = ticket_sizes.index(max(ticket_sizes))
+        emptiest = ticket_sizes.index(min(ticket_sizes))
+        column_index = rng.choice([column for column in range(TICKET_COLUMNS)
+                                   if column_counts[fullest][column] > 1
+                                   and column_counts[emptiest][column] < MAX_NUMBERS_PER_COLUMN])
+        column_counts[fullest][column_index] -= 1
+        column_counts[emptiest][column_index] += 1
+        ticket_sizes[fullest] -= 1
+        ticket_sizes[emptiest] += 1
+
+    # Deal out the shuffled numbers of each column to the tickets, as per the counts worked out above
+    ticket_columns: List[List[Tuple[Number, ...]]] = [[] for _ in tickets]
+    for column_index, column_range in enumerate(COLUMN_RANGES):
+        numbers = list(range(column_range.start, column_range.end + 1))
+        rng.shuffle(numbers)
+        start = 0
+        for ticket in tickets:
+            end = start + column_counts[ticket][column_index]
+            ticket_columns[ticket].append(tuple(sorted(numbers[start:end])))
+            start = end
+
+    for ticket in tickets:
+        layout = _pattern_layout(tuple(column_counts[ticket]))
+        ticket_offset = offset + ticket * TICKET_CELLS
+        grid[ticket_offset: ticket_offset + TICKET_CELLS] = layout(sum(ticket_columns[ticket], BLANK_CELL))
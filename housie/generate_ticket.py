@@ -3,15 +3,25 @@
 __author__ = 'Aaron Alphonso'
 __email__ = 'alphonsoaaron1993@gmail.com'
 
-from collections import defaultdict
-from random import choice, randint
-from typing import List, Set, Dict, DefaultDict
+from collections import defaultdict, Counter
+from functools import lru_cache
+from itertools import accumulate, chain, combinations
+from operator import itemgetter
+from random import choice, randint, Random
+from typing import TYPE_CHECKING, Callable, List, Set, Dict, DefaultDict, Iterator, Optional, Tuple, cast
 
-from housie.constants import Number, Row, ColumnRange, COLUMN_RANGES
+from housie import instrument
+from housie.constants import Number, Row, ColumnRange, COLUMN_RANGES, TICKET_CELLS, TICKET_COLUMNS, TICKET_ROWS, \
+    NUMBER_POOL, NUMBERS_PER_TICKET, TicketGrid
 from housie.models import Ticket
+from housie.utils import number_bit
 
+if TYPE_CHECKING:
+    from housie.storage.ticket_index import TicketIndex
 
-def generate_ticket() -> Ticket:
+
+@instrument.timed('generate_ticket')
+def generate_ticket(rng: Optional[Random] = None) -> Ticket:
     """Generates a Housie Ticket containing 15 randomly selected numbers based on the following rules
 
     * A Housie ticket has 15 numbers.
@@ -29,6 +39,9 @@ def generate_ticket() -> Ticket:
         Column 9: 80-90
 
     Based on the rules above we have to select the numbers.
+
+    Pass in a Random instance to draw from it instead of the global state of the `random` module, e.g. to make the
+    ticket reproducible.
     """
     # The list of ranges for each column. Make a copy as we mutate it during our selection process
     column_ranges: List[ColumnRange] = COLUMN_RANGES.copy()
@@ -43,15 +56,15 @@ def generate_ticket() -> Ticket:
     # Select one number from each column range. This will give us 9 numbers
     for column_range in column_ranges:
         selected_number = select_unique_number_from_range(
-            column_range=column_range, already_selected=column_wise_numbers[column_range])
+            column_range=column_range, already_selected=column_wise_numbers[column_range], rng=rng)
         ticket_numbers.add(selected_number)
         column_wise_numbers[column_range].append(selected_number)
 
     # Select the remaining 6 numbers at random from the columns.
     while len(ticket_numbers) < 15:
-        selected_range = choice(column_ranges)
+        selected_range = rng.choice(column_ranges) if rng else choice(column_ranges)
         selected_number = select_unique_number_from_range(
-            column_range=selected_range, already_selected=column_wise_numbers[selected_range])
+            column_range=selected_range, already_selected=column_wise_numbers[selected_range], rng=rng)
 
         ticket_numbers.add(selected_number)
         column_wise_numbers[selected_range].append(selected_number)
@@ -66,13 +79,15 @@ def generate_ticket() -> Ticket:
     return Ticket(rows)
 
 
-def select_unique_number_from_range(column_range: ColumnRange, already_selected: List[Number]) -> Number:
+def select_unique_number_from_range(column_range: ColumnRange, already_selected: List[Number],
+                                    rng: Optional[Random] = None) -> Number:
     """Selects and returns a number randomly from a ColumnRange. If the number has already been selected before, then
     re-select a new number"""
-    selected_number: Number = randint(column_range.start, column_range.end)
+    random_int = rng.randint if rng else randint
+    selected_number: Number = random_int(column_range.start, column_range.end)
     # If the selected_number is already_selected, select a new number until we get a unique number
     while selected_number in already_selected:
-        selected_number = randint(column_range.start, column_range.end)
+        selected_number = random_int(column_range.start, column_range.end)
     return selected_number
 
 
@@ -125,3 +140,160 @@ def demo_ticket_generation() -> None:
 
     print("Structural representation")
     print(sample_ticket.structural_display())
+
+
+def generate_tickets_bulk(count: int, seed: Optional[int] = None,
+                          unique_index: Optional['TicketIndex'] = None) -> bytearray:
+    """Generates `count` tickets at once, following the same rules and layout as generate_ticket.
+
+    The tickets are returned as a compact grid of bytes, with TICKET_CELLS (3 rows x 9 cols) bytes per ticket in
+    ticket, row, column order. Blank cells are 0. Use `ticket_from_grid` or `tickets_from_grid` to turn them into
+    Ticket objects.
+
+    Rather than building each ticket number by number, the work is done in a handful of bulk calls:
+    * The number of numbers in each column of a ticket (its column pattern) is drawn for all tickets in one go, with
+      the same probabilities that generate_ticket ends up with.
+    * The numbers of each column are drawn as whole sorted combinations, grouped by column and count.
+    * The layout of the numbers into rows only depends on the column pattern, so it is computed once per pattern and
+      applied to each ticket as a single lookup.
+
+    Passing a seed makes the output reproducible, without touching the global state of the `random` module.
+    Pass a TicketIndex to make sure none of the tickets has been issued before, see deduplicate_tickets.
+    """
+    rng = Random(seed)
+    grid = _bulk_grid(count, rng)
+    if unique_index is not None:
+        deduplicate_tickets(grid, unique_index, rng)
+    return grid
+
+
+def deduplicate_tickets(grid: bytearray, unique_index: 'TicketIndex', rng: Random) -> int:
+    """Adds the tickets of a grid to the index, replacing in place those that were already issued (or that appear
+    twice in the grid) with freshly generated ones drawn from rng. Returns the number of tickets replaced"""
+    pending = [index for index in range(len(grid) // TICKET_CELLS)
+               if not unique_index.add(grid_ticket_mask(grid, index))]
+    replaced = len(pending)
+    while pending:
+        fresh = _bulk_grid(len(pending), rng)
+        duplicates = []
+        for fresh_index, index in enumerate(pending):
+            grid[index * TICKET_CELLS: (index + 1) * TICKET_CELLS] = \
+                fresh[fresh_index * TICKET_CELLS: (fresh_index + 1) * TICKET_CELLS]
+            if not unique_index.add(grid_ticket_mask(grid, index)):
+                duplicates.append(index)
+        pending = duplicates
+    return replaced
+
+
+def _bulk_grid(count: int, rng: Random) -> bytearray:
+    """Generates the grid of `count` tickets for generate_tickets_bulk"""
+    patterns, cum_weights = _column_patterns()
+    ticket_patterns = rng.choices(range(len(patterns)), cum_weights=cum_weights, k=count)
+
+    # Work out how many combinations are needed for each count of numbers in each column, and draw them all at once
+    combinations_needed = [[0] * 4 for _ in range(TICKET_COLUMNS)]
+    for pattern_index, pattern_count in Counter(ticket_patterns).items():
+        for column_index, column_count in enumerate(patterns[pattern_index]):
+            combinations_needed[column_index][column_count] += pattern_count
+    drawn_combinations = [[iter(rng.choices(_column_combinations(column_index, column_count), k=needed))
+                           for column_count, needed in enumerate(column_needed)]
+                          for column_index, column_needed in enumerate(combinations_needed)]
+
+    grid = bytearray(count * TICKET_CELLS)
+    # For each pattern, the layout of the grid, and where to take the numbers of each column from
+    pattern_sources = {}
+    for ticket_index, pattern_index in enumerate(ticket_patterns):
+        if pattern_index not in pattern_sources:
+            pattern = patterns[pattern_index]
+            pattern_sources[pattern_index] = (_pattern_layout(pattern), [
+                drawn_combinations[column_index][column_count] for column_index, column_count in enumerate(pattern)])
+        layout, column_sources = pattern_sources[pattern_index]
+        start = ticket_index * TICKET_CELLS
+        grid[start: start + TICKET_CELLS] = layout(sum(map(next, column_sources), BLANK_CELL))
+    return grid
+
+
+def ticket_from_grid(grid: TicketGrid, index: int) -> Ticket:
+    """Returns the ticket at the index of a grid of tickets, as generated by generate_tickets_bulk"""
+    start = index * TICKET_CELLS
+    cells = grid[start: start + TICKET_CELLS]
+    return Ticket([list(cells[row * TICKET_COLUMNS: (row + 1) * TICKET_COLUMNS]) for row in range(TICKET_ROWS)])
+
+
+def grid_ticket_rows(grid: TicketGrid, index: int) -> List[Row]:
+    """Returns the numbers of each row of the ticket at the index of a grid of tickets, without the blank cells"""
+    start = index * TICKET_CELLS
+    return [[number for number in grid[row_start: row_start + TICKET_COLUMNS] if number]
+            for row_start in range(start, start + TICKET_CELLS, TICKET_COLUMNS)]
+
+
+def grid_ticket_mask(grid: TicketGrid, index: int) -> int:
+    """Returns the 90-bit mask of the numbers of the ticket at the index of a grid of tickets"""
+    start = index * TICKET_CELLS
+    # The numbers of a ticket are distinct, so adding up their bits is the same as OR-ing them
+    return sum(map(CELL_BITS.__getitem__, grid[start: start + TICKET_CELLS]))
+
+
+def tickets_from_grid(grid: TicketGrid) -> Iterator[Ticket]:
+    """Yields each of the tickets of a grid of tickets, as generated by generate_tickets_bulk"""
+    for index in range(len(grid) // TICKET_CELLS):
+        yield ticket_from_grid(grid, index)
+
+
+# Placeholder for the blank cells of a ticket, kept at index 0 of the numbers of a ticket in column order
+BLANK_CELL: Tuple[Number, ...] = (0,)
+
+# The bit of each number in the mask of a ticket, indexed by the value of a cell of the grid. Blank cells have none
+CELL_BITS: List[int] = [0] + [number_bit(number) for number in NUMBER_POOL]
+
+ColumnPattern = Tuple[int, ...]
+
+
+@lru_cache(maxsize=None)
+def _column_patterns() -> Tuple[List[ColumnPattern], List[float]]:
+    """Returns every possible pattern of numbers per column, along with their cumulative probabilities.
+
+    The probabilities are those of generate_ticket: one number per column, followed by 6 more numbers from columns
+    picked at random out of the columns which don't yet have 3 numbers.
+    """
+    probabilities: Dict[ColumnPattern, float] = {(1,) * TICKET_COLUMNS: 1.0}
+    for _ in range(NUMBERS_PER_TICKET - TICKET_COLUMNS):
+        next_probabilities: DefaultDict[ColumnPattern, float] = defaultdict(float)
+        for pattern, probability in probabilities.items():
+            open_columns = [index for index, column_count in enumerate(pattern) if column_count < 3]
+            for index in open_columns:
+                next_pattern = pattern[:index] + (pattern[index] + 1,) + pattern[index + 1:]
+                next_probabilities[next_pattern] += probability / len(open_columns)
+        probabilities = dict(next_probabilities)
+    patterns = sorted(probabilities)
+    return patterns, list(accumulate(probabilities[pattern] for pattern in patterns))
+
+
+@lru_cache(maxsize=None)
+def _column_combinations(column_index: int, column_count: int) -> List[Tuple[Number, ...]]:
+    """Returns every sorted combination of `column_count` numbers from the range of the column"""
+    column_range = COLUMN_RANGES[column_index]
+    return list(combinations(range(column_range.start, column_range.end + 1), column_count))
+
+
+@lru_cache(maxsize=None)
+def _pattern_layout(pattern: ColumnPattern) -> Callable[[Tuple[Number, ...]], Tuple[Number, ...]]:
+    """Returns a function which lays out the numbers of a ticket with this column pattern into its grid.
+
+    The function takes the blank cell followed by the sorted numbers of each column in column order, and returns the
+    cells of the grid in row order. The layout is worked out by running assign_to_rows on placeholder numbers, so it
+    is always the same as generate_ticket.
+    """
+    column_wise_numbers = {COLUMN_RANGES[index]: list(range(COLUMN_RANGES[index].start,
+                                                            COLUMN_RANGES[index].start + column_count))
+                           for index, column_count in enumerate(pattern)}
+    # Position of each placeholder number among the numbers in column order (after the blank cell at position 0)
+    positions = {number: position for position, number in
+                 enumerate(chain.from_iterable(column_wise_numbers.values()), start=1)}
+    cell_positions = [0] * TICKET_CELLS
+    for row_index, row in enumerate(assign_to_rows(column_wise_numbers)):
+        for number in row:
+            column_index = next(index for index, column_range in enumerate(COLUMN_RANGES)
+                                if column_range.start <= number <= column_range.end)
+            cell_positions[row_index * TICKET_COLUMNS + column_index] = positions[number]
+    return cast(Callable[[Tuple[Number, ...]], Tuple[Number, ...]], itemgetter(*cell_positions))
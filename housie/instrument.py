@@ -0,0 +1,181 @@
+"""Lightweight instrumentation of the hot paths of the game: named timers and counters, and an optional cProfile dump.
+
+Instrumentation is off by default. Turn it on by setting the HOUSIE_PROFILE environment variable (to anything but an
+empty string), or with `python -m housie --profile`. Set HOUSIE_PROFILE_OUTPUT (or pass `--profile-output FILE`) to
+also run the whole program under cProfile and dump the stats to that file on exit, for use with pstats or snakeviz.
+
+While off, a timed function only costs a check of a flag on top of the call itself, and a counter only the check.
+
+    @timed('generate_ticket')
+    def generate_ticket(): ...
+
+    with timer('call_out'):
+        ...
+
+    count('save_json.bytes', len(text.encode()))
+
+Call print_summary at the end of a game to print the p50/p99 latencies of the timers and the totals of the counters
+recorded during it.
+"""
+
+__author__ = 'Aaron Alphonso'
+__email__ = 'alphonsoaaron1993@gmail.com'
+
+import atexit
+import os
+import sys
+from collections import defaultdict
+from functools import wraps
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Callable, DefaultDict, Dict, List, Optional, TextIO, TypeVar
+
+if TYPE_CHECKING:
+    import cProfile
+
+PROFILE_ENV_VAR = 'HOUSIE_PROFILE'
+PROFILE_OUTPUT_ENV_VAR = 'HOUSIE_PROFILE_OUTPUT'
+
+F = TypeVar('F', bound=Callable[..., Any])
+
+# Whether instrumentation is on. Checked on every instrumented call, so kept as a plain module global
+_enabled = False
+# The durations in seconds recorded by each timer, and the totals of each counter, since the last reset
+_timings: DefaultDict[str, List[float]] = defaultdict(list)
+_counters: DefaultDict[str, int] = defaultdict(int)
+_profiler: Optional['cProfile.Profile'] = None
+
+
+def enable(profile_output: Optional[str] = None) -> None:
+    """Turns instrumentation on. If profile_output is given, also starts cProfile and dumps its stats there on exit"""
+    global _enabled, _profiler  # pylint: disable=global-statement
+    _enabled = True
+    if profile_output and _profiler is None:
+        import cProfile  # pylint: disable=import-outside-toplevel
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+        atexit.register(_dump_profile, _profiler, profile_output)
+
+
+def disable() -> None:
+    """Turns instrumentation off. Anything recorded so far is kept until reset"""
+    global _enabled  # pylint: disable=global-statement
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    """Returns whether instrumentation is on"""
+    return _enabled
+
+
+def enable_from_environment() -> None:
+    """Turns instrumentation on if asked to by the environment variables"""
+    if os.environ.get(PROFILE_ENV_VAR) or os.environ.get(PROFILE_OUTPUT_ENV_VAR):
+        enable(os.environ.get(PROFILE_OUTPUT_ENV_VAR) or None)
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """Decorator recording the duration of every call of the function under the timer of the given name"""
+    def decorate(func: F) -> F:
+        @wraps(func)
+        def wrapper(*args, **kwargs):  # type: ignore
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _timings[name].append(perf_counter() - start)
+        return wrapper  # type: ignore
+    return decorate
+
+
+class _Timer:
+    """Context manager recording the time spent in its block under a named timer"""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self) -> '_Timer':
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        _timings[self.name].append(perf_counter() - self.start)
+
+
+class _NullTimer:
+    """Stands in for a _Timer while instrumentation is off"""
+
+    def __enter__(self) -> '_NullTimer':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(name: str) -> Any:
+    """Returns a context manager recording the time spent in its block under the timer of the given name"""
+    return _Timer(name) if _enabled else _NULL_TIMER
+
+
+def count(name: str, amount: int = 1) -> None:
+    """Adds the amount to the counter of the given name"""
+    if _enabled:
+        _counters[name] += amount
+
+
+def percentile(durations: List[float], percent: float) -> float:
+    """Returns the given percentile of the durations, by the nearest rank method"""
+    if not durations:
+        return 0.0
+    ordered = sorted(durations)
+    rank = max(0, min(len(ordered) - 1, -(-len(ordered) * percent // 100) - 1))
+    return ordered[int(rank)]
+
+
+def summary() -> Dict[str, Dict[str, float]]:
+    """Returns, for each timer, the number of calls and the total, p50, p99 and max durations in seconds"""
+    return {name: {'calls': len(durations), 'total': sum(durations), 'p50': percentile(durations, 50),
+                   'p99': percentile(durations, 99), 'max': max(durations)}
+            for name, durations in sorted(_timings.items()) if durations}
+
+
+def counters() -> Dict[str, int]:
+    """Returns the totals of the counters"""
+    return dict(sorted(_counters.items()))
+
+
+def reset() -> None:
+    """Forgets everything recorded so far"""
+    _timings.clear()
+    _counters.clear()
+
+
+def print_summary(title: str, out: Optional[TextIO] = None) -> None:
+    """Prints the timers and counters recorded since the last reset, then resets them. Does nothing while off"""
+    if not _enabled:
+        return
+    out = out or sys.stderr
+    lines = ['---- {} ----'.format(title),
+             '{:<28}{:>8}{:>12}{:>10}{:>10}{:>10}'.format('Timer (ms)', 'calls', 'total', 'p50', 'p99', 'max')]
+    for name, stats in summary().items():
+        lines.append('{:<28}{:>8}{:>12.2f}{:>10.3f}{:>10.3f}{:>10.3f}'.format(
+            name, int(stats['calls']), stats['total'] * 1e3, stats['p50'] * 1e3, stats['p99'] * 1e3,
+            stats['max'] * 1e3))
+    for name, total in counters().items():
+        lines.append('{:<28}{:>8}'.format(name, total))
+    print('\n'.join(lines), file=out)
+    reset()
+
+
+def _dump_profile(profiler: 'cProfile.Profile', profile_output: str) -> None:
+    profiler.disable()
+    profiler.dump_stats(profile_output)
+    print('Profile written to {}'.format(profile_output), file=sys.stderr)
+
+
+enable_from_environment()
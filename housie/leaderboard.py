@@ -0,0 +1,138 @@
+"""Live leaderboard of the tickets closest to winning Full House and each of the lines, as numbers are called out"""
+
+__author__ = 'Aaron Alphonso'
+__email__ = 'alphonsoaaron1993@gmail.com'
+
+from array import array
+from typing import Dict, List, NamedTuple, Sequence
+
+from housie.claims import LINE_PRIZES, Prize
+from housie.constants import Number, NUMBER_POOL, TICKET_ROWS
+from housie.models import Board, Ticket, TicketData
+
+# The prizes tracked by the leaderboard. Each row of a ticket counts towards its line, every number towards Full House
+LEADERBOARD_PRIZES: List[Prize] = [Prize.FULL_HOUSE] + LINE_PRIZES
+
+# Number of tickets listed for each prize by default
+DEFAULT_TOP_K = 3
+
+# Tickets further than this many numbers from a prize are not shown on the leaderboard by default
+DEFAULT_MAX_AWAY = 2
+
+LeaderboardEntry = NamedTuple('LeaderboardEntry', [('name', str), ('ticket_index', int), ('numbers_left', int)])
+LeaderboardEntry.__doc__ = """A ticket on the leaderboard, given by the name of its player and its index among the
+tickets of that player, along with how many more numbers it needs to complete the prize"""
+
+
+class Leaderboard:
+    """Keeps the tickets in buckets by the count of numbers they have left for each prize, so that the tickets closest
+    to winning a prize are always at hand.
+
+    Like the ClaimEngine, an index of number -> tickets holding it in each row is built once up front. Calling a number
+    moves each ticket holding it down one bucket for Full House and for the line of its row, which is a constant time
+    removal from one dict and insertion into the next. Asking for the top K tickets of a prize only walks the buckets
+    from the lowest up until it has K of them, however many tickets are in play.
+
+    Only the name and index of each ticket are kept, not the ticket itself, so it can be used with a TicketPool.
+    """
+
+    def __init__(self, ticket_data: TicketData) -> None:
+        # Name of the player, and index among the tickets of that player, of each ticket id
+        self.names: List[str] = []
+        self.ticket_indices = array('I')
+        # For each prize in LEADERBOARD_PRIZES, the numbers left of each ticket id, and the ticket ids bucketed by
+        # their numbers left. Dicts are used as ordered sets, so tickets tied on the same count keep the order they
+        # reached it in
+        self._remaining: List[bytearray] = [bytearray() for _ in LEADERBOARD_PRIZES]
+        self._buckets: List[List[Dict[int, None]]] = [[] for _ in LEADERBOARD_PRIZES]
+        # For each row, and each number, the ids of the tickets holding the number in that row
+        self._index: List[List['array[int]']] = [[array('I') for _ in range(len(NUMBER_POOL) + 1)]
+                                                 for _ in range(TICKET_ROWS)]
+        self._called = bytearray(len(NUMBER_POOL) + 1)
+
+        for name, tickets in ticket_data.items():
+            for ticket_index, ticket in enumerate(tickets):
+                self.add_ticket(name, ticket_index, ticket)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def add_ticket(self, name: str, ticket_index: int, ticket: Ticket) -> int:
+        """Adds a ticket to the leaderboard and returns its ticket id. Numbers already called count towards it"""
+        ticket_id = len(self.names)
+        self.names.append(name)
+        self.ticket_indices.append(ticket_index)
+        rows: Sequence[Sequence[Number]] = ticket.rows[:TICKET_ROWS]
+        row_counts = [sum(1 for number in row if not self._is_called(number)) for row in rows]
+        row_counts.extend([0] * (TICKET_ROWS - len(row_counts)))
+        for slot, count in enumerate([sum(row_counts)] + row_counts):
+            self._remaining[slot].append(count)
+            buckets = self._buckets[slot]
+            while len(buckets) <= count:
+                buckets.append({})
+            buckets[count][ticket_id] = None
+        for row, row_index_of_numbers in zip(rows, self._index):
+            for number in row:
+                if 0 < number < len(row_index_of_numbers) and not self._called[number]:
+                    row_index_of_numbers[number].append(ticket_id)
+        return ticket_id
+
+    def attach(self, board: Board) -> None:
+        """Calls every number already selected on the board, and every number picked on it from now on"""
+        self.call_many(board.selected)
+        board.add_listener(self.call)
+
+    def call(self, number: Number) -> None:
+        """Moves every ticket holding the number one bucket closer for Full House and for the line of its row.
+        Numbers which are not valid or which have already been called are ignored"""
+        if not 0 < number < len(self._called) or self._called[number]:
+            return
+        self._called[number] = 1
+        # Full House is in the first slot, followed by the line of each row. The moves are inlined, as this is run for
+        # about a sixth of all the tickets on every call
+        full_house_left, full_house_buckets = self._remaining[0], self._buckets[0]
+        for row_index, row_index_of_numbers in enumerate(self._index):
+            line_left, line_buckets = self._remaining[row_index + 1], self._buckets[row_index + 1]
+            for ticket_id in row_index_of_numbers[number]:
+                count = full_house_left[ticket_id]
+                del full_house_buckets[count][ticket_id]
+                full_house_buckets[count - 1][ticket_id] = None
+                full_house_left[ticket_id] = count - 1
+                count = line_left[ticket_id]
+                del line_buckets[count][ticket_id]
+                line_buckets[count - 1][ticket_id] = None
+                line_left[ticket_id] = count - 1
+
+    def call_many(self, numbers: Sequence[Number]) -> None:
+        """Calls each of the numbers, in order"""
+        for number in numbers:
+            self.call(number)
+
+    def numbers_left(self, ticket_id: int, prize: Prize) -> int:
+        """Returns how many more numbers the ticket needs to complete the prize"""
+        return self._remaining[LEADERBOARD_PRIZES.index(prize)][ticket_id]
+
+    def count(self, prize: Prize, numbers_left: int) -> int:
+        """Returns how many tickets have exactly the given count of numbers left for the prize"""
+        buckets = self._buckets[LEADERBOARD_PRIZES.index(prize)]
+        return len(buckets[numbers_left]) if 0 <= numbers_left < len(buckets) else 0
+
+    def counts(self, prize: Prize) -> Dict[int, int]:
+        """Returns the number of tickets for each count of numbers left for the prize, leaving out empty counts"""
+        buckets = self._buckets[LEADERBOARD_PRIZES.index(prize)]
+        return {numbers_left: len(bucket) for numbers_left, bucket in enumerate(buckets) if bucket}
+
+    def closest(self, prize: Prize, k: int = DEFAULT_TOP_K, include_complete: bool = False) -> List[LeaderboardEntry]:
+        """Returns up to k tickets which are the fewest numbers away from completing the prize, closest first.
+        Tickets which have already completed it are left out, unless include_complete is True"""
+        entries: List[LeaderboardEntry] = []
+        buckets = self._buckets[LEADERBOARD_PRIZES.index(prize)]
+        for numbers_left in range(0 if include_complete else 1, len(buckets)):
+            for ticket_id in buckets[numbers_left]:
+                if len(entries) >= k:
+                    return entries
+                entries.append(LeaderboardEntry(self.names[ticket_id], self.ticket_indices[ticket_id], numbers_left))
+        return entries
+
+    def _is_called(self, number: Number) -> bool:
+        return 0 < number < len(self._called) and bool(self._called[number])
@@ -1,2 +1,5 @@
 from .board import Board, demo_board
-from .ticket import Ticket, load_tickets, demo_ticket
+from .ticket import Ticket, TicketData, load_tickets, demo_ticket
+from .ticket_registry import TicketRegistry
+from .compact_ticket import CompactTicket
+from .ticket_pool import TicketPool, TicketView
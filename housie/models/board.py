@@ -3,57 +3,99 @@
 __author__ = 'Aaron Alphonso'
 __email__ = 'alphonsoaaron1993@gmail.com'
 
-from typing import List, Optional
-from random import choice
+from typing import Callable, List, Optional
+from random import Random
 
+from housie import instrument
 from housie.constants import SelectedPool, RemainingPool, Number, NUMBER_POOL
-from housie.utils import clear_screen
+from housie.utils import clear_screen, NUMBER_CELLS, EMPTY_BOARD_CELL
 
 
 class Board:
-    """Represents the Housie board state and logic to run the game and display the state"""
+    """Represents the Housie board state and logic to run the game and display the state
 
-    def __init__(self, already_selected: Optional[SelectedPool] = None) -> None:
+    Which numbers have been called is kept in a flag per number, so checking or picking a number takes constant time.
+    Random picks are popped off a draw order shuffled once at the start of the game. Pass a seed to make the draw
+    order reproducible, e.g. so that a game can be audited later.
+    """
+
+    def __init__(self, already_selected: Optional[SelectedPool] = None, seed: Optional[int] = None) -> None:
         """Initialize the state of the board.
         Either a blank new board, or some pre-selected numbers to represent an already mid-way game"""
         # Variables for holding game state
-        self.remaining: RemainingPool = []
         self.selected: SelectedPool = []
+        # Flag per number (indexed by the number itself) of whether it has been called out
+        self._called = bytearray(len(NUMBER_POOL) + 1)
+        self._remaining_count = len(NUMBER_POOL)
+        # The numbers yet to be picked at random, shuffled. Picks are popped off the end
+        self._draw_order: List[Number] = []
+        self._random = Random(seed)
+        # Functions to be notified of every number picked on the board
+        self._listeners: List[Callable[[Number], object]] = []
         if already_selected:
             self.init_custom_game(already_selected)
         else:
             self.init_new_game()
 
+    @property
+    def remaining(self) -> RemainingPool:
+        """The numbers yet to be called out, in ascending order"""
+        return [number for number in NUMBER_POOL if not self._called[number]]
+
+    @property
+    def remaining_count(self) -> int:
+        """The count of numbers yet to be called out"""
+        return self._remaining_count
+
+    def is_selected(self, number: Number) -> bool:
+        """Returns whether the number has been called out"""
+        return 0 < number < len(self._called) and bool(self._called[number])
+
     def pick_next(self) -> Optional[Number]:
         """Picks a number at random from the remaining pool of numbers.
         The chosen number is removed from the remaining_pool and added to the selected pool"""
-        if not self.remaining:
-            return None
-        number = choice(self.remaining)
-        return self.pick_manual(number)
+        while self._draw_order:
+            number = self._draw_order.pop()
+            # Skip the numbers that have been picked manually in the meantime
+            if not self._called[number]:
+                return self.pick_manual(number)
+        return None
 
     def pick_many(self, count: int) -> List[Number]:
         """Pick multiple numbers from the remaining pool of numbers
         The chosen numbers are removed from the remaining pool and added to the selected pool"""
         return list(filter(None, [self.pick_next() for i in range(count)]))
 
+    @instrument.timed('Board.pick_manual')
     def pick_manual(self, number: Number) -> Number:
         """Manually pick a number from the number pool.
         The chosen number is removed from the remaining pool and added to the selected pool"""
-        if number in self.remaining:
-            self.remaining.remove(number)
+        if 0 < number < len(self._called) and not self._called[number]:
+            self._called[number] = 1
+            self._remaining_count -= 1
             self.selected.append(number)
+            for listener in self._listeners:
+                listener(number)
         return number
 
+    def add_listener(self, listener: Callable[[Number], object]) -> None:
+        """Registers a function to be called with each number picked on the board from now on"""
+        self._listeners.append(listener)
+
     def init_new_game(self) -> None:
         """Initialize a new game"""
-        self.selected = []
-        self.remaining = NUMBER_POOL.copy()
+        self.init_custom_game([])
 
     def init_custom_game(self, already_selected: List[Number]) -> None:
         """Initialize a new game with a set of numbers already called out"""
         self.selected = already_selected
-        self.remaining = list(set(NUMBER_POOL) - set(already_selected))
+        self._called = bytearray(len(NUMBER_POOL) + 1)
+        for number in already_selected:
+            if 0 < number < len(self._called):
+                self._called[number] = 1
+        self._remaining_count = len(NUMBER_POOL) - sum(self._called)
+        self._draw_order = [number for number in NUMBER_POOL if not self._called[number]]
+        self._random.shuffle(self._draw_order)
 
     def last_5_selected(self) -> List[Number]:
         """Returns a list of the last 5 numbers called out"""
@@ -61,25 +103,25 @@ class Board:
 
     def display_board(self) -> str:
         """Display the Housie Board of selected numbers visually in the console"""
-        board = ''
-        board += '------------------ Housie Board -------------------\n'
+        board = ['------------------ Housie Board -------------------\n']
         row_size = 10
         num_rows = len(NUMBER_POOL) // row_size
         for row_num in range(num_rows):
             start = row_num * row_size
             end = (row_num * row_size) + row_size
-            for num in NUMBER_POOL[start: end]:
-                if num in self.selected:
-                    board += '|{: 3} '.format(num)
-                else:
-                    board += '|' + ' ' * 4
-            board += '|'
-            board += '\n---------------------------------------------------\n'
+            board.extend('|' + (NUMBER_CELLS[num] if self._called[num] else EMPTY_BOARD_CELL)
+                         for num in NUMBER_POOL[start: end])
+            board.append('|\n---------------------------------------------------\n')
+
+        board.append(self.display_summary())
+        return ''.join(board)
 
+    def display_summary(self) -> str:
+        """Display the last 5 numbers called and the count of numbers left, as shown below the board"""
         last_5_numbers_str = ", ".join(map(str, reversed(self.last_5_selected())))
-        board += 'Last 5 Numbers called: {}\n'.format(last_5_numbers_str)
-        board += 'Left in the bag: {}\n'.format(len(self.remaining))
-        return board
+        summary = 'Last 5 Numbers called: {}\n'.format(last_5_numbers_str)
+        summary += 'Left in the bag: {}\n'.format(self.remaining_count)
+        return summary
 
 
 def demo_board() -> None:
@@ -0,0 +1,77 @@
+"""Compact, bitmask backed Housie Ticket"""
+
+__author__ = 'Aaron Alphonso'
+__email__ = 'alphonsoaaron1993@gmail.com'
+
+from typing import List, Set
+
+from housie.constants import Row, Number
+from housie.models.ticket import Ticket
+from housie.utils import number_bit, numbers_to_mask, mask_to_numbers, popcount
+
+
+class CompactTicket(Ticket):
+    """A drop-in alternative to Ticket that stores its state as integer bitmasks.
+
+    Each housie number maps to one bit of a 90-bit mask. The ticket keeps one mask for all its numbers, one mask per
+    row and one mask for the marked numbers. Marking a number is a single OR, and questions such as the numbers left
+    on a row or a full house are an AND followed by a popcount.
+
+    The rows, numbers and selected attributes of Ticket are still available (derived from the masks), so the
+    display methods and the rest of the game code work unchanged. The numbers within a row are always in ascending
+    order, as they are on a valid ticket.
+    """
+
+    def __init__(self, rows: List[Row]):  # pylint: disable=super-init-not-called
+        # Masks of the numbers in each row, the whole ticket, and the numbers marked so far
+        self.row_masks: List[int] = [numbers_to_mask(filter(None, row)) for row in rows]
+        self.mask: int = 0
+        for row_mask in self.row_masks:
+            self.mask |= row_mask
+        self.marked: int = 0
+
+    @property
+    def rows(self) -> List[Row]:  # type: ignore[override]
+        """The numbers of the ticket row-wise, in ascending order within each row"""
+        return [mask_to_numbers(row_mask) for row_mask in self.row_masks]
+
+    @property
+    def numbers(self) -> List[Number]:  # type: ignore[override]
+        """All the numbers of the ticket as a flat list, row after row"""
+        return [number for row_mask in self.row_masks for number in mask_to_numbers(row_mask)]
+
+    @property
+    def selected(self) -> Set[Number]:  # type: ignore[override]
+        """The numbers on the ticket which have been marked"""
+        return set(mask_to_numbers(self.marked))
+
+    def mark_number(self, number: int) -> None:
+        """Updates the ticket marking the matching number as selected"""
+        self.marked |= self.mask & number_bit(number)
+
+    def mark_numbers(self, numbers: List[int]) -> None:
+        """Updates the ticket marking the matching numbers as selected"""
+        self.marked |= self.mask & numbers_to_mask(numbers)
+
+    def is_marked(self, number: Number) -> bool:
+        """Returns whether the number has been marked on the ticket"""
+        return bool(self.marked & number_bit(number))
+
+    def numbers_left(self) -> int:
+        """Returns the count of numbers on the ticket which are yet to be marked"""
+        return popcount(self.mask & ~self.marked)
+
+    def row_numbers_left(self, row_index: int) -> int:
+        """Returns the count of numbers in the row (0, 1 or 2) which are yet to be marked"""
+        return popcount(self.row_masks[row_index] & ~self.marked)
+
+    def is_row_complete(self, row_index: int) -> bool:
+        """Returns whether all the numbers in the row (0, 1 or 2) have been marked"""
+        return not self.row_masks[row_index] & ~self.marked
+
+    def is_full_house(self) -> bool:
+        """Returns whether all the numbers on the ticket have been marked"""
+        return not self.mask & ~self.marked
+
+    def __repr__(self) -> str:
+        return "CompactTicket(numbers={})".format(self.rows)
@@ -3,15 +3,18 @@
 __author__ = 'Aaron Alphonso'
 __email__ = 'alphonsoaaron1993@gmail.com'
 
-from typing import List, Dict, Optional, Set
+from typing import Any, FrozenSet, Iterable, List, Mapping, Optional, Sequence, Set, Tuple, Union
 
 from housie.constants import Row, COLUMN_RANGES, Number, NUMBER_POOL
-from housie.utils import load_json, strike_through, clear_screen
+from housie.utils import load_json, clear_screen, number_cell, BLANK_TICKET_CELL
 
 
 class Ticket:
     """Simple structure to store and display the ticket"""
 
+    # Slots rather than a __dict__, which also lets the slotted TicketView of a TicketPool go without one
+    __slots__ = ('rows', 'numbers', '_number_set', 'selected')
+
     def __init__(self, rows: List[Row]):
         # self.rows will hold only the non-None elements
         self.rows: List[Row] = []
@@ -24,12 +27,14 @@ class Ticket:
                     self.numbers.append(number)
                     new_row.append(number)
             self.rows.append(new_row)
+        # Set of the numbers for constant time lookups when marking
+        self._number_set: FrozenSet[Number] = frozenset(self.numbers)
         # All the numbers that are selected
         self.selected: Set[Number] = set()
 
     def mark_number(self, number: int) -> None:
         """Updates the ticket marking the matching number as selected"""
-        if number in self.numbers:
+        if number in self._number_set:
             self.selected.add(number)
 
     def mark_numbers(self, numbers: List[int]) -> None:
@@ -37,6 +42,26 @@ class Ticket:
         for number in numbers:
             self.mark_number(number)
 
+    def is_marked(self, number: Number) -> bool:
+        """Returns whether the number has been marked on the ticket"""
+        return number in self.selected
+
+    def numbers_left(self) -> int:
+        """Returns the count of numbers on the ticket which are yet to be marked"""
+        return len(self.numbers) - len(self.selected)
+
+    def row_numbers_left(self, row_index: int) -> int:
+        """Returns the count of numbers in the row (0, 1 or 2) which are yet to be marked"""
+        return sum(1 for number in self.rows[row_index] if number not in self.selected)
+
+    def is_row_complete(self, row_index: int) -> bool:
+        """Returns whether all the numbers in the row (0, 1 or 2) have been marked"""
+        return self.row_numbers_left(row_index) == 0
+
+    def is_full_house(self) -> bool:
+        """Returns whether all the numbers on the ticket have been marked"""
+        return self.numbers_left() == 0
+
     def __repr__(self) -> str:
         return "Ticket(numbers={})".format(self.rows)
 
@@ -46,32 +71,13 @@ class Ticket:
 
     def minimalistic_display(self) -> str:
         """Displays the ticket in a minimalistic format"""
-        ticket_representation = ''
-        for row in self.rows:
-            row_elems = []
-            for number in row:
-                if number:
-                    if number in self.selected:
-                        row_elems.append(strike_through('{: 3} '.format(number)))
-                    else:
-                        row_elems.append('{: 3} '.format(number))
-            ticket_representation += ','.join(row_elems) + '\n'
-        return ticket_representation
+        return ''.join(','.join(number_cell(number, self.is_marked(number)) for number in row if number) + '\n'
+                       for row in self.rows)
 
     def structural_display(self) -> str:
         """Displays the ticket in a 3 x 9 grid as is seen on traditional tickets"""
-        ticket_representation = ''
-        for row in self.get_structural_representation():
-            for num in row:
-                if num:
-                    if num in self.selected:
-                        ticket_representation += strike_through('{: 3} '.format(num))
-                    else:
-                        ticket_representation += '{: 3} '.format(num)
-                else:
-                    ticket_representation += '  - '
-            ticket_representation += '\n'
-        return ticket_representation
+        return ''.join(''.join(number_cell(num, self.is_marked(num)) if num else BLANK_TICKET_CELL for num in row)
+                       + '\n' for row in self.get_structural_representation())
 
     def get_structural_representation(self) -> List[List[Optional[Number]]]:
         """Returns a representation of the ticket in a 3 x 9 grid with blank squares represented by None
@@ -99,15 +105,93 @@ class Ticket:
         return representation
 
 
-def load_tickets(file_name: str) -> Optional[Dict[str, List[Ticket]]]:
-    """Reads the input file and tries to parse the data into a dict of name : tickets"""
-    ticket_data = load_json(file_name)
-    if not ticket_data:
+# The tickets of each player in a game, keyed by the name of the player
+TicketData = Mapping[str, Sequence[Ticket]]
+
+
+def load_tickets(file_name: str, compact: bool = False, pool: bool = False,
+                 validate: Optional[bool] = None) -> Optional[TicketData]:
+    """Reads the input file and tries to parse the data into a dict of name : tickets
+
+    Both the nested json format ({name: [ticket rows, ...]}) and the streaming JSON Lines format (one player-ticket
+    per line, in files ending with '.jsonl') are supported. These are returned as a TicketRegistry, which also
+    indexes the tickets by number for fast marking.
+
+    Binary ticket books (files ending with '.hbook') are opened as a TicketBook instead, which reads the tickets from
+    the file as they are accessed, so even books of millions of tickets open instantly.
+
+    Pass compact=True to load the tickets into the bitmask backed CompactTicket instead of the regular Ticket.
+    Pass pool=True to load the tickets of any of the formats into a TicketPool instead, which takes a fraction of the
+    memory when there are a lot of tickets to play with. compact is ignored then
+
+    The tickets of json and JSON Lines files are checked against the rules of a ticket as they are read, as these are
+    often written by hand. Rows may list just their 5 numbers, or be laid out on the grid with None or 0 in the blank
+    cells. An InvalidTicketsError reporting every invalid ticket is raised if any are found. Pass
+    validate=True to also check the tickets of a binary ticket book (which means reading all of them), or
+    validate=False to not check any tickets at all. A CorruptTicketBookError is raised for a binary ticket book which
+    can't be read, such as one which is empty or was cut short
+    """
+    from housie.models.compact_ticket import CompactTicket
+    from housie.models.ticket_pool import TicketPool
+    from housie.models.ticket_registry import TicketRegistry
+    from housie.storage.binary import is_binary_book_file, TicketBook
+    from housie.storage.jsonl import is_jsonl_file, iter_records_jsonl
+    from housie.validate import InvalidTicketsError, TicketValidator
+
+    ticket_class = CompactTicket if compact else Ticket
+    ticket_data: Union[TicketRegistry, TicketPool] = TicketPool() if pool else TicketRegistry()
+    validator = TicketValidator() if validate or validate is None and not is_binary_book_file(file_name) else None
+    records: Iterable[Tuple[str, Any]]
+    book: Optional[TicketBook] = None
+    if is_binary_book_file(file_name):
+        try:
+            book = TicketBook(file_name, ticket_class)
+        except FileNotFoundError:
+            return None
+        if not book:
+            book.close()
+            return None
+        if not pool:
+            if validator is not None and not validator.check_all(book.records()):
+                book.close()
+                raise InvalidTicketsError(validator.report)
+            return book
+        records = book.records()
+    elif is_jsonl_file(file_name):
+        records = iter_records_jsonl(file_name)
+    else:
+        json_data = load_json(file_name)
+        if not json_data:
+            return None
+        # The tickets of each player are loaded together, which is a good deal quicker than one at a time
+        for name, tickets in json_data.items():
+            if validator is not None:
+                tickets = validator.check_player(name, tickets)
+            if isinstance(ticket_data, TicketPool):
+                for rows in tickets:
+                    ticket_data.add_ticket(name, rows)
+            else:
+                ticket_data[name] = list(map(ticket_class, tickets))
+        if validator is not None and validator.report:
+            raise InvalidTicketsError(validator.report)
+        return ticket_data or None
+
+    try:
+        for name, rows in records:
+            if validator is not None and not validator.check(name, rows):
+                continue
+            if isinstance(ticket_data, TicketPool):
+                ticket_data.add_ticket(name, rows)
+            else:
+                ticket_data.add_ticket(name, ticket_class(rows))
+    except FileNotFoundError:
         return None
-    for name, tickets in ticket_data.items():
-        tickets = list(map(Ticket, tickets))
-        ticket_data[name] = tickets
-    return ticket_data
+    finally:
+        if book is not None:
+            book.close()
+    if validator is not None and validator.report:
+        raise InvalidTicketsError(validator.report)
+    return ticket_data or None
 
 
 def demo_ticket() -> None:
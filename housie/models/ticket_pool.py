@@ -0,0 +1,216 @@
+"""Struct-of-arrays storage for holding millions of tickets in memory"""
+
+__author__ = 'Aaron Alphonso'
+__email__ = 'alphonsoaaron1993@gmail.com'
+
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Set, Tuple, Union, overload
+
+from housie.constants import NUMBER_POOL, TICKET_ROWS, Number, Row
+from housie.models.ticket import Ticket
+
+
+class TicketPool(Dict[str, Sequence[Ticket]]):
+    """A dict of name : tickets that stores every ticket in a few flat arrays instead of one object per ticket.
+
+    The numbers of all the tickets sit back to back in a single bytearray, row after row. For each row, an array holds
+    the position in it where the row ends, and for each number a byte flags whether it has been marked on its ticket.
+    That is a little over 40 bytes per ticket, against a few kilobytes for a regular Ticket with its lists and sets.
+
+    The tickets handed out are TicketViews, which only point into the pool, so they are created as they are accessed
+    and can be thrown away. Marking a number through the pool marks it on every ticket at once, by flagging it as
+    called rather than visiting the tickets holding it.
+
+    Players added again through item assignment replace their tickets, but the space of the old ones is not reclaimed.
+    """
+
+    def __init__(self, ticket_data: Optional[Mapping[str, Sequence[Ticket]]] = None) -> None:
+        super().__init__()
+        # The numbers of every ticket, row after row
+        self.numbers = bytearray()
+        # The position in numbers where each row ends, TICKET_ROWS entries per ticket
+        self.row_ends = array('I')
+        # Whether each number in numbers has been marked on its own ticket
+        self.marked = bytearray()
+        # Whether each number has been marked on every ticket. Position 0 is unused, as with TicketRegistry
+        self.called = bytearray(len(NUMBER_POOL) + 1)
+        if ticket_data:
+            for name, tickets in ticket_data.items():
+                self[name] = tickets
+
+    @property
+    def ticket_count(self) -> int:
+        """The number of tickets stored in the pool"""
+        return len(self.row_ends) // TICKET_ROWS
+
+    def __setitem__(self, name: str, tickets: Sequence[Ticket]) -> None:
+        indices = array('I', (self.add_rows(ticket.rows, ticket.selected) for ticket in tickets))
+        super().__setitem__(name, PoolTickets(self, indices))
+
+    # dict implements these without going through __setitem__, which would store the tickets as they are given
+    def update(self, *args: Any, **kwargs: Sequence[Ticket]) -> None:
+        for name, tickets in dict(*args, **kwargs).items():
+            self[name] = tickets
+
+    def __ior__(self, ticket_data: Any) -> 'TicketPool':  # type: ignore[override,misc]
+        self.update(ticket_data)
+        return self
+
+    def setdefault(self, name: str, tickets: Sequence[Ticket] = ()) -> Sequence[Ticket]:
+        if name not in self:
+            self[name] = tickets
+        return self[name]
+
+    def add_ticket(self, name: str, rows: Sequence[Row]) -> int:
+        """Adds a single ticket for a player, creating the player entry if required. Returns its index in the pool"""
+        index = self.add_rows(rows)
+        if name not in self:
+            super().__setitem__(name, PoolTickets(self, array('I')))
+        player_tickets = super().__getitem__(name)
+        assert isinstance(player_tickets, PoolTickets)
+        player_tickets.indices.append(index)
+        return index
+
+    def add_rows(self, rows: Sequence[Row], selected: Iterable[Number] = ()) -> int:
+        """Stores a ticket in the pool without giving it to any player, with the selected numbers marked.
+        Returns its index in the pool. Blank cells (0 or None) in the rows are skipped"""
+        if len(rows) != TICKET_ROWS:
+            raise ValueError('A ticket must have {} rows, got {}'.format(TICKET_ROWS, len(rows)))
+        selected = set(selected)
+        for row in rows:
+            numbers = [number for number in row if number]
+            self.numbers.extend(numbers)
+            self.marked.extend(number in selected for number in numbers)
+            self.row_ends.append(len(self.numbers))
+        return self.ticket_count - 1
+
+    def ticket(self, index: int) -> 'TicketView':
+        """Returns a view of the ticket at the index of the pool"""
+        if not 0 <= index < self.ticket_count:
+            raise IndexError('Ticket index {} out of range'.format(index))
+        return TicketView(self, index)
+
+    def span(self, index: int) -> Tuple[int, int]:
+        """Returns the start and end positions of the numbers of the ticket at the index"""
+        row = index * TICKET_ROWS
+        return self.row_ends[row - 1] if row else 0, self.row_ends[row + TICKET_ROWS - 1]
+
+    def mark_number(self, number: Number) -> None:
+        """Marks the number on every ticket that contains it"""
+        if 0 < number < len(self.called):
+            self.called[number] = 1
+
+    def mark_numbers(self, numbers: Iterable[Number]) -> None:
+        """Marks each of the numbers on every ticket that contains it"""
+        for number in numbers:
+            self.mark_number(number)
+
+    def memory_size(self) -> int:
+        """Returns the number of bytes taken up by the arrays holding the tickets"""
+        return len(self.numbers) + len(self.marked) + len(self.called) + self.row_ends.itemsize * len(self.row_ends) \
+            + sum(tickets.indices.itemsize * len(tickets.indices) for tickets in self.values()
+                  if isinstance(tickets, PoolTickets))
+
+
+class PoolTickets(Sequence[Ticket]):
+    """The tickets of a single player in a TicketPool, as the indices of the tickets in the pool"""
+
+    def __init__(self, pool: TicketPool, indices: 'array[int]') -> None:
+        self.pool = pool
+        self.indices = indices
+
+    @overload
+    def __getitem__(self, index: int) -> Ticket:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[Ticket]:
+        ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Ticket, List[Ticket]]:
+        if isinstance(index, slice):
+            return [TicketView(self.pool, position) for position in self.indices[index]]
+        return TicketView(self.pool, self.indices[index])
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __iter__(self) -> Iterator[Ticket]:
+        for index in self.indices:
+            yield TicketView(self.pool, index)
+
+
+class TicketView(Ticket):
+    """A ticket stored in a TicketPool. Holds nothing but the pool and the index of the ticket in it, and reads and
+    marks the numbers in the arrays of the pool, so any number of views of the same ticket agree with each other.
+
+    A number is marked on the ticket if it was marked on this ticket alone, or on the whole pool.
+    """
+
+    __slots__ = ('pool', 'index')
+
+    def __init__(self, pool: TicketPool, index: int) -> None:  # pylint: disable=super-init-not-called
+        self.pool = pool
+        self.index = index
+
+    @property
+    def rows(self) -> List[Row]:  # type: ignore[override]
+        """The numbers of the ticket row-wise"""
+        row = self.index * TICKET_ROWS
+        start, _ = self.pool.span(self.index)
+        rows = []
+        for end in self.pool.row_ends[row: row + TICKET_ROWS]:
+            rows.append(list(self.pool.numbers[start: end]))
+            start = end
+        return rows
+
+    @property
+    def numbers(self) -> List[Number]:  # type: ignore[override]
+        """All the numbers of the ticket as a flat list, row after row"""
+        start, end = self.pool.span(self.index)
+        return list(self.pool.numbers[start: end])
+
+    @property
+    def selected(self) -> Set[Number]:  # type: ignore[override]
+        """The numbers on the ticket which have been marked"""
+        start, end = self.pool.span(self.index)
+        numbers, marked, called = self.pool.numbers, self.pool.marked, self.pool.called
+        return {numbers[position] for position in range(start, end) if marked[position] or called[numbers[position]]}
+
+    def _position(self, number: Number) -> int:
+        """Returns the position of the number in the numbers of the pool, or -1 if it isn't on the ticket"""
+        if not 0 < number < len(self.pool.called):
+            return -1
+        start, end = self.pool.span(self.index)
+        return self.pool.numbers.find(number, start, end)
+
+    def mark_number(self, number: int) -> None:
+        """Updates the ticket marking the matching number as selected"""
+        position = self._position(number)
+        if position >= 0:
+            self.pool.marked[position] = 1
+
+    def is_marked(self, number: Number) -> bool:
+        """Returns whether the number has been marked on the ticket"""
+        position = self._position(number)
+        return position >= 0 and bool(self.pool.marked[position] or self.pool.called[number])
+
+    def numbers_left(self) -> int:
+        """Returns the count of numbers on the ticket which are yet to be marked"""
+        start, end = self.pool.span(self.index)
+        return end - start - len(self.selected)
+
+    def row_numbers_left(self, row_index: int) -> int:
+        """Returns the count of numbers in the row (0, 1 or 2) which are yet to be marked"""
+        return sum(1 for number in self.rows[row_index] if not self.is_marked(number))
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, TicketView):
+            return self.pool is other.pool and self.index == other.index
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((id(self.pool), self.index))
+
+    def __repr__(self) -> str:
+        return "TicketView(index={}, numbers={})".format(self.index, self.rows)
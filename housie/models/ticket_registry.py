@@ -0,0 +1,104 @@
+"""Inverted index from each housie number to the tickets that hold it"""
+
+__author__ = 'Aaron Alphonso'
+__email__ = 'alphonsoaaron1993@gmail.com'
+
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from housie.constants import Number, NUMBER_POOL
+from housie.models.ticket import Ticket
+
+
+class TicketRegistry(Dict[str, List[Ticket]]):
+    """A dict of name : tickets that also maintains an index of number -> tickets containing that number.
+
+    Marking a called number through the registry only touches the tickets that actually hold it (roughly 1/6th of
+    all tickets), instead of walking through every ticket of every player.
+
+    The index is kept in sync when players are added, replaced or removed through any of the methods of a dict, or when
+    tickets are added through `add_ticket`. Appending directly to a player's list of tickets bypasses the index.
+    """
+
+    def __init__(self, ticket_data: Optional[Mapping[str, List[Ticket]]] = None) -> None:
+        super().__init__()
+        # Position 0 is unused so that a number can be used directly as the index into the list
+        self._index: List[List[Ticket]] = [[] for _ in range(len(NUMBER_POOL) + 1)]
+        if ticket_data:
+            for name, tickets in ticket_data.items():
+                self[name] = tickets
+
+    def __setitem__(self, name: str, tickets: List[Ticket]) -> None:
+        if name in self:
+            del self[name]
+        super().__setitem__(name, tickets)
+        for ticket in tickets:
+            self._index_ticket(ticket)
+
+    def __delitem__(self, name: str) -> None:
+        super().__delitem__(name)
+        self._rebuild_index()
+
+    # dict implements these without going through __setitem__ or __delitem__, which keep the index in sync
+    def update(self, *args: Any, **kwargs: List[Ticket]) -> None:
+        for name, tickets in dict(*args, **kwargs).items():
+            self[name] = tickets
+
+    def __ior__(self, ticket_data: Any) -> 'TicketRegistry':  # type: ignore[override,misc]
+        self.update(ticket_data)
+        return self
+
+    def setdefault(self, name: str, tickets: Optional[List[Ticket]] = None) -> List[Ticket]:
+        if name not in self:
+            self[name] = [] if tickets is None else tickets
+        return self[name]
+
+    def pop(self, name: str, *default: Any) -> Any:
+        tickets = super().pop(name, *default)
+        self._rebuild_index()
+        return tickets
+
+    def popitem(self) -> Tuple[str, List[Ticket]]:
+        item = super().popitem()
+        self._rebuild_index()
+        return item
+
+    def clear(self) -> None:
+        super().clear()
+        self._rebuild_index()
+
+    def add_ticket(self, name: str, ticket: Ticket) -> None:
+        """Adds a single ticket for a player, creating the player entry if required"""
+        if name not in self:
+            self[name] = []
+        super().__getitem__(name).append(ticket)
+        self._index_ticket(ticket)
+
+    def tickets_with(self, number: Number) -> List[Ticket]:
+        """Returns the tickets that contain the number"""
+        if 0 < number < len(self._index):
+            return self._index[number]
+        return []
+
+    def mark_number(self, number: Number) -> None:
+        """Marks the number on every ticket that contains it"""
+        for ticket in self.tickets_with(number):
+            ticket.mark_number(number)
+
+    def mark_numbers(self, numbers: Iterable[Number]) -> None:
+        """Marks each of the numbers on every ticket that contains it"""
+        for number in numbers:
+            self.mark_number(number)
+
+    def _index_ticket(self, ticket: Ticket) -> None:
+        """Adds the ticket against each of its numbers in the index"""
+        for number in ticket.numbers:
+            if 0 < number < len(self._index):
+                self._index[number].append(ticket)
+
+    def _rebuild_index(self) -> None:
+        """Rebuilds the entire index from scratch. Only required when a player is removed"""
+        for tickets in self._index:
+            tickets.clear()
+        for tickets in self.values():
+            for ticket in tickets:
+                self._index_ticket(ticket)
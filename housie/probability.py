@@ -0,0 +1,118 @@
+"""Odds of completing a prize, and of being the first to, as the game progresses.
+
+With `remaining` numbers yet to be called out, in a random order, a ticket needing `unmarked` more of them completes
+the prize within the next k calls if all of its unmarked numbers are among those k. This is hypergeometric:
+
+    P(complete within k calls) = C(k, unmarked) / C(remaining, unmarked)
+
+The curve of this over every k only depends on the two counts, so it is worked out once per pair and cached. As the
+game goes on, each call moves a ticket to a curve for one fewer remaining (and one fewer unmarked if it held the number).
+
+The odds of being first follow from the curves of all the tickets in play. Tickets with the same count of unmarked
+numbers share a curve, so these only need the count of tickets for each count of unmarked numbers (which a Leaderboard
+keeps up to date), however many tickets there are. The completion times of different tickets are treated as
+independent. They aren't quite, as tickets share numbers, so the odds of being first are estimates.
+"""
+
+__author__ = 'Aaron Alphonso'
+__email__ = 'alphonsoaaron1993@gmail.com'
+
+from functools import lru_cache
+from typing import Dict, Mapping, NamedTuple, Sequence, Tuple
+
+from housie.claims import EARLY_FIVE_COUNT, Prize, prize_numbers
+from housie.models import Board, TicketData
+
+WinOdds = NamedTuple('WinOdds', [('first', float), ('alone', float), ('tie', float)])
+WinOdds.__doc__ = """The odds of a ticket being the first to complete a prize: first includes tying with others for it,
+alone is being the only one to complete it on that call, and tie is the odds of sharing it"""
+
+# Odds of completing a prize are shown over this many calls by default
+DEFAULT_ODDS_HORIZON = 10
+
+
+@lru_cache(maxsize=None)
+def completion_curve(unmarked: int, remaining: int) -> Tuple[float, ...]:
+    """Returns the odds of a ticket needing `unmarked` more numbers completing the prize within k more calls, for each
+    k from 0 to `remaining`. Each value is worked out from the one before, as C(k, u) / C(k - 1, u) = k / (k - u)"""
+    if unmarked > remaining:
+        return (0.0,) * (remaining + 1)
+    curve = [0.0] * unmarked
+    # C(remaining, unmarked), built up term by term to keep to floats of a sensible size
+    combinations = 1.0
+    for term in range(unmarked):
+        combinations = combinations * (remaining - term) / (term + 1)
+    odds = 1.0 / combinations
+    curve.append(odds)
+    for calls in range(unmarked + 1, remaining + 1):
+        odds = odds * calls / (calls - unmarked)
+        curve.append(odds)
+    return tuple(curve)
+
+
+def completion_probability(unmarked: int, remaining: int, calls: int) -> float:
+    """Returns the odds of a ticket needing `unmarked` more numbers completing the prize within the next `calls`"""
+    curve = completion_curve(unmarked, remaining)
+    return curve[max(0, min(calls, remaining))]
+
+
+def expected_calls(unmarked: int, remaining: int) -> float:
+    """Returns the number of calls a ticket needing `unmarked` more numbers is expected to take to complete the prize.
+    This is the expected position of the last of `unmarked` numbers among `remaining` in a random order"""
+    return unmarked * (remaining + 1) / (unmarked + 1)
+
+
+def first_winner_odds(unmarked_counts: Mapping[int, int], remaining: int) -> Dict[int, WinOdds]:
+    """Returns the odds of a single ticket being the first to complete a prize, for each count of unmarked numbers.
+
+    unmarked_counts gives the number of tickets in play needing each count of unmarked numbers (including the ticket
+    itself). Tickets which have already completed the prize (0 unmarked) have won it, which leaves no odds for others.
+    """
+    counts = {unmarked: count for unmarked, count in unmarked_counts.items() if count > 0}
+    if counts.get(0):
+        alone = 1.0 if counts[0] == 1 else 0.0
+        return {unmarked: WinOdds(1.0, alone, 1.0 - alone) if unmarked == 0 else WinOdds(0.0, 0.0, 0.0)
+                for unmarked in counts}
+
+    survival = {unmarked: [1.0 - odds for odds in completion_curve(unmarked, remaining)] for unmarked in counts}
+    # Odds that none of the tickets have completed the prize within each number of calls. The odds for the other
+    # tickets than one are this divided by its own survival, which saves multiplying the curves out for every count
+    none_left = [1.0] * (remaining + 1)
+    for unmarked, count in counts.items():
+        none_left = [left * still ** count for left, still in zip(none_left, survival[unmarked])]
+    odds: Dict[int, WinOdds] = {}
+    for unmarked in counts:
+        curve, own_survival = completion_curve(unmarked, remaining), survival[unmarked]
+        first = alone = 0.0
+        for calls in range(1, remaining + 1):
+            completes_now = curve[calls] - curve[calls - 1]
+            if completes_now:
+                first += completes_now * none_left[calls - 1] / own_survival[calls - 1]
+                alone += completes_now * _others_left(counts, survival, unmarked, calls, none_left)
+        odds[unmarked] = WinOdds(first, alone, first - alone)
+    return odds
+
+
+def _others_left(counts: Mapping[int, int], survival: Mapping[int, Sequence[float]], unmarked: int, calls: int,
+                 none_left: Sequence[float]) -> float:
+    """Returns the odds that none of the tickets, other than one needing `unmarked` numbers, have completed the prize
+    within the number of calls. Once the ticket is certain to have completed it, this has to be multiplied out"""
+    if survival[unmarked][calls]:
+        return none_left[calls] / survival[unmarked][calls]
+    others_left = 1.0
+    for other, count in counts.items():
+        others_left *= survival[other][calls] ** (count - 1 if other == unmarked else count)
+    return others_left
+
+
+def unmarked_counts(ticket_data: TicketData, board: Board, prize: Prize) -> Dict[int, int]:
+    """Returns the number of tickets needing each count of unmarked numbers to complete the prize, by going through
+    every ticket. Use Leaderboard.counts instead when there is a leaderboard at hand"""
+    if prize == Prize.EARLY_FIVE:
+        raise ValueError('Early Five is won by any {} numbers, which these odds do not cover'.format(EARLY_FIVE_COUNT))
+    counts: Dict[int, int] = {}
+    for tickets in ticket_data.values():
+        for ticket in tickets:
+            unmarked = sum(1 for number in prize_numbers(ticket.rows, prize) if not board.is_selected(number))
+            counts[unmarked] = counts.get(unmarked, 0) + 1
+    return counts
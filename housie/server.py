@@ -0,0 +1,346 @@
+"""Asyncio server hosting many games (rooms) at once over a simple line-based TCP protocol.
+
+Each room has its own Board, and the tickets of its players are marked on the server by a ClaimEngine, so winners are
+announced to everyone the moment the number completing a prize is called.
+
+Commands, sent by the clients one per line:
+
+    HOST <room>                     Host a room (created if it doesn't exist). Only the host can call numbers
+    JOIN <room> <name>              Join a room as a player (created if it doesn't exist)
+    TICKET <row>/<row>/<row>        Register a ticket for the player, with the numbers of each row comma separated,
+                                    e.g. TICKET 11,24,48,54,82/14,32,56,69,86/2,26,36,59,73. Tickets which
+                                    break the rules of a ticket are refused
+    CALL [<number>]                 Call out the given number, or the next one at random
+    STATUS                          Ask how many numbers each of the player's tickets needs for each prize
+    QUIT                            Leave the room and disconnect
+
+Messages sent by the server:
+
+    HOSTING <room>
+    JOINED <room> <numbers called so far, comma separated, or - if none>
+    TICKET <index of the ticket for the player>
+    NUMBER <call index> <number>                              Broadcast to the whole room
+    WINNER <prize> <name> <ticket index> <call index>        Broadcast to the whole room, prize as in Prize.name
+    STATUS <ticket index> <numbers left for each prize, in the order of PRIZES>
+    ERROR <message>
+    BYE
+
+Messages to a client are queued and written by a task of its own, so a broadcast never waits on the network.
+The queue of each client is bounded: a client that falls more than `max_pending` messages behind is disconnected
+rather than letting its backlog grow without limit.
+"""
+
+__author__ = 'Aaron Alphonso'
+__email__ = 'alphonsoaaron1993@gmail.com'
+
+import asyncio
+from typing import Dict, List, Optional, Set
+
+from housie.claims import PRIZES, ClaimEngine, WinnerEvent
+from housie.constants import NUMBER_POOL, NUMBERS_PER_ROW, TICKET_ROWS, Number, Row
+from housie.models import Board, Ticket
+from housie.validate import is_valid_ticket
+
+DEFAULT_SERVER_HOST = '127.0.0.1'
+DEFAULT_SERVER_PORT = 7531
+
+# Number of messages that can be waiting to be sent to a client before it is considered too slow and disconnected
+DEFAULT_MAX_PENDING = 256
+
+NO_NUMBERS = '-'
+
+
+class Client:
+    """A connected client, and the queue of the messages waiting to be sent to it"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, max_pending: int) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.queue: 'asyncio.Queue[Optional[bytes]]' = asyncio.Queue(maxsize=max_pending)
+        self.room: Optional['Room'] = None
+        self.name: Optional[str] = None
+        # The ids in the ClaimEngine of the room of the tickets registered by this client
+        self.ticket_ids: List[int] = []
+        self.closed = False
+
+    def send(self, message: bytes) -> bool:
+        """Queues a message for the client. Returns False if the client is too far behind to take it"""
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    def send_line(self, line: str) -> bool:
+        """Queues a line of text for the client"""
+        return self.send((line + '\n').encode())
+
+    def close(self) -> None:
+        """Stops the client. The messages still queued are dropped"""
+        if not self.closed:
+            self.closed = True
+            self.writer.close()
+
+    async def write_loop(self) -> None:
+        """Writes the queued messages out, batching up whatever has queued up while waiting on the network.
+        A None queued stops the loop once the messages before it are written"""
+        finished = False
+        while not finished and not self.closed:
+            batch = [await self.queue.get()]
+            while not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            finished = None in batch
+            self.writer.write(b''.join(message for message in batch if message is not None))
+            try:
+                await self.writer.drain()
+            except ConnectionError:
+                break
+        self.close()
+
+
+class Room:
+    """A game being played: its board, the tickets in play and the clients following it"""
+
+    def __init__(self, name: str, seed: Optional[int] = None) -> None:
+        self.name = name
+        self.board = Board(seed=seed)
+        self.engine = ClaimEngine({})
+        self.clients: Set[Client] = set()
+        self.host: Optional[Client] = None
+        # The number of tickets registered by each player, by name
+        self.ticket_counts: Dict[str, int] = {}
+        self.board.add_listener(self._number_called)
+        self.engine.attach(self.board)
+        self.engine.add_listener(self._prize_won)
+
+    def players(self) -> Set[str]:
+        """Returns the names of the players in the room"""
+        return {client.name for client in self.clients if client.name is not None}
+
+    def broadcast(self, line: str) -> None:
+        """Sends a line to every client in the room. The clients which can't keep up are disconnected"""
+        message = (line + '\n').encode()
+        for client in self.clients:
+            if not client.send(message):
+                # Its handler takes it out of the room once the connection is closed
+                client.close()
+
+    def leave(self, client: Client) -> None:
+        """Removes a client from the room"""
+        self.clients.discard(client)
+        if self.host is client:
+            self.host = None
+        client.room = None
+
+    def _number_called(self, number: Number) -> None:
+        self.broadcast('NUMBER {} {}'.format(len(self.board.selected), number))
+
+    def _prize_won(self, event: WinnerEvent) -> None:
+        self.broadcast('WINNER {} {} {} {}'.format(event.prize.name, event.name, event.ticket_index,
+                                                   event.call_index))
+
+
+class HousieServer:
+    """Hosts the rooms and handles the clients connected to them"""
+
+    def __init__(self, max_pending: int = DEFAULT_MAX_PENDING) -> None:
+        self.max_pending = max_pending
+        self.rooms: Dict[str, Room] = {}
+        self.clients: Set[Client] = set()
+        self.server: Optional[asyncio.AbstractServer] = None
+        # The tasks serving the connected clients, so that stopping can wait for them to finish
+        self._handlers: Set['asyncio.Future[None]'] = set()
+
+    async def start(self, host: str = DEFAULT_SERVER_HOST, port: int = DEFAULT_SERVER_PORT) -> int:
+        """Starts listening for clients. Returns the port listened on, which is useful when passing port 0"""
+        self.server = await asyncio.start_server(self._accept, host, port)
+        return int(self.server.sockets[0].getsockname()[1])
+
+    async def stop(self) -> None:
+        """Stops listening and disconnects every client"""
+        if self.server is not None:
+            self.server.close()
+        for client in list(self.clients):
+            client.close()
+        if self._handlers:
+            await asyncio.wait(list(self._handlers))
+        if self.server is not None:
+            await self.server.wait_closed()
+
+    def _accept(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        handler = asyncio.ensure_future(self.handle_client(reader, writer))
+        self._handlers.add(handler)
+        handler.add_done_callback(self._handlers.discard)
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serves a client until it quits, disconnects or is dropped"""
+        client = Client(reader, writer, self.max_pending)
+        self.clients.add(client)
+        write_task = asyncio.ensure_future(client.write_loop())
+        try:
+            while not client.closed:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not self.handle_line(client, line.decode(errors='replace').strip()):
+                    break
+        except (ConnectionError, ValueError):
+            # ValueError is raised by readline for lines over the limit of the stream
+            pass
+        finally:
+            self._disconnect(client)
+            try:
+                # Lets the messages still queued, such as the reply to QUIT, be written before closing
+                client.queue.put_nowait(None)
+            except asyncio.QueueFull:
+                client.close()
+            if client.closed:
+                write_task.cancel()
+            await asyncio.wait([write_task])
+
+    def handle_line(self, client: Client, line: str) -> bool:
+        """Runs a command sent by the client. Returns False if the client should be disconnected"""
+        command, _, argument = line.partition(' ')
+        command = command.upper()
+        argument = argument.strip()
+        if command == 'QUIT':
+            client.send_line('BYE')
+            return False
+        if command == 'HOST':
+            self._host(client, argument)
+        elif command == 'JOIN':
+            self._join(client, argument)
+        elif command == 'TICKET':
+            self._ticket(client, argument)
+        elif command == 'CALL':
+            self._call(client, argument)
+        elif command == 'STATUS':
+            self._status(client)
+        elif command:
+            client.send_line('ERROR unknown command {}'.format(command))
+        return not client.closed
+
+    def _host(self, client: Client, room_name: str) -> None:
+        if not room_name or ' ' in room_name:
+            client.send_line('ERROR usage: HOST <room>')
+            return
+        room = self._enter(client, room_name)
+        if room.host is not None and room.host is not client:
+            self._leave(client)
+            client.send_line('ERROR room {} already has a host'.format(room_name))
+            return
+        room.host = client
+        client.send_line('HOSTING {}'.format(room_name))
+
+    def _join(self, client: Client, argument: str) -> None:
+        room_name, _, name = argument.partition(' ')
+        name = name.strip()
+        if not room_name or not name or ' ' in name:
+            client.send_line('ERROR usage: JOIN <room> <name>')
+            return
+        if room_name in self.rooms and name in self.rooms[room_name].players():
+            client.send_line('ERROR name {} is already taken in room {}'.format(name, room_name))
+            return
+        room = self._enter(client, room_name)
+        client.name = name
+        client.ticket_ids = []
+        called = ','.join(map(str, room.board.selected)) or NO_NUMBERS
+        client.send_line('JOINED {} {}'.format(room_name, called))
+
+    def _ticket(self, client: Client, argument: str) -> None:
+        room = client.room
+        if room is None or client.name is None:
+            client.send_line('ERROR join a room first')
+            return
+        if room.board.selected:
+            client.send_line('ERROR the game in room {} has already started'.format(room.name))
+            return
+        rows = parse_ticket(argument)
+        if rows is None:
+            client.send_line('ERROR tickets must have {} rows of {} distinct numbers from 1 to {}, each in its column '
+                             'in ascending order'.format(TICKET_ROWS, NUMBERS_PER_ROW, len(NUMBER_POOL)))
+            return
+        ticket_index = room.ticket_counts.get(client.name, 0)
+        room.ticket_counts[client.name] = ticket_index + 1
+        client.ticket_ids.append(room.engine.add_ticket(client.name, ticket_index, Ticket(rows)))
+        client.send_line('TICKET {}'.format(ticket_index))
+
+    def _call(self, client: Client, argument: str) -> None:
+        room = client.room
+        if room is None or room.host is not client:
+            client.send_line('ERROR only the host of a room can call numbers')
+            return
+        if not argument:
+            if room.board.pick_next() is None:
+                client.send_line('ERROR every number has been called')
+            return
+        if not argument.isdigit() or not 0 < int(argument) <= len(NUMBER_POOL):
+            client.send_line('ERROR numbers must be from 1 to {}'.format(len(NUMBER_POOL)))
+        elif room.board.is_selected(int(argument)):
+            client.send_line('ERROR {} has already been called'.format(argument))
+        else:
+            room.board.pick_manual(int(argument))
+
+    def _status(self, client: Client) -> None:
+        room = client.room
+        if room is None or client.name is None:
+            client.send_line('ERROR join a room first')
+            return
+        for ticket_id in client.ticket_ids:
+            _, ticket_index, _ = room.engine.tickets[ticket_id]
+            left = [str(room.engine.numbers_left(ticket_id, prize)) for prize in PRIZES]
+            client.send_line('STATUS {} {}'.format(ticket_index, ' '.join(left)))
+
+    def _enter(self, client: Client, room_name: str) -> Room:
+        """Moves the client into a room, creating the room if needed"""
+        if client.room is not None and client.room.name != room_name:
+            self._leave(client)
+        room = self.rooms.get(room_name)
+        if room is None:
+            room = self.rooms[room_name] = Room(room_name)
+        room.clients.add(client)
+        client.room = room
+        return room
+
+    def _leave(self, client: Client) -> None:
+        """Takes the client out of its room. Rooms are closed once everyone has left"""
+        room = client.room
+        if room is not None:
+            room.leave(client)
+            client.name = None
+            client.ticket_ids = []
+            if not room.clients:
+                del self.rooms[room.name]
+
+    def _disconnect(self, client: Client) -> None:
+        self._leave(client)
+        self.clients.discard(client)
+
+
+def parse_ticket(text: str) -> Optional[List[Row]]:
+    """Parses the rows of a ticket as sent in a TICKET command. Returns None if they don't make a valid ticket, as a
+    ticket with fewer numbers than it should have would win the prizes far too early"""
+    try:
+        rows = [[int(number) for number in row.split(',')] for row in text.split('/')]
+    except ValueError:
+        return None
+    return rows if is_valid_ticket(rows) else None
+
+
+def serve(host: str = DEFAULT_SERVER_HOST, port: int = DEFAULT_SERVER_PORT,
+          max_pending: int = DEFAULT_MAX_PENDING) -> None:
+    """Runs the server until interrupted"""
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    server = HousieServer(max_pending)
+    port = loop.run_until_complete(server.start(host, port))
+    print('Serving Housie games on {}:{}. Press Ctrl+C to stop'.format(host, port))
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loop.run_until_complete(server.stop())
+        loop.close()
@@ -0,0 +1,196 @@
+"""Monte Carlo simulation of whole games over a set of tickets, for statistics on when each prize is won.
+
+Rather than marking tickets one number at a time, each game is worked out on all the tickets at once using bitwise
+operations on Python's arbitrary size integers, with one bit per ticket:
+
+* For every prize and every number, a mask of the tickets on which that number takes part in the prize is built once.
+* For a game, the tickets which still haven't completed a prize after k calls are those holding a prize number that
+  is called after the k-th call, i.e. the OR of the masks of those numbers. These are built from the last call
+  backwards, so the first call at which a prize is won, and how many tickets share it, fall out of a single pass.
+* Early Five needs any 5 numbers rather than all of them, so it instead keeps a count per ticket as bit-sliced
+  counters (one integer per bit of the count), updated with a handful of bitwise operations per call.
+
+Each game costs a few hundred bitwise operations on integers of as many bits as there are tickets, regardless of the
+number of tickets in play.
+"""
+
+__author__ = 'Aaron Alphonso'
+__email__ = 'alphonsoaaron1993@gmail.com'
+
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from random import Random
+from typing import Counter as CounterType, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from housie.claims import EARLY_FIVE_COUNT, PRIZES, Prize, prize_numbers
+from housie.constants import NUMBER_POOL, Row
+from housie.generate_book import derive_seed
+from housie.models import Ticket
+from housie.utils import popcount
+
+# Number of games simulated from each sub-seed. Like generate_book, the games are always split into chunks of this
+# size, so the results for a seed are the same whatever the number of workers
+SIMULATION_CHUNK_SIZE = 1000
+
+# The rows of each ticket in play, which is what gets sent to the worker processes
+TicketRows = List[List[Row]]
+
+
+class SimulationReport:
+    """Distributions collected over many simulated games.
+
+    first_win_calls[prize] counts, for each number of calls, the games in which the prize was first won on that call.
+    winner_counts[prize] counts, for each number of tickets, the games in which that many tickets won the prize on the
+    same call.
+    """
+
+    def __init__(self) -> None:
+        self.games = 0
+        self.first_win_calls: Dict[Prize, CounterType[int]] = {prize: Counter() for prize in PRIZES}
+        self.winner_counts: Dict[Prize, CounterType[int]] = {prize: Counter() for prize in PRIZES}
+
+    def add(self, prize: Prize, call: int, winners: int) -> None:
+        """Records that the prize was first won on the call, by that many tickets at once"""
+        self.first_win_calls[prize][call] += 1
+        self.winner_counts[prize][winners] += 1
+
+    def merge(self, other: 'SimulationReport') -> None:
+        """Adds the games of another report into this one"""
+        self.games += other.games
+        for prize in PRIZES:
+            self.first_win_calls[prize].update(other.first_win_calls[prize])
+            self.winner_counts[prize].update(other.winner_counts[prize])
+
+    def mean_calls(self, prize: Prize) -> float:
+        """Returns the average number of calls before the prize is first won"""
+        calls = self.first_win_calls[prize]
+        total = sum(calls.values())
+        return sum(call * count for call, count in calls.items()) / total if total else 0.0
+
+    def percentile_calls(self, prize: Prize, percent: float) -> int:
+        """Returns the number of calls by which the prize had been won in `percent` percent of the games"""
+        calls = self.first_win_calls[prize]
+        target = sum(calls.values()) * percent / 100
+        seen = 0
+        for call in sorted(calls):
+            seen += calls[call]
+            if seen >= target:
+                return call
+        return 0
+
+    def mean_winners(self, prize: Prize) -> float:
+        """Returns the average number of tickets which share the prize"""
+        winners = self.winner_counts[prize]
+        total = sum(winners.values())
+        return sum(count * games for count, games in winners.items()) / total if total else 0.0
+
+    def summary(self) -> str:
+        """Returns a table of the key statistics of each prize"""
+        header = '{:<14}{:>12}{:>8}{:>8}{:>8}{:>16}'.format('Prize', 'Mean calls', 'p10', 'p50', 'p90', 'Mean winners')
+        lines = ['Simulated {} games'.format(self.games), header]
+        for prize in PRIZES:
+            lines.append('{:<14}{:>12.1f}{:>8}{:>8}{:>8}{:>16.2f}'.format(
+                prize.value, self.mean_calls(prize), self.percentile_calls(prize, 10),
+                self.percentile_calls(prize, 50), self.percentile_calls(prize, 90), self.mean_winners(prize)))
+        return '\n'.join(lines)
+
+
+def simulate_games(tickets: Iterable[Ticket], games: int, seed: Optional[int] = None, workers: Optional[int] = 1,
+                   chunk_size: int = SIMULATION_CHUNK_SIZE) -> SimulationReport:
+    """Simulates `games` full games over the tickets, and returns the distributions of when each prize was won.
+
+    The games are split into chunks of `chunk_size`, each simulated from its own sub-seed derived from the seed, and
+    spread over a pool of `workers` processes (None uses every core, 1 runs in this process).
+    """
+    if seed is None:
+        seed = Random().getrandbits(64)
+    ticket_rows = [[list(row) for row in ticket.rows] for ticket in tickets]
+    specs = [(ticket_rows, derive_seed(seed, chunk_index), min(chunk_size, games - start))
+             for chunk_index, start in enumerate(range(0, games, chunk_size))]
+    report = SimulationReport()
+    if workers == 1 or len(specs) <= 1:
+        for chunk_report in map(_simulate_chunk, specs):
+            report.merge(chunk_report)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for chunk_report in executor.map(_simulate_chunk, specs):
+                report.merge(chunk_report)
+    return report
+
+
+def simulate_game(order: Sequence[int], prize_masks: Dict[Prize, List[int]], report: SimulationReport) -> None:
+    """Works out when each prize is first won for a game with the numbers called in the given order, and adds it to
+    the report. prize_masks are as returned by build_prize_masks"""
+    report.games += 1
+    for prize, masks in prize_masks.items():
+        result = _early_five(order, masks) if prize == Prize.EARLY_FIVE else _first_completion(order, masks)
+        if result:
+            report.add(prize, *result)
+
+
+def build_prize_masks(ticket_rows: TicketRows) -> Dict[Prize, List[int]]:
+    """Returns, for each prize and each number, the mask of the tickets on which the number takes part in the prize.
+    Bit i of a mask stands for ticket i. The mask at position 0 of each list is that of all the tickets with the prize
+    """
+    prize_masks = {}
+    for prize in PRIZES:
+        masks = [0] * (len(NUMBER_POOL) + 1)
+        for ticket_index, rows in enumerate(ticket_rows):
+            ticket_bit = 1 << ticket_index
+            numbers = prize_numbers(rows, prize)
+            if len(numbers) >= (EARLY_FIVE_COUNT if prize == Prize.EARLY_FIVE else 1):
+                masks[0] |= ticket_bit
+            for number in numbers:
+                if 0 < number < len(masks):
+                    masks[number] |= ticket_bit
+        prize_masks[prize] = masks
+    return prize_masks
+
+
+def _first_completion(order: Sequence[int], masks: List[int]) -> Optional[Tuple[int, int]]:
+    """Returns the call on which the first ticket(s) had all their prize numbers called, and how many tickets did"""
+    all_tickets = masks[0]
+    # incomplete[k] is the mask of the tickets still missing a number after k calls
+    incomplete = [0] * (len(order) + 1)
+    pending = 0
+    for call in range(len(order) - 1, -1, -1):
+        pending |= masks[order[call]]
+        incomplete[call] = pending & all_tickets
+    for call in range(1, len(order) + 1):
+        if incomplete[call] != all_tickets:
+            return call, popcount(all_tickets & ~incomplete[call])
+    return None
+
+
+def _early_five(order: Sequence[int], masks: List[int]) -> Optional[Tuple[int, int]]:
+    """Returns the call on which the first ticket(s) had 5 numbers called, and how many tickets did.
+
+    The count of called numbers on each ticket is kept in bit-sliced counters: bit i of count_1, count_2 and
+    count_4 are the bits of the count of ticket i, with count_4 sticking once set. A ticket reaches 5 when count_4
+    and count_1 are both set, and as the counts go up by at most 1 per call, the first call that happens on is seen.
+    """
+    count_1 = count_2 = count_4 = 0
+    for call, number in enumerate(order, start=1):
+        mask = masks[number]
+        carry = count_1 & mask
+        count_1 ^= mask
+        carry_2 = count_2 & carry
+        count_2 ^= carry
+        count_4 |= carry_2
+        reached = count_4 & count_1 & masks[0]
+        if reached:
+            return call, popcount(reached)
+    return None
+
+
+def _simulate_chunk(spec: Tuple[TicketRows, int, int]) -> SimulationReport:
+    """Simulates a chunk of games. Runs in the worker processes"""
+    ticket_rows, sub_seed, games = spec
+    prize_masks = build_prize_masks(ticket_rows)
+    rng = Random(sub_seed)
+    report = SimulationReport()
+    order = NUMBER_POOL.copy()
+    for _ in range(games):
+        rng.shuffle(order)
+        simulate_game(order, prize_masks, report)
+    return report
@@ -0,0 +1,5 @@
+from .jsonl import write_tickets_jsonl, iter_records_jsonl, iter_tickets_jsonl, is_jsonl_file
+from .binary import write_ticket_book, CorruptTicketBookError, TicketBook, is_binary_book_file
+from .call_log import CallLog
+from .ticket_index import TicketIndex
+from .sqlite_store import DEFAULT_GAME_NAME, GameCallLog, GameInfo, SessionStore
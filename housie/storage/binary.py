@@ -0,0 +1,224 @@
+"""Compact binary ticket books, read through mmap for constant time access to any ticket.
+
+Layout of a ticket book file (all integers little-endian):
+
+    Header      magic (4 bytes) | version (u16) | record size (u16) | ticket count (u32) | player count (u32) |
+                offset of the player table (u64)
+    Records     one fixed size record per ticket: its 15 numbers, row after row
+    Players     for each player: index of its first ticket (u32) | ticket count (u32) | name length (u16) | name (utf-8)
+
+The tickets of each player are stored next to each other, so the player table only needs the range of each player.
+"""
+
+__author__ = 'Aaron Alphonso'
+__email__ = 'alphonsoaaron1993@gmail.com'
+
+import mmap
+import os
+import struct
+from bisect import bisect_right
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NoReturn, Sequence, Set, Tuple, Union, overload
+
+from housie.constants import NUMBERS_PER_ROW, NUMBERS_PER_TICKET, TICKET_ROWS, Row, TicketRepresentation
+from housie.models import Ticket
+from housie.utils import numbers_to_mask
+
+BINARY_EXTENSION = '.hbook'
+MAGIC = b'HBK1'
+VERSION = 1
+RECORD_SIZE = NUMBERS_PER_TICKET
+HEADER = struct.Struct('<4sHHIIQ')
+PLAYER_ENTRY = struct.Struct('<IIH')
+
+
+class CorruptTicketBookError(ValueError):
+    """Raised when opening a file which isn't a ticket book this version of housie can read, e.g. one which is empty,
+    cut short or of a newer version"""
+
+    def __init__(self, filename: str) -> None:
+        super().__init__("'{}' is not a ticket book this version of housie can read, or it is corrupt".format(filename))
+        self.filename = filename
+
+
+def is_binary_book_file(filename: str) -> bool:
+    """Returns whether the file should be treated as a binary ticket book, based on its extension"""
+    return filename.endswith(BINARY_EXTENSION)
+
+
+def write_ticket_book(records: Iterable[Tuple[str, TicketRepresentation]], filename: str) -> int:
+    """Writes each (name, ticket rows) record to a binary ticket book as it is produced. Returns the number of tickets.
+
+    The records can be a generator. All the tickets of a player must come one after the other, and every ticket must
+    have 3 rows of 5 numbers. A ValueError is raised otherwise.
+    """
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    players: List[Tuple[str, int, int]] = []
+    # Names of the players written so far, to check that each player's tickets come one after the other
+    names: Set[str] = set()
+    count = 0
+    with open(filename, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, RECORD_SIZE, 0, 0, 0))
+        for name, rows in records:
+            if not players or players[-1][0] != name:
+                if name in names:
+                    raise ValueError("The tickets of player '{}' are not next to each other".format(name))
+                names.add(name)
+                players.append((name, count, 0))
+            if [len(row) for row in rows] != [NUMBERS_PER_ROW] * TICKET_ROWS:
+                raise ValueError("Ticket {} of player '{}' does not have {} rows of {} numbers".format(
+                    players[-1][2] + 1, name, TICKET_ROWS, NUMBERS_PER_ROW))
+            file.write(bytes(number for row in rows for number in row))
+            players[-1] = (name, players[-1][1], players[-1][2] + 1)
+            count += 1
+
+        players_offset = file.tell()
+        for name, first_ticket, ticket_count in players:
+            encoded_name = name.encode('utf-8')
+            file.write(PLAYER_ENTRY.pack(first_ticket, ticket_count, len(encoded_name)) + encoded_name)
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, VERSION, RECORD_SIZE, count, len(players), players_offset))
+    return count
+
+
+class TicketBook(Dict[str, Sequence[Ticket]]):  # pylint: disable=too-many-instance-attributes
+    """A read-only view of a binary ticket book, usable wherever a dict of name : tickets is.
+
+    Opening a book only reads the header and the player table, the tickets themselves are read from the memory
+    mapped file as and when they are needed. Any ticket can be fetched in constant time by its index in the book,
+    and the raw numbers or mask of a ticket can be read without creating a Ticket at all (e.g. to verify a claim).
+
+    Tickets are created once and cached, so numbers marked on them are kept for as long as the book is open.
+    """
+
+    def __init__(self, filename: str, ticket_class: Callable[[List[Row]], Ticket] = Ticket) -> None:
+        super().__init__()
+        self.filename = filename
+        self.ticket_class = ticket_class
+        self._file = open(filename, 'rb')  # pylint: disable=consider-using-with
+        self._tickets: Dict[int, Ticket] = {}
+        # Index of the first ticket of each player, and the names in the same order, for finding the owner of a ticket
+        self._first_tickets: List[int] = []
+        self._names: List[str] = []
+        try:
+            # mmap refuses an empty file with a ValueError, and the header or player table of a file which was cut
+            # short can't be unpacked
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._read_players()
+        except (ValueError, struct.error) as error:
+            self.close()
+            raise CorruptTicketBookError(filename) from error
+        except Exception:
+            self.close()
+            raise
+
+    def _read_players(self) -> None:
+        """Checks the header of the book and reads its player table. Raises a ValueError if either doesn't add up"""
+        magic, version, record_size, ticket_count, player_count, players_offset = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION or record_size != RECORD_SIZE \
+                or players_offset != HEADER.size + ticket_count * RECORD_SIZE or players_offset > len(self._map):
+            raise ValueError('Bad header')
+        self.ticket_count: int = ticket_count
+        offset = players_offset
+        for _ in range(player_count):
+            first_ticket, player_ticket_count, name_length = PLAYER_ENTRY.unpack_from(self._map, offset)
+            offset += PLAYER_ENTRY.size
+            name = bytes(self._map[offset: offset + name_length]).decode('utf-8')
+            offset += name_length
+            if first_ticket + player_ticket_count > ticket_count or len(name.encode('utf-8')) != name_length:
+                raise ValueError('Bad player table')
+            self._first_tickets.append(first_ticket)
+            self._names.append(name)
+            super().__setitem__(name, BookTickets(self, first_ticket, player_ticket_count))
+
+    def numbers(self, index: int) -> bytes:
+        """Returns the 15 numbers of the ticket at the index, row after row"""
+        if not 0 <= index < self.ticket_count:
+            raise IndexError('Ticket index {} out of range'.format(index))
+        start = HEADER.size + index * RECORD_SIZE
+        return bytes(self._map[start: start + RECORD_SIZE])
+
+    def mask(self, index: int) -> int:
+        """Returns the 90-bit mask of the numbers of the ticket at the index"""
+        return numbers_to_mask(self.numbers(index))
+
+    def rows(self, index: int) -> TicketRepresentation:
+        """Returns the rows of numbers of the ticket at the index of the book, without creating a Ticket"""
+        numbers = self.numbers(index)
+        return [list(numbers[row * NUMBERS_PER_ROW: (row + 1) * NUMBERS_PER_ROW]) for row in range(TICKET_ROWS)]
+
+    def records(self) -> Iterator[Tuple[str, TicketRepresentation]]:
+        """Yields a (name, ticket rows) record for every ticket of the book, in order"""
+        for name, first_ticket in zip(self._names, self._first_tickets):
+            for index in range(first_ticket, first_ticket + len(self[name])):
+                yield name, self.rows(index)
+
+    def ticket(self, index: int) -> Ticket:
+        """Returns the Ticket at the index of the book"""
+        if index not in self._tickets:
+            self._tickets[index] = self.ticket_class(self.rows(index))
+        return self._tickets[index]
+
+    def player_of(self, index: int) -> str:
+        """Returns the name of the player that the ticket at the index belongs to"""
+        if not 0 <= index < self.ticket_count:
+            raise IndexError('Ticket index {} out of range'.format(index))
+        return self._names[bisect_right(self._first_tickets, index) - 1]
+
+    def close(self) -> None:
+        """Closes the underlying file"""
+        if hasattr(self, '_map'):
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> 'TicketBook':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def __setitem__(self, name: str, tickets: Sequence[Ticket]) -> None:
+        raise TypeError('A ticket book is read-only')
+
+    def __delitem__(self, name: str) -> None:
+        raise TypeError('A ticket book is read-only')
+
+    def _read_only(self, *args: Any, **kwargs: Any) -> NoReturn:
+        raise TypeError('A ticket book is read-only')
+
+    # The other methods of a dict which change it don't go through __setitem__ or __delitem__
+    clear = pop = popitem = setdefault = update = __ior__ = _read_only
+
+
+class BookTickets(Sequence[Ticket]):
+    """The tickets of a single player in a TicketBook, read from the book as they are accessed"""
+
+    def __init__(self, book: TicketBook, first_ticket: int, ticket_count: int) -> None:
+        self.book = book
+        self.first_ticket = first_ticket
+        self.ticket_count = ticket_count
+
+    @overload
+    def __getitem__(self, index: int) -> Ticket:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[Ticket]:
+        ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Ticket, List[Ticket]]:
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(self.ticket_count))]
+        if index < 0:
+            index += self.ticket_count
+        if not 0 <= index < self.ticket_count:
+            raise IndexError('Ticket index {} out of range'.format(index))
+        return self.book.ticket(self.first_ticket + index)
+
+    def __len__(self) -> int:
+        return self.ticket_count
+
+    def __iter__(self) -> Iterator[Ticket]:
+        for index in range(self.ticket_count):
+            yield self.book.ticket(self.first_ticket + index)
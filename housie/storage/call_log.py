@@ -0,0 +1,127 @@
+"""Append-only log of the numbers called out in a game, for persisting the board cheaply and safely.
+
+Each called number is appended to the log as a line of its own, instead of rewriting the whole board after every
+call. Every so often the log is compacted: all the numbers called so far are written to a json snapshot file (in the
+same format as before, a list of the selected numbers) and the log is emptied.
+
+The state of the board is the snapshot followed by the numbers in the log. A half written last line, such as one
+left behind by a crash, is ignored and cut off the log.
+"""
+
+__author__ = 'Aaron Alphonso'
+__email__ = 'alphonsoaaron1993@gmail.com'
+
+import json
+import os
+from typing import Any, List, Optional, TextIO
+
+from housie import instrument
+from housie.constants import Number, NUMBER_POOL
+from housie.utils import load_json
+
+# Number of calls appended to the log before it is compacted into the snapshot
+COMPACT_EVERY = 30
+
+
+class CallLog:
+    """Write-ahead log of called numbers, backed by a snapshot file
+
+    fsync_every controls how often the log is forced to disk: after every call by default, after every n calls for
+    n > 1, or never (leaving it to the OS) for 0.
+    """
+
+    def __init__(self, filename: str, snapshot_filename: str, fsync_every: int = 1,
+                 compact_every: int = COMPACT_EVERY) -> None:
+        self.filename = filename
+        self.snapshot_filename = snapshot_filename
+        self.fsync_every = fsync_every
+        self.compact_every = compact_every
+        self.numbers: List[Number] = []
+        self._file: Optional[TextIO] = None
+        self._unsynced = 0
+        self._appended = 0
+
+    def replay(self) -> List[Number]:
+        """Reads the snapshot and the log, and returns all the numbers called so far in the order they were called"""
+        called = [number for number in load_json(self.snapshot_filename) or [] if number in NUMBER_POOL]
+        seen = set(called)
+        try:
+            with open(self.filename, 'r+b') as file:
+                data = file.read()
+                # A last line without a newline at the end was only partly written. It is cut off, so that the next
+                # number appended starts on a line of its own rather than being glued onto it
+                complete = data.rfind(b'\n') + 1
+                if complete != len(data):
+                    file.truncate(complete)
+                for line in data[:complete].decode('ascii', 'replace').splitlines():
+                    if not line.strip().isdigit():
+                        continue
+                    number = int(line)
+                    if number in NUMBER_POOL and number not in seen:
+                        seen.add(number)
+                        called.append(number)
+        except FileNotFoundError:
+            pass
+        self.numbers = called
+        return called.copy()
+
+    def append(self, number: Number) -> None:
+        """Appends a called number to the log, compacting the log when it has grown enough"""
+        if self._file is None:
+            directory = os.path.dirname(self.filename)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.filename, 'a')  # pylint: disable=consider-using-with
+        line = '{}\n'.format(number)
+        self._file.write(line)
+        self._file.flush()
+        instrument.count('call_log.bytes', len(line))
+        self.numbers.append(number)
+        self._unsynced += 1
+        self._appended += 1
+        if self.fsync_every and self._unsynced >= self.fsync_every:
+            self.sync()
+        if self._appended >= self.compact_every:
+            self.compact()
+
+    def sync(self) -> None:
+        """Forces the calls appended so far onto the disk"""
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def compact(self) -> None:
+        """Writes all the numbers called so far to the snapshot, and empties the log.
+
+        The snapshot is written to a temporary file which then replaces the old one, so there is always a complete
+        snapshot on disk. If the process dies before the log is emptied, the numbers are in both places, which is
+        harmless as replay ignores repeated numbers.
+        """
+        directory = os.path.dirname(self.snapshot_filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_filename = self.snapshot_filename + '.tmp'
+        with open(temp_filename, 'w') as file:
+            json.dump(self.numbers, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_filename, self.snapshot_filename)
+
+        if self._file is not None:
+            self._file.close()
+        self._file = open(self.filename, 'w')  # pylint: disable=consider-using-with
+        self._unsynced = 0
+        self._appended = 0
+
+    def close(self) -> None:
+        """Compacts the log and closes it"""
+        self.compact()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> 'CallLog':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
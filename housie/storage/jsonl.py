@@ -0,0 +1,55 @@
+"""Streaming ticket files in the JSON Lines format, with one player-ticket per line.
+
+Each line of the file is a json object such as {"name": "Aaron", "ticket": [[11, 24, 48, 54, 82], ...]}
+Unlike the nested json format, tickets can be written as they are generated and read one at a time, so memory use
+doesn't grow with the size of the file.
+"""
+
+__author__ = 'Aaron Alphonso'
+__email__ = 'alphonsoaaron1993@gmail.com'
+
+import json
+import os
+from typing import Iterable, Iterator, Tuple
+
+from housie.constants import TicketRepresentation
+from housie.models import Ticket
+
+JSONL_EXTENSION = '.jsonl'
+
+
+def is_jsonl_file(filename: str) -> bool:
+    """Returns whether the file should be treated as a JSON Lines ticket file, based on its extension"""
+    return filename.endswith(JSONL_EXTENSION)
+
+
+def write_tickets_jsonl(records: Iterable[Tuple[str, TicketRepresentation]], filename: str) -> int:
+    """Writes each (name, ticket rows) record to the file as it is produced. Returns the number of tickets written.
+
+    The records can be a generator, in which case tickets are only generated as fast as they are written.
+    """
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    count = 0
+    with open(filename, 'w') as file:
+        for name, rows in records:
+            file.write(json.dumps({'name': name, 'ticket': rows}, separators=(',', ':')) + '\n')
+            count += 1
+    return count
+
+
+def iter_records_jsonl(filename: str) -> Iterator[Tuple[str, TicketRepresentation]]:
+    """Lazily reads the file, yielding a (name, ticket rows) record for each line, as found in the file. Blank lines
+    are skipped"""
+    with open(filename) as file:
+        for line in file:
+            if line.strip():
+                record = json.loads(line)
+                yield record['name'], record['ticket']
+
+
+def iter_tickets_jsonl(filename: str) -> Iterator[Tuple[str, Ticket]]:
+    """Lazily reads the file, yielding a (name, Ticket) for each line. Blank lines are skipped"""
+    for name, rows in iter_records_jsonl(filename):
+        yield name, Ticket(rows)
@@ -0,0 +1,280 @@
+"""SQLite backed store of many games at once, each with its players, tickets and the numbers called out.
+
+The json files under DATA_DIR hold a single game per working directory, and are read and written whole. A session
+store keeps any number of games in a single database file instead, in four tables:
+
+    games       id | name | created | updated
+    players     id | game id | name
+    tickets     id | player id | ticket index | numbers (the 15 numbers row after row, one byte each)
+    calls       game id | position | number
+
+Players are indexed by game and name, tickets by player and index and calls by game and position, so resuming a game
+or looking up the tickets of a single player only reads the rows it needs. The database is in WAL mode, so a reader
+(such as another process listing the games) never blocks the game being played, and writes are committed in batches
+rather than a transaction per row.
+"""
+
+__author__ = 'Aaron Alphonso'
+__email__ = 'alphonsoaaron1993@gmail.com'
+
+import os
+import time
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from housie.constants import NUMBERS_PER_ROW, NUMBER_POOL, TICKET_ROWS, Number, TicketRepresentation
+from housie.models import Ticket, TicketPool, TicketRegistry
+
+if TYPE_CHECKING:
+    from sqlite3 import Connection
+
+# Name of the game used when none is given
+DEFAULT_GAME_NAME = 'default'
+
+# Number of tickets inserted per transaction when adding tickets
+TICKET_BATCH_SIZE = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS players (
+    id INTEGER PRIMARY KEY,
+    game_id INTEGER NOT NULL REFERENCES games (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    UNIQUE (game_id, name)
+);
+CREATE TABLE IF NOT EXISTS tickets (
+    id INTEGER PRIMARY KEY,
+    player_id INTEGER NOT NULL REFERENCES players (id) ON DELETE CASCADE,
+    ticket_index INTEGER NOT NULL,
+    numbers BLOB NOT NULL,
+    UNIQUE (player_id, ticket_index)
+);
+CREATE TABLE IF NOT EXISTS calls (
+    game_id INTEGER NOT NULL REFERENCES games (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    number INTEGER NOT NULL,
+    PRIMARY KEY (game_id, position),
+    UNIQUE (game_id, number)
+) WITHOUT ROWID;
+"""
+
+GameInfo = NamedTuple('GameInfo', [('name', str), ('players', int), ('tickets', int), ('calls', int),
+                                   ('updated', float)])
+GameInfo.__doc__ = """Summary of a game in the store, with the time it was last written to in seconds since the epoch"""
+
+
+def _ticket_numbers(name: str, ticket_index: int, rows: TicketRepresentation) -> bytes:
+    """Returns the numbers of the ticket row after row, as stored in the tickets table"""
+    if [len(row) for row in rows] != [NUMBERS_PER_ROW] * TICKET_ROWS:
+        raise ValueError("Ticket {} of player '{}' does not have {} rows of {} numbers".format(
+            ticket_index + 1, name, TICKET_ROWS, NUMBERS_PER_ROW))
+    return bytes(number for row in rows for number in row)
+
+
+def _ticket_rows(numbers: bytes) -> TicketRepresentation:
+    """Returns the rows of a ticket from its numbers in the tickets table"""
+    return [list(numbers[row * NUMBERS_PER_ROW: (row + 1) * NUMBERS_PER_ROW]) for row in range(TICKET_ROWS)]
+
+
+class SessionStore:
+    """Games, players, tickets and calls of many games in one SQLite database file.
+
+    Games are referred to by name, and are created the first time something is written to them.
+    """
+
+    def __init__(self, filename: str) -> None:
+        # Imported here, so that the storage package can be imported to read tickets without loading sqlite
+        import sqlite3
+
+        self.filename = filename
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection: 'Connection' = sqlite3.connect(filename)
+        # With WAL, a commit only appends to the log, so syncing at checkpoints only is still safe against corruption
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute('PRAGMA foreign_keys=ON')
+        self.connection.executescript(SCHEMA)
+
+    def games(self) -> List[GameInfo]:
+        """Returns a summary of every game in the store, the most recently played first"""
+        rows = self.connection.execute("""
+            SELECT games.name,
+                   (SELECT COUNT(*) FROM players WHERE players.game_id = games.id),
+                   (SELECT COUNT(*) FROM tickets JOIN players ON players.id = tickets.player_id
+                    WHERE players.game_id = games.id),
+                   (SELECT COUNT(*) FROM calls WHERE calls.game_id = games.id),
+                   games.updated
+            FROM games ORDER BY games.updated DESC, games.id DESC""")
+        return [GameInfo(*row) for row in rows]
+
+    def game_id(self, game: str) -> Optional[int]:
+        """Returns the id of the game with the given name, or None if there is no such game"""
+        row = self.connection.execute('SELECT id FROM games WHERE name = ?', (game,)).fetchone()
+        return None if row is None else int(row[0])
+
+    def create_game(self, game: str) -> int:
+        """Returns the id of the game with the given name, creating it if there is no such game"""
+        game_id = self.game_id(game)
+        if game_id is not None:
+            return game_id
+        now = time.time()
+        self.connection.execute('INSERT INTO games (name, created, updated) VALUES (?, ?, ?)', (game, now, now))
+        self.connection.commit()
+        return self.create_game(game)
+
+    def delete_game(self, game: str) -> bool:
+        """Deletes the game along with its players, tickets and calls. Returns whether there was such a game"""
+        with self.connection:
+            deleted = self.connection.execute('DELETE FROM games WHERE name = ?', (game,)).rowcount
+        return bool(deleted)
+
+    def add_tickets(self, game: str, records: Iterable[Tuple[str, TicketRepresentation]]) -> int:
+        """Adds each (name, ticket rows) record to the game, after any tickets its player already has. Returns the
+        number of tickets added.
+
+        The records can be a generator, they are inserted TICKET_BATCH_SIZE at a time and committed together once the
+        last one is in. Every ticket must have 3 rows of 5 numbers, a ValueError is raised otherwise. If anything
+        raises, none of the tickets are added.
+        """
+        game_id = self.create_game(game)
+        # Id and count of tickets of each player seen so far
+        players: Dict[str, List[int]] = {}
+        batch: List[Tuple[int, int, bytes]] = []
+        count = 0
+        # Commits if every ticket was inserted, and rolls back otherwise
+        with self.connection:
+            for name, rows in records:
+                if name not in players:
+                    players[name] = self._player(game_id, name)
+                player = players[name]
+                batch.append((player[0], player[1], _ticket_numbers(name, player[1], rows)))
+                player[1] += 1
+                count += 1
+                if len(batch) >= TICKET_BATCH_SIZE:
+                    self._insert_tickets(batch)
+                    batch = []
+            self._insert_tickets(batch)
+            self.connection.execute('UPDATE games SET updated = ? WHERE id = ?', (time.time(), game_id))
+        return count
+
+    def load_tickets(self, game: str, compact: bool = False,
+                     pool: bool = False) -> Optional[Union[TicketRegistry, TicketPool]]:
+        """Returns the tickets of every player of the game, like housie.models.load_tickets does for a file. Returns
+        None if the game has no tickets"""
+        from housie.models.compact_ticket import CompactTicket
+
+        ticket_class = CompactTicket if compact else Ticket
+        ticket_data: Union[TicketRegistry, TicketPool] = TicketPool() if pool else TicketRegistry()
+        rows = self.connection.execute("""
+            SELECT players.name, tickets.numbers FROM players JOIN tickets ON tickets.player_id = players.id
+            WHERE players.game_id = (SELECT id FROM games WHERE name = ?)
+            ORDER BY players.id, tickets.ticket_index""", (game,))
+        for name, numbers in rows:
+            if isinstance(ticket_data, TicketPool):
+                ticket_data.add_ticket(name, _ticket_rows(numbers))
+            else:
+                ticket_data.add_ticket(name, ticket_class(_ticket_rows(numbers)))
+        return ticket_data or None
+
+    def player_tickets(self, game: str, name: str) -> List[Ticket]:
+        """Returns the tickets of a single player of the game, without reading those of anyone else"""
+        rows = self.connection.execute("""
+            SELECT tickets.numbers FROM players JOIN tickets ON tickets.player_id = players.id
+            WHERE players.game_id = (SELECT id FROM games WHERE name = ?) AND players.name = ?
+            ORDER BY tickets.ticket_index""", (game, name))
+        return [Ticket(_ticket_rows(numbers)) for numbers, in rows]
+
+    def calls(self, game: str) -> List[Number]:
+        """Returns the numbers called out in the game so far, in the order they were called"""
+        rows = self.connection.execute("""
+            SELECT number FROM calls WHERE game_id = (SELECT id FROM games WHERE name = ?)
+            ORDER BY position""", (game,))
+        return [number for number, in rows]
+
+    def call_log(self, game: str, commit_every: int = 1) -> 'GameCallLog':
+        """Returns a log of the numbers called out in the game, which can be used in place of a CallLog"""
+        return GameCallLog(self, game, commit_every)
+
+    def close(self) -> None:
+        """Commits anything left to commit, and closes the database"""
+        self.connection.commit()
+        self.connection.close()
+
+    def __enter__(self) -> 'SessionStore':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def _player(self, game_id: int, name: str) -> List[int]:
+        """Returns the id of the player of the game, creating them if needed, and the number of tickets they have"""
+        self.connection.execute('INSERT OR IGNORE INTO players (game_id, name) VALUES (?, ?)', (game_id, name))
+        player_id, = self.connection.execute('SELECT id FROM players WHERE game_id = ? AND name = ?',
+                                             (game_id, name)).fetchone()
+        ticket_count, = self.connection.execute('SELECT COUNT(*) FROM tickets WHERE player_id = ?',
+                                                (player_id,)).fetchone()
+        return [player_id, ticket_count]
+
+    def _insert_tickets(self, batch: List[Tuple[int, int, bytes]]) -> None:
+        """Inserts a batch of (player id, ticket index, numbers) tickets, without committing them"""
+        self.connection.executemany('INSERT INTO tickets (player_id, ticket_index, numbers) VALUES (?, ?, ?)', batch)
+
+
+class GameCallLog:
+    """Log of the numbers called out in one game of a SessionStore, with the same interface as a CallLog.
+
+    commit_every controls how often the calls are committed: after every call by default, or after every n calls.
+    Calls which were not committed are lost if the program stops without closing the log.
+    """
+
+    def __init__(self, store: SessionStore, game: str, commit_every: int = 1) -> None:
+        self.store = store
+        self.game = game
+        self.commit_every = commit_every
+        self.numbers: List[Number] = []
+        self._game_id: Optional[int] = None
+        self._uncommitted = 0
+
+    def replay(self) -> List[Number]:
+        """Returns all the numbers called so far in the game, in the order they were called"""
+        self.numbers = [number for number in self.store.calls(self.game) if number in NUMBER_POOL]
+        return self.numbers.copy()
+
+    def append(self, number: Number) -> None:
+        """Adds a called number to the game. Numbers which have already been called are ignored"""
+        if self._game_id is None:
+            self._game_id = self.store.create_game(self.game)
+        connection = self.store.connection
+        position, = connection.execute('SELECT COALESCE(MAX(position) + 1, 0) FROM calls WHERE game_id = ?',
+                                       (self._game_id,)).fetchone()
+        inserted = connection.execute('INSERT OR IGNORE INTO calls (game_id, position, number) VALUES (?, ?, ?)',
+                                      (self._game_id, position, number)).rowcount
+        if not inserted:
+            return
+        self.numbers.append(number)
+        self._uncommitted += 1
+        if self._uncommitted >= max(self.commit_every, 1):
+            self.sync()
+
+    def sync(self) -> None:
+        """Commits the calls appended so far"""
+        if self._uncommitted and self._game_id is not None:
+            self.store.connection.execute('UPDATE games SET updated = ? WHERE id = ?', (time.time(), self._game_id))
+            self.store.connection.commit()
+        self._uncommitted = 0
+
+    def close(self) -> None:
+        """Commits the calls appended so far. The store itself is left open"""
+        self.sync()
+
+    def __enter__(self) -> 'GameCallLog':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
@@ -0,0 +1,84 @@
+"""Index of the tickets issued so far, for making sure no two tickets have the same numbers.
+
+Tickets are keyed on the 90-bit mask of their numbers, so two tickets with the same numbers count as duplicates even if
+they are laid out differently, as they would share a Full House. Checking or adding a ticket is a set lookup.
+
+The index can be kept in memory only, or backed by a file so that tickets stay unique across books and runs. The file
+is a plain sequence of KEY_SIZE byte big-endian masks, appended to as tickets are added. A key cut short by a crash
+at the end of the file is ignored and overwritten.
+"""
+
+__author__ = 'Aaron Alphonso'
+__email__ = 'alphonsoaaron1993@gmail.com'
+
+import os
+from typing import Any, BinaryIO, Iterable, Optional, Set
+
+from housie.constants import NUMBER_POOL
+
+# Bytes needed for the 90-bit mask of a ticket
+KEY_SIZE = (len(NUMBER_POOL) + 7) // 8
+
+
+class TicketIndex:
+    """Set of the masks of the tickets issued, optionally persisted to a file"""
+
+    def __init__(self, filename: Optional[str] = None) -> None:
+        self.filename = filename
+        self._keys: Set[int] = set()
+        self._file: Optional[BinaryIO] = None
+        if filename is None:
+            return
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(filename, 'a+b')
+        self._file.seek(0)
+        data = self._file.read()
+        whole_keys = len(data) - len(data) % KEY_SIZE
+        self._keys.update(int.from_bytes(data[start: start + KEY_SIZE], 'big')
+                          for start in range(0, whole_keys, KEY_SIZE))
+        if whole_keys != len(data):
+            self._file.truncate(whole_keys)
+
+    def __contains__(self, mask: object) -> bool:
+        return mask in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, mask: int) -> bool:
+        """Adds the mask of a ticket. Returns False, leaving the index as it was, if it was already issued"""
+        if mask in self._keys:
+            return False
+        self._keys.add(mask)
+        if self._file is not None:
+            self._file.write(mask.to_bytes(KEY_SIZE, 'big'))
+        return True
+
+    def add_all(self, masks: Iterable[int]) -> bool:
+        """Adds the masks of a group of tickets, such as a strip, only if none of them has been issued before.
+        Returns whether they were added"""
+        masks = list(masks)
+        if len(set(masks)) != len(masks) or any(mask in self._keys for mask in masks):
+            return False
+        for mask in masks:
+            self.add(mask)
+        return True
+
+    def flush(self) -> None:
+        """Makes sure the keys added so far are written to the file"""
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self) -> None:
+        """Writes out and closes the file backing the index, if any. The index can still be used in memory"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> 'TicketIndex':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
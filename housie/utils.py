@@ -1,14 +1,16 @@
 """Reusable utilities across the project"""
-from typing import Any, Callable, TypeVar, cast
+from typing import Any, Callable, Iterable, List, TypeVar
 
 __author__ = 'Aaron Alphonso'
 __email__ = 'alphonsoaaron1993@gmail.com'
 
 import os
 import json
-from functools import wraps
 
+from housie import instrument
 
+
+@instrument.timed('clear_screen')
 def clear_screen() -> None:
     """Clears the console"""
     # for windows
@@ -22,10 +24,55 @@ def clear_screen() -> None:
 
 def strike_through(text: str) -> str:
     """Returns a strike-through version of the input text"""
-    result = ''
-    for c in text:
-        result = result + c + '\u0336'
-    return result
+    return ''.join(c + '\u0336' for c in text)
+
+
+# The cell used to display each number on tickets and the board, in plain and struck through (marked) form.
+# Precomputed for every number, indexed by the number itself, so that displays never need to format them again
+NUMBER_CELLS: List[str] = ['{: 3} '.format(number) for number in range(91)]
+MARKED_NUMBER_CELLS: List[str] = [strike_through(cell) for cell in NUMBER_CELLS]
+# Cells for a blank space on a ticket, and an uncalled number on the board
+BLANK_TICKET_CELL = '  - '
+EMPTY_BOARD_CELL = '    '
+
+
+def number_cell(number: int, marked: bool = False) -> str:
+    """Returns the cell used to display the number, struck through if it is marked"""
+    if 0 < number < len(NUMBER_CELLS):
+        return MARKED_NUMBER_CELLS[number] if marked else NUMBER_CELLS[number]
+    cell = '{: 3} '.format(number)
+    return strike_through(cell) if marked else cell
+
+
+def number_bit(number: int) -> int:
+    """Returns the bit representing the number in a 90-bit mask of housie numbers. Number 1 is the lowest bit.
+    Numbers outside the range 1-90 are represented by no bit at all"""
+    if 0 < number <= 90:
+        return 1 << (number - 1)
+    return 0
+
+
+def numbers_to_mask(numbers: Iterable[int]) -> int:
+    """Returns a 90-bit mask with the bits for each of the numbers set"""
+    mask = 0
+    for number in numbers:
+        mask |= number_bit(number)
+    return mask
+
+
+def mask_to_numbers(mask: int) -> List[int]:
+    """Returns the numbers whose bits are set in the mask, in ascending order"""
+    numbers = []
+    while mask:
+        lowest_bit = mask & -mask
+        numbers.append(lowest_bit.bit_length())
+        mask ^= lowest_bit
+    return numbers
+
+
+def popcount(mask: int) -> int:
+    """Returns the number of bits set in the mask"""
+    return bin(mask).count('1')
 
 
 def create_data_dir_if_not_exists() -> None:
@@ -35,11 +82,14 @@ def create_data_dir_if_not_exists() -> None:
         os.makedirs(DATA_DIR)
 
 
-def save_json(data: Any, filename: str) -> None:
+@instrument.timed('save_json')
+def save_json(data: object, filename: str) -> None:
     """Saves the input data to a file"""
     create_data_dir_if_not_exists()
+    text = json.dumps(data)
     with open(filename, 'w') as file:
-        json.dump(data, file)
+        file.write(text)
+    instrument.count('save_json.bytes', len(text.encode()))
 
 
 def load_json(filename: str) -> Any:
@@ -57,15 +107,11 @@ F = TypeVar('F', bound=Callable[..., Any])
 def dynamic_doc(func: F) -> F:
     """Decorator to insert the actual values of variables into the docstrings of certain methods.
 
-    This is so that we can insert certain values from our constants into our docstrings to make them more accurate
+    This is so that we can insert certain values from our constants into our docstrings to make them more accurate.
+    The docstring is formatted in place, without wrapping the function, so calls cost nothing extra. The functions
+    using it live in modules that the package only imports on first use, so the formatting is only paid for then.
     """
-
-    @wraps(func)
-    def wrapper(*args, **kwargs):  # type: ignore
-        """No added behavior in the wrapper apart from the formatted docstring"""
-        return func(*args, **kwargs)
-
     # Format the original docstring with the constant values
     from housie import constants
-    wrapper.__doc__ = func.__doc__.format(**constants.__dict__)  # type: ignore
-    return cast(F, wrapper)
+    func.__doc__ = (func.__doc__ or '').format(**vars(constants))
+    return func
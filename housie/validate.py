@@ -0,0 +1,258 @@
+"""Validation of tickets in bulk, e.g. of a book of tickets submitted by players, before a game starts.
+
+A valid ticket has 3 rows of 5 numbers from 1 to 90, with no number repeated. Laid out on the 3 x 9 grid, each column
+holds the numbers of its range in COLUMN_RANGES, between 1 and 3 of them, in ascending order from top to bottom, and no
+row has two numbers in the same column (so the numbers of a row are in ascending order too). A row may also be laid out
+on the grid, with a cell per column and None or 0 in its blank cells, as long as each number is in its own column.
+
+Most tickets are valid, so each one is first put through a quick check built on lookup tables: the columns of all the
+numbers of a ticket are found with a single bytes.translate, and the columns of each row are looked up in the table of
+the 126 valid ways to fill a row. Each row is then laid out on its row of the grid, as a 9 byte integer with a byte per
+column, so that all the columns can be checked to be in ascending order with a single subtraction per pair of rows.
+Only the tickets failing it go through the slower check which works out everything that's wrong.
+"""
+
+__author__ = 'Aaron Alphonso'
+__email__ = 'alphonsoaaron1993@gmail.com'
+
+import struct
+from itertools import combinations
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Sequence, Tuple
+
+from housie.constants import COLUMN_RANGES, MAX_NUMBERS_PER_COLUMN, NUMBER_POOL, NUMBERS_PER_ROW, NUMBERS_PER_TICKET, \
+    TICKET_COLUMNS, TICKET_ROWS
+
+# Column of each byte value, as a translation table. Anything which isn't a housie number maps to NOT_A_COLUMN
+NOT_A_COLUMN = 0xFF
+
+
+def _column_table() -> bytes:
+    table = bytearray([NOT_A_COLUMN]) * 256
+    for column, column_range in enumerate(COLUMN_RANGES):
+        table[column_range.start: column_range.end + 1] = bytes([column]) * (column_range.end + 1 - column_range.start)
+    return bytes(table)
+
+
+COLUMN_TABLE = _column_table()
+
+# Columns of every valid row, mapped to the mask of those columns (bit c for column c)
+ROW_COLUMN_MASKS: Dict[bytes, int] = {bytes(columns): sum(1 << column for column in columns)
+                                      for columns in combinations(range(TICKET_COLUMNS), NUMBERS_PER_ROW)}
+ALL_COLUMNS_MASK = (1 << TICKET_COLUMNS) - 1
+# Stands in for the mask of an invalid row. Has bits beyond the columns, so no ticket with such a row covers them all
+NOT_A_ROW = 1 << TICKET_COLUMNS
+
+# A row laid out on the grid is an integer with a byte per column, the first column in the highest byte. Numbers fit
+# in the low 7 bits of a byte, leaving the top bit of each byte as a guard: subtracting one row from another below it
+# (with the guards set) leaves the guard of a column set only if the number below is the larger, without borrowing
+# from the next column. Blank cells are 0 in the row above and BLANK_CELL in the row below, so they always pass
+BLANK_CELL = 0x7F
+GRID_GUARDS = int.from_bytes(b'\x80' * TICKET_COLUMNS, 'big')
+GRID_ONES = int.from_bytes(b'\x01' * TICKET_COLUMNS, 'big')
+
+
+def _row_layout(columns: Tuple[int, ...]) -> Tuple[int, int, Callable[..., bytes]]:
+    """Returns the mask of the columns of a row, its blank cells as laid out in a row below, and a function packing its
+    numbers into their bytes of the row (the blank cells are left 0)"""
+    blanks = sum(BLANK_CELL << 8 * (TICKET_COLUMNS - 1 - column) for column in range(TICKET_COLUMNS)
+                 if column not in columns)
+    fmt = '>' + ''.join('B' if column in columns else 'x' for column in range(TICKET_COLUMNS))
+    return ROW_COLUMN_MASKS[bytes(columns)], blanks, struct.Struct(fmt).pack
+
+
+ROW_LAYOUTS: Dict[bytes, Tuple[int, int, Callable[..., bytes]]] = {
+    bytes(columns): _row_layout(columns) for columns in combinations(range(TICKET_COLUMNS), NUMBERS_PER_ROW)}
+NOT_A_ROW_LAYOUT: Tuple[int, int, Callable[..., bytes]] = (NOT_A_ROW, 0, bytes)
+
+TicketErrors = NamedTuple('TicketErrors', [('name', str), ('ticket_index', int), ('errors', List[str])])
+TicketErrors.__doc__ = """The problems found with a ticket, given by the name of its player and its 0-based index
+among the tickets of that player"""
+
+
+class InvalidTicketsError(ValueError):
+    """Raised when loading tickets, some of which are invalid. The report holds the problems with each of them"""
+
+    def __init__(self, report: List[TicketErrors]) -> None:
+        super().__init__(format_report(report))
+        self.report = report
+
+
+def _is_blank(cell: Any) -> bool:
+    """Returns whether the cell of a row laid out on the grid is blank"""
+    return cell is None or type(cell) is int and cell == 0  # noqa: E721
+
+
+def _without_blanks(rows: Sequence[Any]) -> List[Any]:
+    """Returns the rows with the blank cells of those laid out on the grid left out. Raises a ValueError if a number of
+    such a row isn't in the column of its cell"""
+    compact = []
+    for row in rows:
+        if len(row) == TICKET_COLUMNS:
+            cells = [(column, cell) for column, cell in enumerate(row) if not _is_blank(cell)]
+            if any(type(cell) is not int or not 0 <= cell < len(COLUMN_TABLE)  # noqa: E721
+                   or COLUMN_TABLE[cell] != column for column, cell in cells):
+                raise ValueError('A number is not in its own column')
+            row = [cell for _, cell in cells]
+        compact.append(row)
+    return compact
+
+
+def is_valid_ticket(rows: Any) -> bool:
+    """Returns whether the ticket rows make a valid ticket. Much quicker than ticket_errors, but gives no reasons"""
+    try:
+        first, second, third = rows
+        if len(first) != NUMBERS_PER_ROW or len(second) != NUMBERS_PER_ROW or len(third) != NUMBERS_PER_ROW:
+            # Rows laid out on the grid are checked without their blank cells
+            first, second, third = _without_blanks(rows)
+            if len(first) != NUMBERS_PER_ROW or len(second) != NUMBERS_PER_ROW or len(third) != NUMBERS_PER_ROW:
+                return False
+        numbers = [*first, *second, *third]
+        # bytes refuses anything which isn't a whole number from 0 to 255, except for True which passes as a 1
+        packed = bytes(numbers)
+    except (TypeError, ValueError):
+        # Not 3 rows of numbers at all, or a number which doesn't fit in a byte
+        return False
+    columns = packed.translate(COLUMN_TABLE)
+    mask, _, pack_first = ROW_LAYOUTS.get(columns[:NUMBERS_PER_ROW], NOT_A_ROW_LAYOUT)
+    second_mask, second_blanks, pack_second = ROW_LAYOUTS.get(columns[NUMBERS_PER_ROW:-NUMBERS_PER_ROW],
+                                                              NOT_A_ROW_LAYOUT)
+    third_mask, third_blanks, pack_third = ROW_LAYOUTS.get(columns[-NUMBERS_PER_ROW:], NOT_A_ROW_LAYOUT)
+    if mask | second_mask | third_mask != ALL_COLUMNS_MASK:
+        return False
+    one = packed.find(1)
+    if one >= 0 and type(numbers[one]) is not int:  # noqa: E721
+        return False
+    # Every column must be in ascending order from the first row to the second, the second to the third, and the
+    # first to the third (for the columns blank in the second). This also rules out any number appearing twice
+    first_row = int.from_bytes(pack_first(*first), 'big')
+    second_row = int.from_bytes(pack_second(*second), 'big')
+    third_row = int.from_bytes(pack_third(*third), 'big') | third_blanks | GRID_GUARDS
+    return ((second_row | second_blanks | GRID_GUARDS) - first_row - GRID_ONES) & GRID_GUARDS == GRID_GUARDS \
+        and (third_row - second_row - GRID_ONES) & GRID_GUARDS == GRID_GUARDS \
+        and (third_row - first_row - GRID_ONES) & GRID_GUARDS == GRID_GUARDS
+
+
+def ticket_errors(rows: Any) -> List[str]:
+    """Checks the ticket rows against every rule of a ticket. Returns a list of the problems found, which is empty if
+    the ticket is valid"""
+    if is_valid_ticket(rows):
+        return []
+    if not isinstance(rows, list):
+        return ['Ticket is not a list of rows']
+    errors = []
+    if len(rows) != TICKET_ROWS:
+        errors.append('Ticket has {} rows, expected {}'.format(len(rows), TICKET_ROWS))
+
+    # The numbers of the ticket, as (row, column, number), skipping anything that isn't a housie number
+    cells: List[Tuple[int, int, int]] = []
+    for row_index, row in enumerate(rows, start=1):
+        if not isinstance(row, list):
+            errors.append('Row {} is not a list of numbers'.format(row_index))
+            continue
+        # A row laid out on the grid has a cell per column, and its blank cells are skipped
+        on_grid = len(row) == TICKET_COLUMNS
+        row_cells = [(position, number) for position, number in enumerate(row) if not on_grid or not _is_blank(number)]
+        if len(row_cells) != NUMBERS_PER_ROW:
+            errors.append('Row {} has {} numbers, expected {}'.format(row_index, len(row_cells), NUMBERS_PER_ROW))
+        row_columns = []
+        for position, number in row_cells:
+            if type(number) is not int or not NUMBER_POOL[0] <= number <= NUMBER_POOL[-1]:  # noqa: E721
+                errors.append('Row {} has {}, which is not a number from {} to {}'.format(
+                    row_index, _describe(number), NUMBER_POOL[0], NUMBER_POOL[-1]))
+                continue
+            column = COLUMN_TABLE[number]
+            if on_grid and column != position:
+                errors.append('Row {} has {} in column {}, which belongs in column {}'.format(
+                    row_index, number, position + 1, column + 1))
+            cells.append((row_index, column, number))
+            row_columns.append(column)
+        if on_grid:
+            # Every number in its own cell rules out two numbers in a column, or the row being out of order
+            continue
+        for column in sorted(set(row_columns)):
+            if row_columns.count(column) > 1:
+                errors.append('Row {} has more than one number in column {}'.format(row_index, column + 1))
+        if row_columns != sorted(row_columns):
+            errors.append('Row {} is not in ascending order'.format(row_index))
+
+    numbers = [number for _, _, number in cells]
+    if len(numbers) != NUMBERS_PER_TICKET and len(rows) == TICKET_ROWS:
+        errors.append('Ticket has {} numbers, expected {}'.format(len(numbers), NUMBERS_PER_TICKET))
+    for number in sorted(set(numbers)):
+        if numbers.count(number) > 1:
+            errors.append('Number {} appears more than once'.format(number))
+    for column in range(TICKET_COLUMNS):
+        column_numbers = [number for _, cell_column, number in cells if cell_column == column]
+        if not column_numbers:
+            errors.append('Column {} has no numbers'.format(column + 1))
+        elif len(column_numbers) > MAX_NUMBERS_PER_COLUMN:
+            errors.append('Column {} has {} numbers, at most {} are allowed'.format(
+                column + 1, len(column_numbers), MAX_NUMBERS_PER_COLUMN))
+        if any(upper >= lower for upper, lower in zip(column_numbers, column_numbers[1:])):
+            errors.append('Column {} is not in ascending order from top to bottom'.format(column + 1))
+    return errors
+
+
+class TicketValidator:
+    """Checks tickets one at a time as they are read, e.g. from a file, building up the report of the invalid ones"""
+
+    def __init__(self) -> None:
+        self.report: List[TicketErrors] = []
+        # Number of tickets checked for each player so far, to give the index of each ticket of the report
+        self._ticket_counts: Dict[str, int] = {}
+
+    def check(self, name: str, rows: Any) -> bool:
+        """Checks the next ticket of the player. Returns whether it is valid, adding its problems to the report if not"""
+        ticket_index = self._ticket_counts.get(name, 0)
+        self._ticket_counts[name] = ticket_index + 1
+        if is_valid_ticket(rows):
+            return True
+        self.report.append(TicketErrors(name, ticket_index, ticket_errors(rows)))
+        return False
+
+    def check_player(self, name: str, tickets: Any) -> List[Any]:
+        """Checks the next tickets of the player all at once. Returns the valid ones, adding the problems of the others
+        to the report"""
+        if not isinstance(tickets, list):
+            self.report.append(TicketErrors(name, self._ticket_counts.get(name, 0),
+                                            ['Tickets of the player are not a list of tickets']))
+            return []
+        first_index = self._ticket_counts.get(name, 0)
+        self._ticket_counts[name] = first_index + len(tickets)
+        valid = list(filter(is_valid_ticket, tickets))
+        if len(valid) == len(tickets):
+            return valid
+        for ticket_index, rows in enumerate(tickets, start=first_index):
+            if not is_valid_ticket(rows):
+                self.report.append(TicketErrors(name, ticket_index, ticket_errors(rows)))
+        return valid
+
+    def check_all(self, records: Iterable[Tuple[str, Any]]) -> bool:
+        """Checks each (name, ticket rows) record. Returns whether they were all valid"""
+        invalid_before = len(self.report)
+        for name, rows in records:
+            self.check(name, rows)
+        return len(self.report) == invalid_before
+
+
+def validate_tickets(records: Iterable[Tuple[str, Any]]) -> List[TicketErrors]:
+    """Checks each (name, ticket rows) record in a single pass. Returns the problems with each invalid ticket, in the
+    order of the records. An empty report means every ticket is valid"""
+    validator = TicketValidator()
+    validator.check_all(records)
+    return validator.report
+
+
+def format_report(report: Sequence[TicketErrors], limit: int = 10) -> str:
+    """Describes the problems in the report, one ticket per line, for up to `limit` tickets"""
+    lines = ['{} invalid ticket{}'.format(len(report), '' if len(report) == 1 else 's')]
+    for ticket in report[:limit]:
+        lines.append("Ticket {} of '{}': {}".format(ticket.ticket_index + 1, ticket.name, '; '.join(ticket.errors)))
+    if len(report) > limit:
+        lines.append('... and {} more'.format(len(report) - limit))
+    return '\n'.join(lines)
+
+
+def _describe(value: Any) -> str:
+    """Describes a value found in place of a number"""
+    return 'a blank' if value is None or (type(value) is int and value == 0) else repr(value)  # noqa: E721
@@ -0,0 +1,59 @@
+""" Tests for the non-interactive batch generation of tickets """
+from pathlib import Path
+
+import pytest
+
+from housie import load_tickets, validate_strip
+from housie.__main__ import main
+from housie.batch import FORMAT_BINARY, generate_batch, read_players
+from housie.storage import TicketBook, iter_tickets_jsonl
+
+
+def test_read_players() -> None:
+    """ Test that blank lines and comments are skipped """
+    assert read_players(['Thor\n', '\n', '# guests\n', '  Loki  \n']) == ['Thor', 'Loki']
+
+
+def test_repeated_players_are_refused(tmp_path: Path) -> None:
+    """ Test that a player listed twice is refused before any tickets are generated """
+    with pytest.raises(ValueError, match='Players listed more than once: Loki, Thor'):
+        read_players(['Thor', 'Loki', 'Thor', 'Loki', 'Loki'])
+    out = tmp_path / 'tickets.hbook'
+    with pytest.raises(ValueError):
+        generate_batch(['Thor', 'Loki', 'Thor'], 2, str(out), FORMAT_BINARY, seed=3)
+    assert not out.exists()
+    players_file = tmp_path / 'players.txt'
+    players_file.write_text('Thor\nLoki\nThor\n')
+    with pytest.raises(SystemExit) as error:
+        main(['generate', '--players-file', str(players_file), '--per-player', '2', '--out', str(out)])
+    assert str(error.value) == '{}: Players listed more than once: Thor'.format(players_file)
+    assert not out.exists()
+
+
+def test_batch_formats_hold_the_same_tickets(tmp_path: Path) -> None:
+    """ Test that the same seed gives the same tickets whatever the format, the chunking or the workers """
+    jsonl_file = str(tmp_path / 'tickets.jsonl')
+    book_file = str(tmp_path / 'tickets.hbook')
+    result = generate_batch(['Thor', 'Loki'], 25, jsonl_file, seed=3, chunk_size=10)
+    assert (result.tickets, result.players, result.seed) == (50, 2, 3)
+    generate_batch(['Thor', 'Loki'], 25, book_file, FORMAT_BINARY, seed=3, workers=2, chunk_size=10)
+    with TicketBook(book_file) as book:
+        assert [(name, ticket.rows) for name, ticket in iter_tickets_jsonl(jsonl_file)] == \
+            [(name, ticket.rows) for name, tickets in book.items() for ticket in tickets]
+    with pytest.raises(ValueError):
+        generate_batch(['Thor'], 1, jsonl_file, 'csv')
+
+
+def test_generate_subcommand(tmp_path: Path, capsys: "pytest.CaptureFixture[str]") -> None:
+    """ Test the generate subcommand, writing strips and reporting the throughput """
+    players_file = tmp_path / 'players.txt'
+    players_file.write_text('Thor\nLoki\n')
+    out = str(tmp_path / 'strips.jsonl')
+    main(['generate', '--players-file', str(players_file), '--per-player', '2', '--out', out, '--strips',
+          '--seed', '7', '--unique-index', str(tmp_path / 'issued.idx')])
+    assert 'Generated 24 tickets for 2 players' in capsys.readouterr().err
+    ticket_data = load_tickets(out)
+    assert ticket_data is not None
+    for tickets in ticket_data.values():
+        assert len(tickets) == 12
+        assert validate_strip(tickets[:6]) == [] and validate_strip(tickets[6:]) == []
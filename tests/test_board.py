@@ -0,0 +1,39 @@
+""" Unit tests for the Board model """
+from housie import Board
+from housie.constants import NUMBER_POOL
+
+
+def test_pick_next_draws_every_number_once() -> None:
+    """ Test that picking at random goes through every number exactly once and then stops """
+    board = Board()
+    picked = board.pick_many(100)
+    assert sorted(picked) == NUMBER_POOL
+    assert board.selected == picked
+    assert board.remaining == [] and board.remaining_count == 0
+    assert board.pick_next() is None
+
+
+def test_seed_makes_draw_order_reproducible() -> None:
+    """ Test that two boards with the same seed draw the same numbers in the same order """
+    assert Board(seed=7).pick_many(90) == Board(seed=7).pick_many(90)
+    assert Board(seed=7).pick_many(90) != Board(seed=8).pick_many(90)
+
+
+def test_manual_picks_are_skipped_by_random_picks() -> None:
+    """ Test that numbers picked manually are not drawn again, and invalid or repeated picks are ignored """
+    board = Board(seed=7)
+    for number in [5, 5, 0, 91, 17]:
+        assert board.pick_manual(number) == number
+    assert board.selected == [5, 17]
+    picked = board.pick_many(88)
+    assert sorted(picked + [5, 17]) == NUMBER_POOL
+
+
+def test_custom_game_state() -> None:
+    """ Test that a board with numbers already called out reports the right state """
+    board = Board([1, 22, 34, 55, 64, 32])
+    assert board.remaining == [number for number in NUMBER_POOL if number not in [1, 22, 34, 55, 64, 32]]
+    assert board.remaining_count == 84
+    assert board.is_selected(22) and not board.is_selected(23)
+    assert board.last_5_selected() == [22, 34, 55, 64, 32]
+    assert 'Left in the bag: 84' in board.display_board()
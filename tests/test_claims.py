@@ -0,0 +1,98 @@
+""" Unit tests for the ClaimEngine prize detection """
+import random
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+from housie import Board, ClaimEngine, Prize, Ticket, generate_ticket, verify_claims
+from housie.claims import earliest_claims, prize_numbers
+from housie.storage import TicketBook, write_ticket_book
+
+TICKET_ROWS = [[11, 24, 48, 54, 82], [14, 32, 56, 69, 86], [2, 26, 36, 59, 73]]
+
+
+@pytest.fixture
+def ticket_data() -> Dict[str, List[Ticket]]:
+    """ Generate a few players with a few tickets each """
+    random.seed(10000)  # So that we get reproducible test results
+    return {name: [generate_ticket() for _ in range(5)] for name in ['Thor', 'Loki', 'Odin']}
+
+
+def test_prize_numbers() -> None:
+    """ Test that the numbers taking part in each prize are picked from the right rows """
+    assert prize_numbers(TICKET_ROWS, Prize.TOP_LINE) == TICKET_ROWS[0]
+    assert prize_numbers(TICKET_ROWS, Prize.BOTTOM_LINE) == TICKET_ROWS[2]
+    assert prize_numbers(TICKET_ROWS, Prize.FOUR_CORNERS) == [11, 82, 2, 73]
+    assert len(prize_numbers(TICKET_ROWS, Prize.FULL_HOUSE)) == 15
+
+
+def test_events_raised_on_the_completing_call() -> None:
+    """ Test that each prize is raised exactly on the call that completes it """
+    engine = ClaimEngine({'Aaron': [Ticket(TICKET_ROWS)]})
+    assert engine.call_many([11, 24, 48, 54]) == []
+    assert [event.prize for event in engine.call(2)] == [Prize.EARLY_FIVE]
+    assert [event.prize for event in engine.call(82)] == [Prize.TOP_LINE]
+    assert engine.call(82) == []  # Calling a number twice has no effect
+    assert [event.prize for event in engine.call(73)] == [Prize.FOUR_CORNERS]
+    events = engine.call_many(TICKET_ROWS[1] + TICKET_ROWS[2])
+    assert [event.prize for event in events] == [Prize.MIDDLE_LINE, Prize.BOTTOM_LINE, Prize.FULL_HOUSE]
+    assert events[-1].call_index == 15 and events[-1].number == 59
+
+
+def test_engine_attached_to_board_matches_rescanning(ticket_data: Dict[str, List[Ticket]]) -> None:
+    """ Test that the first winners found by the engine match a full rescan of every ticket after each call """
+    board = Board()
+    engine = ClaimEngine(ticket_data)
+    engine.attach(board)
+    expected: Dict[Prize, List[str]] = {}
+    while board.remaining:
+        board.pick_next()
+        for name, tickets in ticket_data.items():
+            for ticket in tickets:
+                ticket.mark_number(board.selected[-1])
+        for prize in Prize:
+            if prize in expected:
+                continue
+            winners = [name for name, tickets in ticket_data.items() for ticket in tickets
+                       if sum(ticket.is_marked(number) for number in prize_numbers(ticket.rows, prize))
+                       >= (5 if prize == Prize.EARLY_FIVE else len(prize_numbers(ticket.rows, prize)))]
+            if winners:
+                expected[prize] = winners
+    assert {prize: [event.name for event in events] for prize, events in engine.winners.items()} == expected
+    assert len([event for event in engine.events if event.prize == Prize.FULL_HOUSE]) == 15
+
+
+def test_verify_claims_matches_claim_engine(ticket_data: Dict[str, List[Ticket]]) -> None:
+    """ Test that a batch of claims is verified with the same completing calls the engine saw """
+    board = Board(seed=5)
+    engine = ClaimEngine(ticket_data)
+    engine.attach(board)
+    board.pick_many(45)
+    tickets = [ticket for tickets in ticket_data.values() for ticket in tickets]
+    results = verify_claims(board, [(ticket, prize) for ticket in tickets for prize in Prize])
+    completed = {(id(event.ticket), event.prize): event.call_index for event in engine.events}
+    for result in results:
+        assert isinstance(result.claim.ticket, Ticket)
+        assert result.completed_at == completed.get((id(result.claim.ticket), result.claim.prize))
+        assert result.valid == (result.completed_at is not None)
+    earliest = earliest_claims(results)
+    for prize, winners in engine.winners.items():
+        expected = sorted(id(event.ticket) for event in winners)
+        assert sorted(id(result.claim.ticket) for result in earliest[prize]) == expected
+
+
+def test_verify_claims_by_book_index(tmp_path: Path) -> None:
+    """ Test claims made with the index of a ticket in a stored book """
+    book_file = str(tmp_path / 'book.hbook')
+    write_ticket_book([('Aaron', TICKET_ROWS)], book_file)
+    board = Board([2, 11, 24, 48, 54, 82, 26])
+    with TicketBook(book_file) as book:
+        results = verify_claims(board, [(0, Prize.TOP_LINE), (0, Prize.EARLY_FIVE), (0, Prize.FOUR_CORNERS),
+                                        (1, Prize.TOP_LINE)], book)
+        # The numbers were read straight from the book, without creating and caching a Ticket
+        assert not book._tickets  # pylint: disable=protected-access
+    assert [(result.valid, result.completed_at) for result in results] == [(True, 6), (True, 5), (False, None),
+                                                                           (False, None)]
+    with pytest.raises(ValueError):
+        verify_claims(board, [(0, Prize.TOP_LINE)])
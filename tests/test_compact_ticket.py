@@ -0,0 +1,47 @@
+""" Unit tests for the bitmask backed CompactTicket """
+import random
+
+import pytest
+
+from housie import CompactTicket, Ticket, generate_ticket
+from housie.constants import NUMBER_POOL
+
+
+@pytest.fixture
+def ticket() -> Ticket:
+    """ Generate and return a regular ticket for comparison """
+    random.seed(10000)  # So that we get reproducible test results
+    return generate_ticket()
+
+
+def test_compact_ticket_keeps_rows_and_numbers(ticket: Ticket) -> None:
+    """ Test that the compact ticket exposes the same rows and numbers as the regular ticket """
+    compact = CompactTicket(ticket.rows)
+    assert compact.rows == ticket.rows
+    assert compact.numbers == ticket.numbers
+
+
+def test_compact_ticket_marks_and_displays_like_ticket(ticket: Ticket) -> None:
+    """ Test that marking and displaying a compact ticket matches the regular ticket at every step """
+    compact = CompactTicket(ticket.rows)
+    for number in random.sample(NUMBER_POOL, 60):
+        ticket.mark_number(number)
+        compact.mark_number(number)
+        assert compact.selected == ticket.selected
+        assert compact.numbers_left() == ticket.numbers_left()
+        assert [compact.row_numbers_left(row) for row in range(3)] == \
+               [ticket.row_numbers_left(row) for row in range(3)]
+        assert [compact.is_row_complete(row) for row in range(3)] == [ticket.is_row_complete(row) for row in range(3)]
+        assert compact.is_full_house() == ticket.is_full_house()
+    assert compact.structural_display() == ticket.structural_display()
+    assert compact.minimalistic_display() == ticket.minimalistic_display()
+
+
+def test_compact_ticket_full_house(ticket: Ticket) -> None:
+    """ Test that marking every number completes the ticket and numbers outside the pool are ignored """
+    compact = CompactTicket(ticket.rows)
+    compact.mark_numbers([0, 91, -5])
+    assert compact.numbers_left() == 15
+    compact.mark_numbers(NUMBER_POOL)
+    assert compact.is_full_house()
+    assert compact.selected == set(ticket.numbers)
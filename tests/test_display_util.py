@@ -0,0 +1,64 @@
+""" Unit tests for the followed game displays """
+import io
+import os
+import random
+from typing import List
+
+import pytest
+
+from housie import Board, ClaimEngine, TicketRegistry, generate_ticket
+from housie.display_util import ANSI_CLEAR_SCREEN, FollowedGameRenderer, winner_lines
+from housie.game import mark_tickets
+
+
+@pytest.fixture
+def ticket_data() -> TicketRegistry:
+    """ Generate a few players with a few tickets each """
+    random.seed(10000)  # So that we get reproducible test results
+    return TicketRegistry({name: [generate_ticket() for _ in range(2)] for name in ['Thor', 'Loki', 'Odin']})
+
+
+@pytest.fixture(autouse=True)
+def large_terminal(monkeypatch: pytest.MonkeyPatch) -> None:
+    """ Pretend the terminal is large enough to fit the whole screen """
+    monkeypatch.setattr('shutil.get_terminal_size', lambda: os.terminal_size((200, 100)))
+
+
+def screen_of(renderer: FollowedGameRenderer) -> List[str]:
+    """ Returns the lines of the screen buffer of the renderer """
+    return [''.join(row).rstrip() for row in renderer._screen]  # pylint: disable=protected-access
+
+
+def test_updates_match_a_full_redraw(ticket_data: TicketRegistry) -> None:
+    """ Test that updating cell by cell gives the same screen as drawing it from scratch after every call """
+    board = Board(seed=3)
+    engine = ClaimEngine(ticket_data)
+    engine.attach(board)
+    renderer = FollowedGameRenderer(board, ticket_data, out=io.StringIO())
+    renderer.render()
+    for _ in range(40):
+        number = board.pick_next()
+        assert number is not None
+        mark_tickets(number, ticket_data)
+        renderer.update(number, winner_lines(engine.winners))
+
+    fresh = FollowedGameRenderer(board, ticket_data, out=io.StringIO())
+    fresh.render()
+    assert screen_of(renderer) == screen_of(fresh)
+
+
+def test_update_only_writes_changed_cells(ticket_data: TicketRegistry) -> None:
+    """ Test that an update doesn't clear the screen and only writes a small amount no matter the number of tickets """
+    board = Board()
+    out = io.StringIO()
+    renderer = FollowedGameRenderer(board, ticket_data, out=out)
+    renderer.render()
+    assert out.getvalue().startswith(ANSI_CLEAR_SCREEN)
+
+    out.seek(0)
+    out.truncate()
+    board.pick_manual(42)
+    mark_tickets(42, ticket_data)
+    renderer.update(42)
+    assert ANSI_CLEAR_SCREEN not in out.getvalue()
+    assert out.getvalue().count('\x1b[') == 1 + len(ticket_data.tickets_with(42)) + 2 + 2
@@ -0,0 +1,35 @@
+""" Unit tests for the generate_book module """
+from housie.constants import TICKET_CELLS
+from housie.generate_book import derive_seed, generate_book, regenerate_ticket
+from housie.generate_strip import TICKETS_PER_STRIP, strip_from_grid, validate_strip
+from housie.generate_ticket import ticket_from_grid
+
+
+def test_book_is_independent_of_worker_count() -> None:
+    """ Test that the same seed gives the same book whether generated in this process or across workers """
+    single = generate_book(1050, seed=42, workers=1, chunk_size=100)
+    assert len(single) == 1050 * TICKET_CELLS
+    assert generate_book(1050, seed=42, workers=2, chunk_size=100) == single
+    assert generate_book(1050, seed=43, workers=1, chunk_size=100) != single
+
+
+def test_sub_seeds_are_distinct() -> None:
+    """ Test that each chunk gets its own sub-seed, which is stable for a given master seed """
+    seeds = [derive_seed(42, chunk_index) for chunk_index in range(100)]
+    assert len(set(seeds)) == 100
+    assert seeds == [derive_seed(42, chunk_index) for chunk_index in range(100)]
+
+
+def test_regenerate_ticket_matches_book() -> None:
+    """ Test that a single disputed ticket can be regenerated from the seed """
+    book = generate_book(1050, seed=42, chunk_size=100)
+    for index in [0, 99, 100, 777, 1049]:
+        assert regenerate_ticket(42, 1050, index, chunk_size=100).rows == ticket_from_grid(book, index).rows
+
+
+def test_book_of_strips() -> None:
+    """ Test that books can be generated as strips, and tickets regenerated from them """
+    book = generate_book(30, seed=7, strips=True, chunk_size=4)
+    assert len(book) == 30 * TICKETS_PER_STRIP * TICKET_CELLS
+    assert all(validate_strip(strip_from_grid(book, index)) == [] for index in range(30))
+    assert regenerate_ticket(7, 30, 100, strips=True, chunk_size=4).rows == ticket_from_grid(book, 100).rows
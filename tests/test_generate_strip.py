@@ -0,0 +1,39 @@
+""" Unit tests for the generate_strip module """
+import random
+
+from housie import Ticket
+from housie.constants import TICKET_CELLS
+from housie.generate_strip import TICKETS_PER_STRIP, generate_strip, generate_strips_bulk, strip_from_grid, \
+    validate_strip
+
+
+def test_generated_strip_is_valid() -> None:
+    """ Test that a strip has 6 valid tickets covering every number exactly once """
+    strip = generate_strip(random.Random(10000))
+    assert len(strip) == TICKETS_PER_STRIP
+    assert validate_strip(strip) == []
+
+
+def test_bulk_strips_are_valid_and_reproducible() -> None:
+    """ Test that every strip generated in bulk is valid, and that the seed makes the output reproducible """
+    grid = generate_strips_bulk(500, seed=10000)
+    assert len(grid) == 500 * TICKETS_PER_STRIP * TICKET_CELLS
+    for index in range(500):
+        assert validate_strip(strip_from_grid(grid, index)) == []
+    assert generate_strips_bulk(500, seed=10000) == grid
+
+
+def test_validate_strip_reports_problems() -> None:
+    """ Test that the validator picks up strips that don't follow the rules """
+    strip = generate_strip(random.Random(10000))
+    assert validate_strip(strip[:5])
+
+    # Swapping two numbers of the same column between rows breaks the ordering within the column
+    grid = strip[0].get_structural_representation()
+    column = next(column for column in range(9) if sum(1 for row in grid if row[column]) > 1)
+    top, bottom = [row for row in range(3) if grid[row][column]][:2]
+    grid[top][column], grid[bottom][column] = grid[bottom][column], grid[top][column]
+    assert any('out of order' in error for error in validate_strip([Ticket(grid)] + strip[1:]))  # type: ignore
+
+    duplicated = [strip[0]] + strip[:5]
+    assert any('exactly once' in error for error in validate_strip(duplicated))
@@ -78,3 +78,11 @@ def test_every_column_contains_between_1_and_3_numbers(ticket: Ticket,
     # Check that every column has at most 3 numbers
     for column_number, number_count in columns.items():
         assert number_count <= 3
+
+
+def test_ticket_reproducible_from_own_random_instance() -> None:
+    """ Test that passing a Random instance makes the ticket reproducible without the global random state """
+    first = generate_ticket(random.Random(42))
+    random.seed(1)
+    second = generate_ticket(random.Random(42))
+    assert first.rows == second.rows
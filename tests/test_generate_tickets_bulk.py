@@ -0,0 +1,56 @@
+""" Unit tests for the bulk ticket generator """
+from typing import List
+
+import pytest
+
+from housie.constants import COLUMN_RANGES, TICKET_CELLS, TICKET_COLUMNS, TICKET_ROWS
+from housie.generate_ticket import generate_tickets_bulk, ticket_from_grid, tickets_from_grid, _column_patterns
+
+
+@pytest.fixture
+def grid() -> bytearray:
+    """ Generate a batch of tickets for testing """
+    return generate_tickets_bulk(2000, seed=10000)
+
+
+def columns_of(grid: bytearray, index: int) -> List[List[int]]:
+    """ Returns the cells of each column of a ticket in the grid, from top to bottom """
+    cells = grid[index * TICKET_CELLS: (index + 1) * TICKET_CELLS]
+    return [[cells[row * TICKET_COLUMNS + column] for row in range(TICKET_ROWS)] for column in range(TICKET_COLUMNS)]
+
+
+def test_grid_size(grid: bytearray) -> None:
+    """ Test that the grid holds 27 cells per ticket """
+    assert len(grid) == 2000 * TICKET_CELLS
+    assert len(generate_tickets_bulk(0)) == 0
+
+
+def test_every_ticket_follows_the_rules(grid: bytearray) -> None:
+    """ Test that every ticket has 5 numbers per row, 1 to 3 ascending numbers per column, from the column range """
+    for ticket in tickets_from_grid(grid):
+        assert [len(row) for row in ticket.rows] == [5, 5, 5]
+        assert len(set(ticket.numbers)) == 15
+    for index in range(2000):
+        for column_range, column in zip(COLUMN_RANGES, columns_of(grid, index)):
+            numbers = [number for number in column if number]
+            assert 1 <= len(numbers) <= 3
+            assert all(column_range.start <= number <= column_range.end for number in numbers)
+            assert numbers == sorted(numbers)
+
+
+def test_seed_makes_generation_reproducible(grid: bytearray) -> None:
+    """ Test that the same seed gives the same tickets """
+    assert generate_tickets_bulk(2000, seed=10000) == grid
+    assert generate_tickets_bulk(2000, seed=10001) != grid
+
+
+def test_ticket_from_grid_matches_iteration(grid: bytearray) -> None:
+    """ Test that a single ticket can be picked out of the grid """
+    assert ticket_from_grid(grid, 5).rows == list(tickets_from_grid(grid))[5].rows
+
+
+def test_column_pattern_probabilities_add_up() -> None:
+    """ Test that the column patterns cover every way of placing 15 numbers with at most 3 per column """
+    patterns, cum_weights = _column_patterns()
+    assert cum_weights[-1] == pytest.approx(1.0)
+    assert all(sum(pattern) == 15 and max(pattern) <= 3 for pattern in patterns)
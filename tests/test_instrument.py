@@ -0,0 +1,56 @@
+""" Unit tests for the instrumentation of the hot paths """
+import io
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from housie import instrument
+from housie.models import Board
+from housie.utils import save_json
+
+
+@pytest.fixture
+def enabled() -> Iterator[None]:
+    """ Turns instrumentation on for the test only """
+    instrument.reset()
+    instrument.enable()
+    yield
+    instrument.disable()
+    instrument.reset()
+
+
+def test_nothing_recorded_while_off() -> None:
+    """ Test that instrumented calls record nothing while instrumentation is off """
+    assert not instrument.is_enabled()
+    Board().pick_many(5)
+    with instrument.timer('call_out'):
+        instrument.count('things')
+    assert instrument.summary() == {} and instrument.counters() == {}
+
+
+def test_timers_and_counters(enabled: None, tmp_path: Path) -> None:
+    """ Test that the timers and counters of the instrumented functions are recorded and summarised """
+    Board().pick_many(10)
+    for _ in range(3):
+        with instrument.timer('call_out'):
+            save_json([1, 2, 3], str(tmp_path / 'board.json'))
+    stats = instrument.summary()
+    assert stats['Board.pick_manual']['calls'] == 10
+    assert stats['call_out']['calls'] == stats['save_json']['calls'] == 3
+    assert stats['call_out']['p50'] <= stats['call_out']['p99'] <= stats['call_out']['max']
+    assert instrument.counters() == {'save_json.bytes': 3 * len(b'[1, 2, 3]')}
+
+    out = io.StringIO()
+    instrument.print_summary('Test game', out)
+    assert 'Test game' in out.getvalue() and 'Board.pick_manual' in out.getvalue()
+    assert instrument.summary() == {}
+
+
+def test_percentile() -> None:
+    """ Test the nearest rank percentiles """
+    durations = [float(value) for value in range(1, 101)]
+    assert instrument.percentile(durations, 50) == 50
+    assert instrument.percentile(durations, 99) == 99
+    assert instrument.percentile([3.0], 99) == 3
+    assert instrument.percentile([], 50) == 0
@@ -0,0 +1,83 @@
+""" Unit tests for the leaderboard of the tickets closest to winning """
+import os
+import random
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+from housie import Board, Ticket, TicketPool, generate_ticket
+from housie.claims import LINE_PRIZES, Prize
+from housie.constants import GENERATED_TICKETS_FILE, NUMBER_POOL
+from housie.display_util import leaderboard_lines
+from housie.game import _generated_tickets_leaderboard
+from housie.leaderboard import LEADERBOARD_PRIZES, Leaderboard, LeaderboardEntry
+from housie.storage import write_tickets_jsonl
+
+
+@pytest.fixture
+def ticket_data() -> Dict[str, List[Ticket]]:
+    """ Generate a few players with a few tickets each """
+    random.seed(10000)  # So that we get reproducible test results
+    return {name: [generate_ticket() for _ in range(5)] for name in ['Thor', 'Loki', 'Odin']}
+
+
+def expected_left(ticket: Ticket, prize: Prize, called: List[int]) -> int:
+    """ Counts the numbers left for the prize on the ticket the slow way """
+    numbers = ticket.numbers if prize == Prize.FULL_HOUSE else ticket.rows[LINE_PRIZES.index(prize)]
+    return len(set(numbers) - set(called))
+
+
+@pytest.mark.parametrize('pool', [False, True])
+def test_buckets_follow_the_calls(ticket_data: Dict[str, List[Ticket]], pool: bool) -> None:
+    """ Test that the numbers left of every ticket and the bucket counts match a recount after every call """
+    board = Board(random.sample(NUMBER_POOL, 10))
+    leaderboard = Leaderboard(TicketPool(ticket_data) if pool else ticket_data)
+    leaderboard.attach(board)
+    tickets = [ticket for tickets in ticket_data.values() for ticket in tickets]
+    assert len(leaderboard) == len(tickets)
+    for _ in range(60):
+        board.pick_next()
+        for prize in LEADERBOARD_PRIZES:
+            left = [expected_left(ticket, prize, board.selected) for ticket in tickets]
+            assert [leaderboard.numbers_left(ticket_id, prize) for ticket_id in range(len(tickets))] == left
+            assert [leaderboard.count(prize, count) for count in range(16)] == [left.count(count) for count in range(16)]
+
+
+def test_closest_lists_the_fewest_left_first(ticket_data: Dict[str, List[Ticket]]) -> None:
+    """ Test that the top K of a prize are the tickets with the fewest numbers left, leaving out completed ones """
+    leaderboard = Leaderboard(ticket_data)
+    thor = ticket_data['Thor']
+    leaderboard.call_many(thor[2].rows[0] + thor[4].rows[0][:4] + [0, 91, thor[2].rows[0][0]])
+    assert leaderboard.closest(Prize.TOP_LINE, 1) == [LeaderboardEntry('Thor', 4, 1)]
+    assert leaderboard.closest(Prize.TOP_LINE, 1, include_complete=True) == [LeaderboardEntry('Thor', 2, 0)]
+    closest = leaderboard.closest(Prize.FULL_HOUSE, 20)
+    assert len(closest) == 15 and closest[0][:2] == ('Thor', 2) and closest[0].numbers_left <= 10
+    assert [entry.numbers_left for entry in closest] == sorted(entry.numbers_left for entry in closest)
+    assert leaderboard.count(Prize.FULL_HOUSE, 99) == 0
+
+
+def test_leaderboard_lines() -> None:
+    """ Test that only the prizes which tickets are close to are listed, naming the closest tickets """
+    rows = [[11, 24, 48, 54, 82], [14, 32, 56, 69, 86], [2, 26, 36, 59, 73]]
+    leaderboard = Leaderboard({'Aaron': [Ticket(rows)] * 4, 'Elma': [Ticket(rows)]})
+    assert leaderboard_lines(leaderboard) == []
+    leaderboard.call_many([11, 24, 48, 54])
+    assert leaderboard_lines(leaderboard, k=2) == [
+        'Top Line: 1 away - Aaron (ticket 1), Aaron (ticket 2) and 3 more']
+    leaderboard.call_many([82, 14, 32, 56, 69, 2, 26, 36])
+    assert leaderboard_lines(leaderboard, k=1) == [
+        'Middle Line: 1 away - Aaron (ticket 1) and 4 more',
+        'Bottom Line: 2 away - Aaron (ticket 1) and 4 more']
+
+
+def test_hosted_game_leaderboard_of_generated_tickets(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """ Test that the hosted game shows the leaderboard of the generated tickets, when there are any """
+    monkeypatch.chdir(tmp_path)
+    assert _generated_tickets_leaderboard() is None
+    write_tickets_jsonl([('Aaron', generate_ticket().rows), ('Elma', generate_ticket().rows)], GENERATED_TICKETS_FILE)
+    leaderboard = _generated_tickets_leaderboard()
+    assert leaderboard is not None and leaderboard.names == ['Aaron', 'Elma']
+    os.remove(GENERATED_TICKETS_FILE)
+    write_tickets_jsonl([('Aaron', [[1, 2, 3]])], GENERATED_TICKETS_FILE)
+    assert _generated_tickets_leaderboard() is None
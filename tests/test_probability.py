@@ -0,0 +1,93 @@
+""" Unit tests for the odds of completing a prize, and of being the first to """
+import random
+from itertools import combinations
+from math import comb
+from typing import Dict, List
+
+import pytest
+
+from housie import Board, Ticket, generate_ticket
+from housie.claims import LINE_PRIZES, Prize
+from housie.display_util import odds_lines
+from housie.leaderboard import Leaderboard
+from housie.probability import completion_curve, completion_probability, expected_calls, first_winner_odds, \
+    unmarked_counts
+
+
+@pytest.fixture
+def ticket_data() -> Dict[str, List[Ticket]]:
+    """ Generate a few players with a few tickets each """
+    random.seed(10000)  # So that we get reproducible test results
+    return {name: [generate_ticket() for _ in range(5)] for name in ['Thor', 'Loki', 'Odin']}
+
+
+@pytest.mark.parametrize('unmarked, remaining', [(0, 5), (1, 1), (3, 10), (5, 60), (15, 90), (7, 6)])
+def test_completion_curve_is_hypergeometric(unmarked: int, remaining: int) -> None:
+    """ Test that the curve matches C(k, unmarked) / C(remaining, unmarked) for every number of calls k """
+    curve = completion_curve(unmarked, remaining)
+    assert len(curve) == remaining + 1
+    for calls, odds in enumerate(curve):
+        assert odds == pytest.approx(comb(calls, unmarked) / comb(remaining, unmarked) if unmarked <= remaining else 0)
+    assert completion_probability(unmarked, remaining, remaining + 10) == curve[-1]
+    assert completion_probability(unmarked, remaining, -1) == curve[0]
+
+
+def test_completion_probability_by_counting() -> None:
+    """ Test the odds and the expected number of calls against counting every order of a small number of calls """
+    remaining, needed = list(range(8)), {1, 4, 6}
+    orders = list(combinations(remaining, 3))
+    assert completion_probability(3, 8, 3) == pytest.approx(sum(set(order) == needed for order in orders) / len(orders))
+    # The last of the 3 numbers needed is at each position with the odds of the curve going up at it
+    curve = completion_curve(3, 8)
+    assert expected_calls(3, 8) == pytest.approx(sum(calls * (curve[calls] - curve[calls - 1]) for calls in range(1, 9)))
+
+
+def test_first_winner_odds() -> None:
+    """ Test that the odds of every ticket being first add up, and that tickets needing fewer numbers are favoured """
+    counts = {4: 3, 6: 10, 9: 40, 12: 2}
+    odds = first_winner_odds(counts, 50)
+    assert sum(odds[unmarked].first * count for unmarked, count in counts.items()) >= 1
+    assert sum(odds[unmarked].alone * count for unmarked, count in counts.items()) <= 1
+    assert odds[4].first > odds[6].first > odds[9].first > odds[12].first > 0
+    assert all(win_odds.first == pytest.approx(win_odds.alone + win_odds.tie) for win_odds in odds.values())
+    # A lone ticket is always first, and two tickets needing every number left always tie
+    assert first_winner_odds({3: 1}, 10)[3].alone == pytest.approx(1)
+    assert first_winner_odds({3: 2}, 3)[3].tie == pytest.approx(1)
+
+
+def test_first_winner_odds_once_completed() -> None:
+    """ Test that once a ticket has completed the prize, no other ticket can be first to it """
+    odds = first_winner_odds({0: 1, 2: 5}, 30)
+    assert odds[0].alone == 1 and odds[2].first == 0
+    assert first_winner_odds({0: 2, 5: 0}, 30) == {0: (1.0, 0.0, 1.0)}
+
+
+@pytest.mark.parametrize('prize', [Prize.FULL_HOUSE] + LINE_PRIZES)
+def test_unmarked_counts_match_the_leaderboard(ticket_data: Dict[str, List[Ticket]], prize: Prize) -> None:
+    """ Test that counting the unmarked numbers of every ticket matches the buckets of the leaderboard """
+    board = Board(seed=7)
+    leaderboard = Leaderboard(ticket_data)
+    leaderboard.attach(board)
+    board.pick_many(35)
+    assert unmarked_counts(ticket_data, board, prize) == leaderboard.counts(prize)
+    assert sum(leaderboard.counts(prize).values()) == len(leaderboard)
+
+
+def test_unmarked_counts_of_early_five(ticket_data: Dict[str, List[Ticket]]) -> None:
+    """ Test that the odds of Early Five are refused, as it isn't won by a fixed set of numbers """
+    with pytest.raises(ValueError):
+        unmarked_counts(ticket_data, Board(), Prize.EARLY_FIVE)
+
+
+def test_odds_lines() -> None:
+    """ Test that the odds of Full House are listed for the closest tickets """
+    rows = [[11, 24, 48, 54, 82], [14, 32, 56, 69, 86], [2, 26, 36, 59, 73]]
+    leaderboard = Leaderboard({'Aaron': [Ticket(rows)], 'Elma': [generate_ticket()]})
+    board = Board()
+    leaderboard.attach(board)
+    for number in rows[0] + rows[1] + rows[2][:3]:
+        board.pick_manual(number)
+    odds = first_winner_odds(leaderboard.counts(Prize.FULL_HOUSE), 77)[2]
+    assert odds_lines(leaderboard, board.remaining_count, k=1, horizon=5) == [
+        'Full House odds for Aaron (ticket 1): {:.1%} within 5 calls, {:.1%} to be first ({:.1%} tied)'.format(
+            completion_probability(2, 77, 5), odds.first, odds.tie)]
@@ -0,0 +1,101 @@
+""" Tests for the asyncio game server, against local clients """
+import asyncio
+from typing import Awaitable, Callable, List, Tuple
+
+from housie.server import HousieServer, parse_ticket
+
+TICKET = '11,24,48,54,82/14,32,56,69,86/2,26,36,59,73'
+
+Connection = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+def _run(test: Callable[[HousieServer, int], Awaitable[None]], max_pending: int = 256) -> None:
+    """ Runs a test coroutine against a server listening on a free local port """
+    loop = asyncio.new_event_loop()
+
+    async def run() -> None:
+        server = HousieServer(max_pending)
+        port = await server.start('127.0.0.1', 0)
+        try:
+            await asyncio.wait_for(test(server, port), 10)
+        finally:
+            await server.stop()
+
+    try:
+        loop.run_until_complete(run())
+    finally:
+        loop.close()
+
+
+async def _send(connection: Connection, *lines: str) -> None:
+    _, writer = connection
+    writer.write(''.join(line + '\n' for line in lines).encode())
+    await writer.drain()
+
+
+async def _receive(connection: Connection, count: int = 1) -> List[str]:
+    reader, _ = connection
+    return [(await reader.readline()).decode().strip() for _ in range(count)]
+
+
+def test_parse_ticket() -> None:
+    """ Test that only tickets of 3 rows of distinct numbers from 1 to 90 are accepted """
+    assert parse_ticket(TICKET) == [[11, 24, 48, 54, 82], [14, 32, 56, 69, 86], [2, 26, 36, 59, 73]]
+    assert parse_ticket('1,2/3,4') is None
+    assert parse_ticket('1,2/3,4/5,6') is None
+    assert parse_ticket('11,24,48,54,82/14,32,56,69,86/2,26,36,59,93') is None
+    assert parse_ticket('24,11,48,54,82/14,32,56,69,86/2,26,36,59,73') is None
+    assert parse_ticket('1,2/3,4/5,91') is None
+    assert parse_ticket('1,2/3,4/5,1') is None
+    assert parse_ticket('1,2/3,a/5,6') is None
+
+
+def test_numbers_and_winners_broadcast_to_the_room() -> None:
+    """ Test a game played by a host and a player, with the player's ticket marked on the server """
+    async def test(server: HousieServer, port: int) -> None:
+        host = await asyncio.open_connection('127.0.0.1', port)
+        player = await asyncio.open_connection('127.0.0.1', port)
+        await _send(host, 'HOST friday')
+        assert await _receive(host) == ['HOSTING friday']
+        await _send(player, 'JOIN friday Thor', 'TICKET 1,2/3,4/5,6', 'TICKET ' + TICKET, 'CALL 11')
+        lines = await _receive(player, 4)
+        assert lines[0] == 'JOINED friday -' and lines[1].startswith('ERROR tickets must have 3 rows of 5')
+        assert lines[2:] == ['TICKET 0', 'ERROR only the host of a room can call numbers']
+
+        await _send(host, *('CALL {}'.format(number) for number in [11, 24, 48, 54, 82]))
+        lines = await _receive(player, 7)
+        assert lines[:5] == ['NUMBER 1 11', 'NUMBER 2 24', 'NUMBER 3 48', 'NUMBER 4 54', 'NUMBER 5 82']
+        assert sorted(lines[5:]) == ['WINNER EARLY_FIVE Thor 0 5', 'WINNER TOP_LINE Thor 0 5']
+        await _receive(host, 7)
+
+        await _send(player, 'STATUS', 'TICKET ' + TICKET)
+        assert await _receive(player, 2) == ['STATUS 0 0 0 5 5 2 10',
+                                             'ERROR the game in room friday has already started']
+
+        late = await asyncio.open_connection('127.0.0.1', port)
+        await _send(late, 'JOIN friday Thor', 'JOIN friday Loki', 'QUIT')
+        assert await _receive(late, 3) == ['ERROR name Thor is already taken in room friday',
+                                           'JOINED friday 11,24,48,54,82', 'BYE']
+        for _, writer in [host, player, late]:
+            writer.close()
+
+    _run(test)
+
+
+def test_slow_client_is_disconnected() -> None:
+    """ Test that a client which falls too far behind is dropped rather than its backlog growing """
+    async def test(server: HousieServer, port: int) -> None:
+        player = await asyncio.open_connection('127.0.0.1', port)
+        await _send(player, 'JOIN friday Thor')
+        assert await _receive(player) == ['JOINED friday -']
+        room = server.rooms['friday']
+        for _ in range(5):
+            # Nothing gets written out in between as the event loop doesn't get to run
+            room.broadcast('NUMBER 0 0')
+        reader, writer = player
+        assert await reader.read() == b''
+        await asyncio.sleep(0)
+        assert 'friday' not in server.rooms
+        writer.close()
+
+    _run(test, max_pending=2)
@@ -0,0 +1,55 @@
+""" Unit tests for the Monte Carlo game simulation """
+import random
+from typing import List
+
+from housie import ClaimEngine, Prize, Ticket, generate_ticket
+from housie.claims import PRIZES
+from housie.simulate import SimulationReport, build_prize_masks, simulate_game, simulate_games
+
+
+def _tickets(count: int) -> List[Ticket]:
+    rng = random.Random(2024)
+    return [generate_ticket(rng) for _ in range(count)]
+
+
+def test_simulated_game_matches_claim_engine() -> None:
+    """ Test that the bitwise simulation agrees with marking the tickets call by call """
+    tickets = _tickets(40)
+    prize_masks = build_prize_masks([ticket.rows for ticket in tickets])
+    rng = random.Random(7)
+    for _ in range(20):
+        order = list(range(1, 91))
+        rng.shuffle(order)
+        report = SimulationReport()
+        simulate_game(order, prize_masks, report)
+
+        engine = ClaimEngine({'Player': tickets})
+        engine.call_many(order)
+        for prize in PRIZES:
+            first = engine.first_winners(prize)
+            assert first is not None
+            assert report.first_win_calls[prize] == {first[0].call_index: 1}
+            assert report.winner_counts[prize] == {len(first): 1}
+
+
+def test_simulation_is_reproducible_across_workers() -> None:
+    """ Test that the same seed gives the same statistics with any number of workers """
+    tickets = _tickets(10)
+    report = simulate_games(tickets, 60, seed=3, chunk_size=25)
+    parallel = simulate_games(tickets, 60, seed=3, workers=2, chunk_size=25)
+    assert report.games == parallel.games == 60
+    assert report.first_win_calls == parallel.first_win_calls
+    assert report.winner_counts == parallel.winner_counts
+    assert sum(report.first_win_calls[Prize.FULL_HOUSE].values()) == 60
+
+
+def test_report_statistics() -> None:
+    """ Test the summary statistics of a report """
+    report = SimulationReport()
+    for call, winners in [(10, 1), (20, 1), (30, 2), (40, 1)]:
+        report.add(Prize.TOP_LINE, call, winners)
+    assert report.mean_calls(Prize.TOP_LINE) == 25
+    assert report.percentile_calls(Prize.TOP_LINE, 50) == 20
+    assert report.percentile_calls(Prize.TOP_LINE, 100) == 40
+    assert report.mean_winners(Prize.TOP_LINE) == 1.25
+    assert 'Top Line' in report.summary()
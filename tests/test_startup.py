@@ -0,0 +1,59 @@
+""" Tests keeping the startup of the package fast: the modules loaded in a fresh interpreter, and the time they take
+to import as measured with python -X importtime """
+import subprocess
+import sys
+from typing import Dict, List
+
+import pytest
+
+# Time that the housie modules themselves may take to import for a ticket lookup, in microseconds. Generous, so that
+# only a real regression (e.g. pulling the game or the displays back into the lookup path) trips it
+STARTUP_BUDGET_US = 60000
+
+# Modules that must not be loaded just to look up tickets
+HEAVY_MODULES = ['housie.game', 'housie.display_util', 'housie.claims', 'housie.server', 'housie.simulate',
+                 'asyncio', 'concurrent.futures', 'cProfile', 'shutil', 'sqlite3']
+
+
+def _import_times(statement: str) -> Dict[str, int]:
+    """ Runs the statement in a fresh interpreter, and returns the time each module took to import on its own """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement], stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            self_time, _, name = line[len('import time:'):].split('|')
+            if self_time.strip().isdigit():
+                times[name.strip()] = int(self_time)
+    return times
+
+
+def _loaded_modules(statement: str) -> List[str]:
+    """ Runs the statement in a fresh interpreter, and returns the names of the modules loaded once it has run """
+    result = subprocess.run([sys.executable, '-c', statement + '\nimport sys\nprint(*sys.modules)'],
+                            stdout=subprocess.PIPE, universal_newlines=True, check=True)
+    return result.stdout.split()
+
+
+def test_package_import_is_lazy() -> None:
+    """ Test that importing the package doesn't import any of its modules until a name is used """
+    modules = _loaded_modules('import housie')
+    assert [name for name in modules if name.startswith('housie.')] == []
+    modules = _loaded_modules('from housie import Board')
+    assert 'housie.models.board' in modules
+    assert not any(name in modules for name in HEAVY_MODULES)
+
+
+def test_ticket_lookup_is_lean() -> None:
+    """ Test that reading a ticket book doesn't load any of the heavy modules """
+    modules = _loaded_modules('from housie.storage import TicketBook')
+    assert 'housie.storage.binary' in modules
+    assert not any(name in modules for name in HEAVY_MODULES)
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason='python -X importtime is only available from Python 3.7')
+def test_ticket_lookup_within_startup_budget() -> None:
+    """ Test that the modules needed to read a ticket book load within the budget """
+    times = _import_times('from housie.storage import TicketBook')
+    assert 'housie.storage.binary' in times
+    assert sum(time for name, time in times.items() if name.split('.')[0] == 'housie') < STARTUP_BUDGET_US
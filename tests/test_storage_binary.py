@@ -0,0 +1,102 @@
+""" Unit tests for the binary ticket book format """
+import os
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+import pytest
+
+from housie import CompactTicket, load_tickets
+from housie.constants import TicketRepresentation
+from housie.game import follow_game
+from housie.generate_ticket import generate_tickets_bulk, tickets_from_grid
+from housie.storage import CorruptTicketBookError, TicketBook, write_ticket_book
+from housie.utils import numbers_to_mask
+
+
+@pytest.fixture
+def records() -> List[Tuple[str, TicketRepresentation]]:
+    """ Generate tickets for a few players """
+    tickets = list(tickets_from_grid(generate_tickets_bulk(300, seed=10000)))
+    return [(name, ticket.rows) for name, ticket in zip(['Thor'] * 100 + ['Loki'] * 150 + ['Odin'] * 50, tickets)]
+
+
+@pytest.fixture
+def book_file(tmp_path: Path, records: List[Tuple[str, TicketRepresentation]]) -> str:
+    """ Write the tickets into a binary book and return the file name """
+    file_name = str(tmp_path / 'tickets.hbook')
+    assert write_ticket_book(iter(records), file_name) == 300
+    return file_name
+
+
+def test_book_is_compact(book_file: str) -> None:
+    """ Test that each ticket only takes 15 bytes in the book """
+    assert os.path.getsize(book_file) < 300 * 15 + 100
+
+
+def test_random_access_to_tickets(book_file: str, records: List[Tuple[str, TicketRepresentation]]) -> None:
+    """ Test that any ticket, its owner and its numbers can be read straight from the book """
+    with TicketBook(book_file) as book:
+        assert book.ticket_count == 300
+        for index in [0, 99, 100, 249, 250, 299]:
+            name, rows = records[index]
+            assert book.ticket(index).rows == rows
+            assert book.player_of(index) == name
+            assert book.mask(index) == numbers_to_mask(number for row in rows for number in row)
+        with pytest.raises(IndexError):
+            book.numbers(300)
+
+
+def test_book_behaves_like_ticket_data(book_file: str, records: List[Tuple[str, TicketRepresentation]]) -> None:
+    """ Test that the book can be used as a dict of name : tickets, and keeps the marks made on its tickets """
+    with TicketBook(book_file) as book:
+        assert list(book) == ['Thor', 'Loki', 'Odin']
+        assert [ticket.rows for ticket in book['Loki']] == [rows for name, rows in records if name == 'Loki']
+        assert book['Odin'][-1].rows == records[-1][1]
+        book['Thor'][3].mark_number(book['Thor'][3].numbers[0])
+        assert book['Thor'][3].numbers_left() == 14
+        with pytest.raises(TypeError):
+            book['Hela'] = []
+        changes: List[Callable[[], object]] = [lambda: book.update(Hela=[]), lambda: book.setdefault('Hela', []),
+                                               lambda: book.pop('Thor'), book.popitem, book.clear,
+                                               lambda: book.__ior__({'Hela': []})]
+        for change in changes:
+            with pytest.raises(TypeError):
+                change()
+        assert list(book) == ['Thor', 'Loki', 'Odin']
+
+
+def test_load_tickets_opens_book(book_file: str) -> None:
+    """ Test that load_tickets opens binary books, including with the compact ticket backend """
+    ticket_data = load_tickets(book_file, compact=True)
+    assert isinstance(ticket_data, TicketBook)
+    assert isinstance(ticket_data['Thor'][0], CompactTicket)
+    ticket_data.close()
+
+
+def test_tickets_of_a_player_must_be_together(tmp_path: Path, records: List[Tuple[str, TicketRepresentation]]) -> None:
+    """ Test that the writer rejects tickets which can't be stored in the book """
+    with pytest.raises(ValueError):
+        write_ticket_book(records + [('Thor', records[0][1])], str(tmp_path / 'bad.hbook'))
+    with pytest.raises(ValueError):
+        write_ticket_book([('Thor', [[1, 2], [3], [4]])], str(tmp_path / 'bad.hbook'))
+
+
+@pytest.mark.parametrize('size', [0, 10, 30, 300 * 15, -1])
+def test_corrupt_book(book_file: str, size: int) -> None:
+    """ Test that a book which is empty or was cut short is refused with a clear error """
+    with open(book_file, 'r+b') as file:
+        file.truncate(os.path.getsize(book_file) + size if size < 0 else size)
+    with pytest.raises(CorruptTicketBookError) as error:
+        load_tickets(book_file)
+    assert 'is not a ticket book this version of housie can read, or it is corrupt' in str(error.value)
+
+
+def test_follow_game_with_corrupt_book(tmp_path: Path, monkeypatch: pytest.MonkeyPatch,
+                                       capsys: "pytest.CaptureFixture[str]") -> None:
+    """ Test that following a game with a corrupt book of tickets explains the problem instead of crashing """
+    monkeypatch.chdir(tmp_path)
+    book_file = str(tmp_path / 'followed.hbook')
+    Path(book_file).write_bytes(b'')
+    monkeypatch.setattr('housie.game.FOLLOWED_TICKETS_FILE', book_file)
+    follow_game()
+    assert "The tickets in '{}' can't be read".format(book_file) in capsys.readouterr().out
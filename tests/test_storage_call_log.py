@@ -0,0 +1,57 @@
+""" Unit tests for the append-only call log """
+import json
+from pathlib import Path
+
+from housie import Board
+from housie.storage import CallLog
+
+
+def make_log(tmp_path: Path, compact_every: int = 30) -> CallLog:
+    """ Create a call log inside the temporary directory """
+    return CallLog(str(tmp_path / 'data' / 'board.log'), str(tmp_path / 'data' / 'board.json'),
+                   compact_every=compact_every)
+
+
+def test_replay_rebuilds_board(tmp_path: Path) -> None:
+    """ Test that replaying the log gives back the numbers in the order they were called """
+    call_log = make_log(tmp_path)
+    for number in [5, 17, 89, 42]:
+        call_log.append(number)
+    # Not closed, as if the program had crashed
+    assert Board(make_log(tmp_path).replay()).selected == [5, 17, 89, 42]
+
+
+def test_compaction_moves_calls_to_snapshot(tmp_path: Path) -> None:
+    """ Test that the log is emptied into the snapshot every few calls and on close """
+    call_log = make_log(tmp_path, compact_every=3)
+    for number in [1, 2, 3, 4]:
+        call_log.append(number)
+    assert json.loads((tmp_path / 'data' / 'board.json').read_text()) == [1, 2, 3]
+    assert (tmp_path / 'data' / 'board.log').read_text() == '4\n'
+    call_log.close()
+    assert json.loads((tmp_path / 'data' / 'board.json').read_text()) == [1, 2, 3, 4]
+    assert make_log(tmp_path).replay() == [1, 2, 3, 4]
+
+
+def test_replay_ignores_torn_and_repeated_records(tmp_path: Path) -> None:
+    """ Test that a half written last record, repeated numbers and invalid numbers are skipped """
+    (tmp_path / 'data').mkdir()
+    (tmp_path / 'data' / 'board.json').write_text('[10, 20]')
+    (tmp_path / 'data' / 'board.log').write_text('20\n30\n95\nabc\n4')
+    assert make_log(tmp_path).replay() == [10, 20, 30]
+
+
+def test_append_after_torn_record(tmp_path: Path) -> None:
+    """ Test that a number appended after a half written record goes on a line of its own """
+    (tmp_path / 'data').mkdir()
+    (tmp_path / 'data' / 'board.log').write_text('5\n1')
+    call_log = make_log(tmp_path)
+    assert call_log.replay() == [5]
+    call_log.append(42)
+    assert (tmp_path / 'data' / 'board.log').read_text() == '5\n42\n'
+    assert make_log(tmp_path).replay() == [5, 42]
+
+
+def test_replay_of_new_game(tmp_path: Path) -> None:
+    """ Test that a game with no snapshot or log starts with an empty board """
+    assert make_log(tmp_path).replay() == []
@@ -0,0 +1,60 @@
+""" Unit tests for the streaming JSON Lines ticket files """
+import random
+from pathlib import Path
+from typing import Iterator, Tuple
+
+import pytest
+
+from housie import TicketRegistry, generate_ticket, load_tickets
+from housie.constants import GENERATED_TICKETS_FILE, TicketRepresentation
+from housie.game import generate_tickets
+from housie.storage import iter_tickets_jsonl, write_tickets_jsonl
+
+
+def generated_records(count: int) -> Iterator[Tuple[str, TicketRepresentation]]:
+    """ Yields records of generated tickets """
+    random.seed(10000)  # So that we get reproducible test results
+    for index in range(count):
+        yield 'Player{}'.format(index % 3), generate_ticket().rows
+
+
+def test_write_and_read_back(tmp_path: Path) -> None:
+    """ Test that the tickets written from a generator are read back in the same order """
+    file_name = str(tmp_path / 'nested' / 'tickets.jsonl')
+    assert write_tickets_jsonl(generated_records(30), file_name) == 30
+    expected = list(generated_records(30))
+    assert [(name, ticket.rows) for name, ticket in iter_tickets_jsonl(file_name)] == expected
+
+
+def test_reader_is_lazy(tmp_path: Path) -> None:
+    """ Test that the reader only parses the tickets as they are asked for """
+    file_name = tmp_path / 'tickets.jsonl'
+    write_tickets_jsonl(generated_records(30), str(file_name))
+    with open(str(file_name), 'a') as file:
+        file.write('not json\n')
+    tickets = iter_tickets_jsonl(str(file_name))
+    name, ticket = next(tickets)
+    assert name == 'Player0' and len(ticket.numbers) == 15
+
+
+def test_load_tickets_from_jsonl(tmp_path: Path) -> None:
+    """ Test that load_tickets groups the tickets of a JSON Lines file by player """
+    file_name = str(tmp_path / 'tickets.jsonl')
+    write_tickets_jsonl(generated_records(30), file_name)
+    ticket_data = load_tickets(file_name)
+    assert isinstance(ticket_data, TicketRegistry)
+    assert sorted(ticket_data) == ['Player0', 'Player1', 'Player2']
+    assert all(len(tickets) == 10 for tickets in ticket_data.values())
+    assert load_tickets(str(tmp_path / 'missing.jsonl')) is None
+
+
+def test_generate_tickets_menu_streams_to_file(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """ Test that the generate tickets menu option writes every ticket to the generated tickets file """
+    monkeypatch.chdir(tmp_path)
+    answers = iter(['Thor Loki', 'y', '2'])
+    monkeypatch.setattr('builtins.input', lambda prompt: next(answers))
+    monkeypatch.setattr('housie.game.clear_screen', lambda: None)
+    generate_tickets()
+    ticket_data = load_tickets(GENERATED_TICKETS_FILE)
+    assert ticket_data is not None
+    assert {name: len(tickets) for name, tickets in ticket_data.items()} == {'Thor': 12, 'Loki': 12}
@@ -0,0 +1,141 @@
+""" Unit tests for the SQLite session store of many games """
+import random
+import sqlite3
+from pathlib import Path
+from typing import Iterator, Tuple
+
+import pytest
+
+from housie import Board, TicketPool, TicketRegistry, generate_ticket
+from housie.__main__ import main
+from housie.constants import FOLLOWED_TICKETS_FILE, TicketRepresentation
+from housie.game import follow_game, generate_tickets
+from housie.storage import SessionStore, sqlite_store
+from housie.utils import save_json
+
+
+def generated_records(count: int) -> Iterator[Tuple[str, TicketRepresentation]]:
+    """ Yields records of generated tickets """
+    random.seed(10000)  # So that we get reproducible test results
+    for index in range(count):
+        yield 'Player{}'.format(index % 3), generate_ticket().rows
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> Iterator[SessionStore]:
+    """ Open a session store inside the temporary directory """
+    with SessionStore(str(tmp_path / 'data' / 'housie.db')) as session_store:
+        yield session_store
+
+
+def test_tickets_round_trip(store: SessionStore, monkeypatch: pytest.MonkeyPatch) -> None:
+    """ Test that the tickets added to a game are read back grouped by player, in order, across batches """
+    monkeypatch.setattr(sqlite_store, 'TICKET_BATCH_SIZE', 7)
+    assert store.add_tickets('friday', generated_records(30)) == 30
+    expected = list(generated_records(30))
+    ticket_data = store.load_tickets('friday')
+    assert isinstance(ticket_data, TicketRegistry)
+    assert [(name, ticket.rows) for name, tickets in ticket_data.items() for ticket in tickets] == \
+        sorted(expected, key=lambda record: record[0])
+    pool = store.load_tickets('friday', pool=True)
+    assert isinstance(pool, TicketPool) and len(pool['Player1']) == 10
+    assert [ticket.rows for ticket in store.player_tickets('friday', 'Player2')] == \
+        [rows for name, rows in expected if name == 'Player2']
+    assert store.load_tickets('saturday') is None and store.player_tickets('friday', 'Nobody') == []
+
+
+def test_adding_to_a_player_keeps_their_tickets_in_order(store: SessionStore) -> None:
+    """ Test that tickets added later go after the ones the player already has, and invalid tickets are refused """
+    records = list(generated_records(4))
+    store.add_tickets('friday', records[:2])
+    store.add_tickets('friday', records[2:])
+    assert [ticket.rows for ticket in store.player_tickets('friday', 'Player0')] == [records[0][1], records[3][1]]
+    with pytest.raises(ValueError):
+        store.add_tickets('friday', [('Player0', [[1, 2, 3]])])
+
+
+def test_failed_add_leaves_no_tickets(store: SessionStore, monkeypatch: pytest.MonkeyPatch) -> None:
+    """ Test that when a ticket is refused part way through, none of the tickets before it are kept, even those of
+    batches already inserted """
+    monkeypatch.setattr(sqlite_store, 'TICKET_BATCH_SIZE', 7)
+    store.add_tickets('friday', generated_records(3))
+    with pytest.raises(ValueError) as error:
+        store.add_tickets('friday', list(generated_records(20)) + [('Hela', [[1, 2, 3]])])
+    assert "Ticket 1 of player 'Hela'" in str(error.value)
+    assert [game.tickets for game in store.games()] == [3]
+    assert store.player_tickets('friday', 'Hela') == [] and len(store.player_tickets('friday', 'Player0')) == 1
+    assert store.add_tickets('friday', generated_records(3)) == 3
+    first_rows = next(generated_records(1))[1]
+    assert [ticket.rows for ticket in store.player_tickets('friday', 'Player0')] == [first_rows, first_rows]
+
+
+def test_games_are_kept_apart(store: SessionStore) -> None:
+    """ Test that the calls and tickets of each game are separate, and that a game can be deleted """
+    store.add_tickets('friday', generated_records(6))
+    with store.call_log('friday') as friday, store.call_log('saturday') as saturday:
+        for number in [5, 17, 89]:
+            friday.append(number)
+        saturday.append(17)
+        friday.append(17)
+    assert store.calls('friday') == [5, 17, 89] and store.calls('saturday') == [17]
+    assert {game.name: game[1:4] for game in store.games()} == {'friday': (3, 6, 3), 'saturday': (0, 0, 1)}
+    assert store.delete_game('friday') and not store.delete_game('friday')
+    assert store.calls('friday') == [] and [game.name for game in store.games()] == ['saturday']
+
+
+def test_calls_are_committed_in_batches(store: SessionStore) -> None:
+    """ Test that another connection only sees the calls once a batch of them is committed, and that the database
+    is in WAL mode """
+    reader = sqlite3.connect(store.filename)
+    assert reader.execute('PRAGMA journal_mode').fetchone() == ('wal',)
+    call_log = store.call_log('friday', commit_every=3)
+    for number in [1, 2]:
+        call_log.append(number)
+    assert reader.execute('SELECT COUNT(*) FROM calls').fetchone() == (0,)
+    call_log.append(3)
+    call_log.append(4)
+    assert reader.execute('SELECT COUNT(*) FROM calls').fetchone() == (3,)
+    call_log.close()
+    assert reader.execute('SELECT number FROM calls ORDER BY position').fetchall() == [(1,), (2,), (3,), (4,)]
+    reader.close()
+
+
+def test_resume_followed_game(store: SessionStore, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """ Test that a followed game takes its tickets from the followed tickets file the first time, and is resumed
+    from the store with the numbers called before """
+    monkeypatch.chdir(tmp_path)
+    save_json({'Thor': [rows for _, rows in generated_records(2)]}, FOLLOWED_TICKETS_FILE)
+    monkeypatch.setattr('housie.game.clear_screen', lambda: None)
+    monkeypatch.setattr('housie.game.supports_ansi', lambda out: False)
+    for game, answers in [('friday', ['12', '40', 'q']), ('saturday', ['7', 'q']), ('friday', ['3', 'q'])]:
+        inputs = iter(answers)
+        monkeypatch.setattr('builtins.input', lambda prompt: next(inputs))
+        follow_game(store, game)
+    assert store.calls('friday') == [12, 40, 3] and store.calls('saturday') == [7]
+    assert Board(store.call_log('friday').replay()).selected == [12, 40, 3]
+    assert len(store.player_tickets('friday', 'Thor')) == 2
+
+
+def test_generate_tickets_into_store(store: SessionStore, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """ Test that the generate tickets menu option adds the tickets to the game of the store """
+    monkeypatch.chdir(tmp_path)
+    answers = iter(['Thor Loki', 'n', '3'])
+    monkeypatch.setattr('builtins.input', lambda prompt: next(answers))
+    monkeypatch.setattr('housie.game.clear_screen', lambda: None)
+    generate_tickets(store, 'friday')
+    ticket_data = store.load_tickets('friday')
+    assert ticket_data is not None
+    assert {name: len(tickets) for name, tickets in ticket_data.items()} == {'Thor': 3, 'Loki': 3}
+
+
+def test_games_command(tmp_path: Path, capsys: "pytest.CaptureFixture[str]") -> None:
+    """ Test that the games command lists the games saved in the store """
+    db = str(tmp_path / 'housie.db')
+    main(['--db', db, 'games'])
+    assert 'No games saved' in capsys.readouterr().out
+    with SessionStore(db) as session_store:
+        session_store.add_tickets('friday', generated_records(3))
+    main(['--db', db, 'games'])
+    assert capsys.readouterr().out.startswith('friday: 3 players, 3 tickets, 0 numbers called')
+    with pytest.raises(SystemExit):
+        main(['games'])
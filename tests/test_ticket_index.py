@@ -0,0 +1,70 @@
+""" Unit tests for the index of issued tickets, and the generators keeping tickets unique with it """
+from pathlib import Path
+from random import Random
+from typing import Set
+
+from housie.generate_book import generate_book
+from housie.generate_strip import TICKETS_PER_STRIP, generate_strips_bulk, strip_from_grid, validate_strip
+from housie.constants import TICKET_CELLS
+from housie.generate_ticket import deduplicate_tickets, generate_tickets_bulk, grid_ticket_mask
+from housie.storage import TicketIndex
+from housie.storage.ticket_index import KEY_SIZE
+
+
+def _masks(grid: bytearray) -> Set[int]:
+    return {grid_ticket_mask(grid, index) for index in range(len(grid) // TICKET_CELLS)}
+
+
+def test_index_persists_across_runs(tmp_path: Path) -> None:
+    """ Test that the keys added are read back, and that a key cut short at the end of the file is dropped """
+    file_name = str(tmp_path / 'data' / 'issued.idx')
+    with TicketIndex(file_name) as index:
+        assert index.add(0b1011) and index.add(1 << 89)
+        assert not index.add(0b1011)
+        assert not index.add_all([7, 1 << 89])
+        assert 7 not in index
+    with open(file_name, 'ab') as file:
+        file.write(b'\x01\x02')
+    with TicketIndex(file_name) as index:
+        assert len(index) == 2 and 0b1011 in index and 1 << 89 in index
+        assert index.add(7)
+    assert Path(file_name).stat().st_size == 3 * KEY_SIZE
+
+
+def test_duplicates_replaced_deterministically() -> None:
+    """ Test that tickets already issued are replaced, the same way for the same seed """
+    grid = generate_tickets_bulk(200, seed=1)
+    first = generate_tickets_bulk(100, seed=2, unique_index=TicketIndex())
+    second = generate_tickets_bulk(100, seed=2, unique_index=TicketIndex())
+    assert first == second
+
+    index = TicketIndex()
+    for position in range(50):
+        index.add(grid_ticket_mask(grid, position))
+    copy = bytearray(grid)
+    assert deduplicate_tickets(copy, index, Random(3)) == 50
+    assert copy[50 * TICKET_CELLS:] == grid[50 * TICKET_CELLS:]
+    assert len(_masks(copy)) == 200 and len(index) == 250
+
+
+def test_books_unique_across_runs(tmp_path: Path) -> None:
+    """ Test that books generated with the same seed in separate runs don't share tickets when using a file index """
+    file_name = str(tmp_path / 'issued.idx')
+    with TicketIndex(file_name) as index:
+        first = generate_book(300, seed=9, chunk_size=100, unique_index=index)
+    with TicketIndex(file_name) as index:
+        second = generate_book(300, seed=9, chunk_size=100, unique_index=index)
+    assert not _masks(first) & _masks(second)
+    assert len(_masks(first) | _masks(second)) == 600
+
+
+def test_strips_replaced_whole() -> None:
+    """ Test that a strip sharing a ticket with one already issued is regenerated as a valid strip """
+    grid = generate_strips_bulk(5, seed=4)
+    index = TicketIndex()
+    index.add(grid_ticket_mask(grid, 2 * TICKETS_PER_STRIP + 3))
+    unique = generate_strips_bulk(5, seed=4, unique_index=index)
+    assert unique[:2 * TICKETS_PER_STRIP * TICKET_CELLS] == grid[:2 * TICKETS_PER_STRIP * TICKET_CELLS]
+    assert unique != grid
+    assert all(validate_strip(strip_from_grid(unique, strip)) == [] for strip in range(5))
+    assert len(index) == 1 + 5 * TICKETS_PER_STRIP
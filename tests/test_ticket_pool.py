@@ -0,0 +1,141 @@
+""" Unit tests for the struct-of-arrays TicketPool and the ticket views it hands out """
+import io
+import json
+import random
+import tracemalloc
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+from housie import Board, Ticket, TicketPool, generate_ticket, generate_tickets_bulk, load_tickets
+from housie.constants import NUMBER_POOL
+from housie.display_util import display_followed_game
+from housie.game import mark_tickets, mark_tickets_full_board
+from housie.generate_ticket import tickets_from_grid
+from housie.models import TicketView
+from housie.storage import write_ticket_book, write_tickets_jsonl
+
+
+@pytest.fixture
+def plain() -> Dict[str, List[Ticket]]:
+    """ Generate a few players with a few regular tickets each """
+    random.seed(10000)  # So that we get reproducible test results
+    return {name: [generate_ticket() for _ in range(4)] for name in ['Thor', 'Loki', 'Odin']}
+
+
+def test_pool_keeps_rows_and_numbers(plain: Dict[str, List[Ticket]]) -> None:
+    """ Test that the views of the pool expose the same rows and numbers as the tickets put into it """
+    pool = TicketPool(plain)
+    assert list(pool) == list(plain)
+    for name, tickets in plain.items():
+        assert len(pool[name]) == len(tickets)
+        assert [view.rows for view in pool[name]] == [ticket.rows for ticket in tickets]
+        assert [view.numbers for view in pool[name]] == [ticket.numbers for ticket in tickets]
+        assert [view.rows for view in pool[name][1:3]] == [ticket.rows for ticket in tickets[1:3]]
+    assert pool.ticket_count == 12
+
+
+def test_pool_marks_and_displays_like_tickets(plain: Dict[str, List[Ticket]]) -> None:
+    """ Test that marking a pool matches marking every ticket individually, display included """
+    pool = TicketPool(plain)
+    board = Board(random.sample(NUMBER_POOL, 20))
+    mark_tickets_full_board(board, pool)
+    mark_tickets_full_board(board, plain)
+    for number in random.sample(NUMBER_POOL, 30):
+        mark_tickets(number, pool)
+        mark_tickets(number, plain)
+        for name, tickets in plain.items():
+            for view, ticket in zip(pool[name], tickets):
+                assert view.selected == ticket.selected
+                assert view.numbers_left() == ticket.numbers_left()
+                assert [view.is_row_complete(row) for row in range(3)] == \
+                       [ticket.is_row_complete(row) for row in range(3)]
+                assert view.is_full_house() == ticket.is_full_house()
+                assert view.structural_display() == ticket.structural_display()
+                assert view.minimalistic_display() == ticket.minimalistic_display()
+    output = io.StringIO()
+    with redirect_stdout(output):
+        display_followed_game(board, pool)
+    assert pool['Thor'][0].structural_display().split('\n')[0].rstrip() in output.getvalue()
+
+
+def test_view_marks_only_its_own_ticket(plain: Dict[str, List[Ticket]]) -> None:
+    """ Test that marking a number on a view marks it on that ticket only, and every view of it sees the mark """
+    pool = TicketPool(plain)
+    number = pool['Thor'][0].numbers[0]
+    pool['Thor'][0].mark_number(number)
+    pool['Thor'][0].mark_number(0)
+    assert pool['Thor'][0].is_marked(number)
+    assert pool['Thor'][0] == pool.ticket(0) and pool['Thor'][0] != pool.ticket(1)
+    assert all(not view.is_marked(number) for view in list(pool['Thor'])[1:])
+    assert isinstance(pool['Thor'][0], TicketView)
+    # A view holds nothing but its slots
+    assert not hasattr(pool['Thor'][0], '__dict__')
+
+
+def test_pool_keeps_marks_of_tickets_added() -> None:
+    """ Test that the numbers already marked on a ticket stay marked once it is in the pool """
+    ticket = Ticket([[11, 24, 48, 54, 82], [14, 32, 56, 69, 86], [2, 26, 36, 59, 73]])
+    ticket.mark_numbers([11, 86, 3])
+    pool = TicketPool({'Hela': [ticket]})
+    assert pool['Hela'][0].selected == {11, 86}
+    with pytest.raises(ValueError):
+        pool.add_ticket('Hela', [[1, 2, 3]])
+    with pytest.raises(IndexError):
+        pool.ticket(1)
+
+
+def test_every_way_of_adding_players_stores_them_in_the_pool(plain: Dict[str, List[Ticket]]) -> None:
+    """ Test that players added with update, setdefault or |= are stored in the arrays like those added by item """
+    pool = TicketPool()
+    pool.update({'Thor': plain['Thor']})
+    pool.setdefault('Loki', plain['Loki'])
+    pool.setdefault('Thor', [])
+    pool |= {'Odin': plain['Odin']}
+    assert pool.ticket_count == len(plain['Thor']) + len(plain['Loki']) + len(plain['Odin'])
+    assert all(isinstance(ticket, TicketView) for tickets in pool.values() for ticket in tickets)
+    assert {name: [ticket.rows for ticket in tickets] for name, tickets in pool.items()} == \
+        {name: [ticket.rows for ticket in tickets] for name, tickets in plain.items()}
+
+
+@pytest.mark.parametrize('extension', ['.json', '.jsonl', '.hbook'])
+def test_load_tickets_into_pool(tmp_path: Path, plain: Dict[str, List[Ticket]], extension: str) -> None:
+    """ Test that every format of tickets file can be loaded into a pool """
+    file_name = str(tmp_path / ('tickets' + extension))
+    records = [(name, ticket.rows) for name, tickets in plain.items() for ticket in tickets]
+    if extension == '.json':
+        Path(file_name).write_text(json.dumps({name: [ticket.rows for ticket in tickets]
+                                               for name, tickets in plain.items()}))
+    elif extension == '.jsonl':
+        write_tickets_jsonl(records, file_name)
+    else:
+        write_ticket_book(records, file_name)
+    pool = load_tickets(file_name, pool=True)
+    assert isinstance(pool, TicketPool)
+    assert {name: [view.rows for view in tickets] for name, tickets in pool.items()} == \
+           {name: [ticket.rows for ticket in tickets] for name, tickets in plain.items()}
+    assert load_tickets(str(tmp_path / ('missing' + extension)), pool=True) is None
+
+
+def test_pool_takes_a_tenth_of_the_memory() -> None:
+    """ Test that a pool takes at least an order of magnitude less memory per ticket than regular tickets """
+    grid = generate_tickets_bulk(5000, seed=1)
+    rows = [ticket.rows for ticket in tickets_from_grid(grid)]
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        tickets = [Ticket(ticket_rows) for ticket_rows in rows]
+        ticket_memory = tracemalloc.get_traced_memory()[0] - before
+        before = tracemalloc.get_traced_memory()[0]
+        pool = TicketPool()
+        for ticket_rows in rows:
+            pool.add_ticket('Player', ticket_rows)
+        pool_memory = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    assert len(tickets) == pool.ticket_count
+    assert pool_memory * 10 <= ticket_memory, (pool_memory, ticket_memory)
+    assert pool.memory_size() < 50 * pool.ticket_count
@@ -0,0 +1,81 @@
+""" Unit tests for the TicketRegistry index and the marking of tickets through it """
+import json
+import random
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+from housie import Board, Ticket, TicketRegistry, generate_ticket, load_tickets
+from housie.constants import NUMBER_POOL
+from housie.game import mark_tickets, mark_tickets_full_board
+
+
+@pytest.fixture
+def registry() -> TicketRegistry:
+    """ Generate a registry of a few players with a few tickets each """
+    random.seed(10000)  # So that we get reproducible test results
+    return TicketRegistry({name: [generate_ticket() for _ in range(4)] for name in ['Thor', 'Loki', 'Odin']})
+
+
+def test_index_only_contains_tickets_holding_the_number(registry: TicketRegistry) -> None:
+    """ Test that every ticket in the index for a number actually holds that number, and none are missed """
+    for number in NUMBER_POOL:
+        expected = [ticket for tickets in registry.values() for ticket in tickets if number in ticket.numbers]
+        assert registry.tickets_with(number) == expected
+
+
+def test_marking_through_registry_matches_marking_every_ticket(registry: TicketRegistry) -> None:
+    """ Test that marking through the index gives the same result as marking every ticket individually """
+    plain: Dict[str, List[Ticket]] = {name: [Ticket(ticket.rows) for ticket in tickets]
+                                      for name, tickets in registry.items()}
+    for number in random.sample(NUMBER_POOL, 40):
+        mark_tickets(number, registry)
+        mark_tickets(number, plain)
+    for name, tickets in registry.items():
+        assert [ticket.selected for ticket in tickets] == [ticket.selected for ticket in plain[name]]
+
+
+def test_mark_full_board_on_resume(registry: TicketRegistry) -> None:
+    """ Test that resuming a game marks all the numbers already on the board """
+    board = Board(random.sample(NUMBER_POOL, 30))
+    mark_tickets_full_board(board, registry)
+    for tickets in registry.values():
+        for ticket in tickets:
+            assert ticket.selected == set(ticket.numbers) & set(board.selected)
+
+
+def test_index_updated_when_players_change(registry: TicketRegistry) -> None:
+    """ Test that adding and removing players keeps the index in sync """
+    ticket = Ticket([[11, 24, 48, 54, 82], [14, 32, 56, 69, 86], [2, 26, 36, 59, 73]])
+    registry.add_ticket('Hela', ticket)
+    assert ticket in registry.tickets_with(11)
+    del registry['Hela']
+    assert ticket not in registry.tickets_with(11)
+    thor_tickets = registry['Thor']
+    del registry['Thor']
+    assert all(ticket not in registry.tickets_with(number) for ticket in thor_tickets for number in ticket.numbers)
+    assert registry.tickets_with(0) == [] and registry.tickets_with(91) == []
+
+
+def test_index_updated_by_every_dict_method(registry: TicketRegistry) -> None:
+    """ Test that players added or removed with the other methods of a dict are kept in the index too """
+    hela, fenrir, surtr = [Ticket([[11, 24, 48, 54, 82], [14, 32, 56, 69, 86], [2, 26, 36, 59, 73]]) for _ in range(3)]
+    registry.update({'Hela': [hela]})
+    registry.setdefault('Fenrir', [fenrir])
+    registry |= {'Surtr': [surtr]}
+    registry.mark_number(11)
+    assert hela.selected == fenrir.selected == surtr.selected == {11}
+    assert registry.pop('Hela') == [hela] and registry.popitem() == ('Surtr', [surtr])
+    assert hela not in registry.tickets_with(24) and surtr not in registry.tickets_with(24)
+    registry.clear()
+    assert all(registry.tickets_with(number) == [] for number in NUMBER_POOL)
+
+
+def test_load_tickets_returns_registry(tmp_path: Path) -> None:
+    """ Test that load_tickets builds the index while loading """
+    file_name = tmp_path / 'tickets.json'
+    file_name.write_text(json.dumps({'Aaron': [[[11, 24, 48, 54, 82], [14, 32, 56, 69, 86], [2, 26, 36, 59, 73]]]}))
+    ticket_data = load_tickets(str(file_name))
+    assert isinstance(ticket_data, TicketRegistry)
+    assert ticket_data.tickets_with(48) == ticket_data['Aaron']
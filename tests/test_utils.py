@@ -0,0 +1,24 @@
+""" Unit tests for the utils module """
+from housie.utils import MARKED_NUMBER_CELLS, NUMBER_CELLS, mask_to_numbers, number_cell, numbers_to_mask, popcount, \
+    strike_through
+
+
+def test_strike_through() -> None:
+    """ Test that every character is followed by the strike-through combining character """
+    assert strike_through('  7 ') == ' ̶ ̶7̶ ̶'
+
+
+def test_number_cells() -> None:
+    """ Test that the precomputed cells match formatting the numbers on the fly """
+    for number in range(1, 91):
+        assert NUMBER_CELLS[number] == number_cell(number) == '{: 3} '.format(number)
+        assert MARKED_NUMBER_CELLS[number] == number_cell(number, marked=True) == strike_through('{: 3} '.format(number))
+    assert number_cell(100) == '{: 3} '.format(100)
+
+
+def test_masks() -> None:
+    """ Test the conversions between numbers and 90-bit masks """
+    mask = numbers_to_mask([1, 45, 90, 0, 91])
+    assert mask_to_numbers(mask) == [1, 45, 90]
+    assert popcount(mask) == 3
+    assert mask < 1 << 90
@@ -0,0 +1,123 @@
+""" Unit tests for the bulk validation of tickets """
+import json
+from pathlib import Path
+from typing import Any, List
+
+import pytest
+
+from housie import generate_strip, generate_tickets_bulk, load_tickets, validate_tickets
+from housie.generate_ticket import grid_ticket_rows
+from housie.storage import TicketBook, write_ticket_book
+from housie.validate import InvalidTicketsError, TicketValidator, format_report, is_valid_ticket, ticket_errors
+
+VALID_ROWS = [[11, 24, 48, 54, 82], [14, 32, 56, 69, 86], [2, 26, 36, 59, 73]]
+
+
+def test_generated_tickets_are_valid() -> None:
+    """ Test that every generated ticket passes validation """
+    grid = generate_tickets_bulk(2000, seed=7)
+    records = [('Player', grid_ticket_rows(grid, index)) for index in range(2000)]
+    records += [('Strip', ticket.rows) for ticket in generate_strip()]
+    assert validate_tickets(records) == []
+
+
+@pytest.mark.parametrize('rows, error', [
+    ([[11, 24, 48, 54, 82], [14, 32, 56, 69, 86]], 'Ticket has 2 rows, expected 3'),
+    ([[11, 24, 48, 54], [14, 32, 56, 69, 86], [2, 26, 36, 59, 73]], 'Row 1 has 4 numbers, expected 5'),
+    ([[11, 24, 48, 54, None], [14, 32, 56, 69, 86], [2, 26, 36, 59, 73]],
+     'Row 1 has a blank, which is not a number from 1 to 90'),
+    ([[11, 24, 48, 54, 91], [14, 32, 56, 69, 86], [2, 26, 36, 59, 73]],
+     'Row 1 has 91, which is not a number from 1 to 90'),
+    ([[11, 24, 48, 54, '82'], [14, 32, 56, 69, 86], [2, 26, 36, 59, 73]],
+     "Row 1 has '82', which is not a number from 1 to 90"),
+    ([[11, 24, 48, 54, 82], [14, 32, 56, 69, 86], [12, 26, 36, 59, 73]], 'Column 1 has no numbers'),
+    ([[11, 24, 48, 54, 82], [14, 32, 56, 69, 86], [2, 24, 36, 59, 73]], 'Number 24 appears more than once'),
+    ([[14, 24, 48, 54, 82], [11, 32, 56, 69, 86], [2, 26, 36, 59, 73]],
+     'Column 2 is not in ascending order from top to bottom'),
+    ([[11, 24, 48, 82, 54], [14, 32, 56, 69, 86], [2, 26, 36, 59, 73]], 'Row 1 is not in ascending order'),
+    ([[11, 14, 48, 54, 82], [24, 32, 56, 69, 86], [2, 26, 36, 59, 73]], 'Row 1 has more than one number in column 2'),
+    ([[11, 14, 48, 54, 82], [15, 32, 56, 69, 86], [2, 16, 36, 59, 73]], 'Column 2 has 4 numbers, at most 3 are allowed'),
+    ('not a ticket', 'Ticket is not a list of rows'),
+    ([[11, 24, None, None, 48, 54, None, None, 82]] + VALID_ROWS[1:],
+     'Row 1 has 11 in column 1, which belongs in column 2'),
+    ([[None, 11, 24, None, 48, None, None, 0, None]] + VALID_ROWS[1:], 'Row 1 has 3 numbers, expected 5'),
+])
+def test_invalid_tickets_are_reported(rows: object, error: str) -> None:
+    """ Test that each rule broken by a ticket is reported, by both the quick and the full check """
+    assert is_valid_ticket(VALID_ROWS) and ticket_errors(VALID_ROWS) == []
+    assert not is_valid_ticket(rows)
+    assert error in ticket_errors(rows)
+
+
+def test_rows_laid_out_on_the_grid() -> None:
+    """ Test that rows with a cell per column are valid with None or 0 in their blank cells """
+    grid_rows = [[None, 11, 24, None, 48, 54, None, None, 82], [None, 14, None, 32, None, 56, 69, None, 86],
+                 [2, 0, 26, 36, 0, 59, 0, 73, 0]]
+    assert is_valid_ticket(grid_rows) and ticket_errors(grid_rows) == []
+    assert is_valid_ticket([grid_rows[0]] + VALID_ROWS[1:])
+    assert not is_valid_ticket([[11, 24, 48, 54, 82, None, None, None, None]] + VALID_ROWS[1:])
+
+
+def test_report_gives_player_and_ticket() -> None:
+    """ Test that the report gives the player and index of every invalid ticket, in order """
+    bad_rows: List[Any] = [VALID_ROWS[0], VALID_ROWS[1]]
+    report = validate_tickets([('Thor', VALID_ROWS), ('Thor', bad_rows), ('Loki', bad_rows), ('Thor', VALID_ROWS)])
+    assert [(errors.name, errors.ticket_index) for errors in report] == [('Thor', 1), ('Loki', 0)]
+    assert report[0].errors[0] == 'Ticket has 2 rows, expected 3'
+    assert format_report(report).splitlines() == [
+        '2 invalid tickets',
+        "Ticket 2 of 'Thor': " + '; '.join(report[0].errors),
+        "Ticket 1 of 'Loki': " + '; '.join(report[1].errors)]
+    assert format_report(report, limit=1).splitlines()[-1] == '... and 1 more'
+
+
+def test_check_player() -> None:
+    """ Test that checking the tickets of a player at once keeps the valid ones and numbers the others across calls """
+    validator = TicketValidator()
+    bad_rows: List[Any] = [VALID_ROWS[0]]
+    assert validator.check_player('Thor', [VALID_ROWS, VALID_ROWS]) == [VALID_ROWS, VALID_ROWS]
+    assert validator.check_player('Thor', [bad_rows, VALID_ROWS, bad_rows]) == [VALID_ROWS]
+    assert validator.check_player('Loki', 'not tickets') == []
+    assert [(errors.name, errors.ticket_index) for errors in validator.report] == [('Thor', 2), ('Thor', 4), ('Loki', 0)]
+    assert validator.report[-1].errors == ['Tickets of the player are not a list of tickets']
+
+
+def test_load_tickets_validates(tmp_path: Path) -> None:
+    """ Test that loading a file with invalid tickets raises, unless validation is turned off """
+    file_name = tmp_path / 'tickets.json'
+    file_name.write_text(json.dumps({'Aaron': [VALID_ROWS, [[11, 24, 48, 54, 0]] + VALID_ROWS[1:]]}))
+    with pytest.raises(InvalidTicketsError) as error:
+        load_tickets(str(file_name))
+    assert [(errors.name, errors.ticket_index) for errors in error.value.report] == [('Aaron', 1)]
+    with pytest.raises(InvalidTicketsError):
+        load_tickets(str(file_name), pool=True)
+    ticket_data = load_tickets(str(file_name), validate=False)
+    assert ticket_data is not None and len(ticket_data['Aaron']) == 2
+
+
+@pytest.mark.parametrize('file_name', ['tickets.json', 'tickets.jsonl'])
+def test_load_tickets_laid_out_on_the_grid(tmp_path: Path, file_name: str) -> None:
+    """ Test that files of tickets laid out on the grid still load, without their blank cells """
+    grid_rows = [[None, 11, 24, None, 48, 54, None, None, 82], [None, 14, None, 32, None, 56, 69, None, 86],
+                 [2, 0, 26, 36, 0, 59, 0, 73, 0]]
+    path = tmp_path / file_name
+    if file_name.endswith('.jsonl'):
+        path.write_text(json.dumps({'name': 'Aaron', 'ticket': grid_rows}) + '\n')
+    else:
+        path.write_text(json.dumps({'Aaron': [grid_rows]}))
+    for pool in [False, True]:
+        ticket_data = load_tickets(str(path), pool=pool)
+        assert ticket_data is not None and ticket_data['Aaron'][0].rows == VALID_ROWS
+
+
+def test_load_tickets_validates_books_on_request(tmp_path: Path) -> None:
+    """ Test that binary books are only checked when asked to """
+    file_name = str(tmp_path / 'tickets.hbook')
+    write_ticket_book([('Aaron', VALID_ROWS), ('Aaron', [[11, 24, 48, 54, 82], [14, 32, 56, 69, 86],
+                                                         [2, 26, 36, 59, 82]])], file_name)
+    ticket_data = load_tickets(file_name)
+    assert isinstance(ticket_data, TicketBook) and len(ticket_data['Aaron']) == 2
+    ticket_data.close()
+    with pytest.raises(InvalidTicketsError) as error:
+        load_tickets(file_name, validate=True)
+    assert 'Number 82 appears more than once' in error.value.report[0].errors